@@ -39,7 +39,6 @@ try:
     print("\n===== Importing required modules =====")
     import pandas as pd
     import requests
-    from bs4 import BeautifulSoup
     print("All modules imported successfully")
 except ImportError as e:
     print(f"ERROR importing modules: {e}")
@@ -47,24 +46,24 @@ except ImportError as e:
     sys.exit(1)
 
 # Run the ETL script
-print("\n===== Running the fetch_data.py script =====")
+print("\n===== Running the ETL pipeline =====")
 try:
-    script_path = os.path.join(os.getcwd(), "etl", "fetch_data.py")
-    print(f"Script path: {script_path}")
-    
-    # Create initial data if history.parquet doesn't exist
+    # Create initial data if neither the history store nor a legacy history.parquet exists
     history_path = os.path.join(data_dir, "history.parquet")
-    if not os.path.exists(history_path):
-        print("history.parquet not found, creating initial data...")
+    store_manifest = os.path.join(data_dir, "history", "manifest.json")
+    if not os.path.exists(history_path) and not os.path.exists(store_manifest):
+        print("No history found, creating initial data...")
         try:
-            exec(open(os.path.join(os.getcwd(), "etl", "create_initial_data.py")).read())
+            from etl.create_initial_data import main as create_initial_data
+            create_initial_data(data_dir)
             print("Initial data created successfully")
         except Exception as e:
             print(f"ERROR creating initial data: {e}")
             traceback.print_exc()
     
-    # Run the fetch data script
-    exec(open(script_path).read())
+    # Run the ETL pipeline
+    from etl.pipeline import Pipeline
+    Pipeline(script_dir).run()
     print("\n===== ETL script completed successfully =====")
 except Exception as e:
     print(f"\nERROR running ETL script: {e}")
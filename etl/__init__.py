@@ -0,0 +1,14 @@
+"""
+Liquidity Dashboard ETL.
+
+The pipeline is importable (`from etl import Pipeline`) and runnable as
+`python -m etl <command>`. Importing the package is cheap; the pipeline
+and its pandas/requests dependencies load on first use.
+"""
+
+
+def __getattr__(name):
+    if name == "Pipeline":
+        from etl.pipeline import Pipeline
+        return Pipeline
+    raise AttributeError(f"module 'etl' has no attribute {name!r}")
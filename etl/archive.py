@@ -0,0 +1,334 @@
+"""
+Content-addressed, delta-compressed archive of published series.
+
+Each archived snapshot of a series is identified by the sha256 of its
+canonical JSON. The object stored under that hash is usually a delta
+against the series' previous snapshot: the dates it removed and the
+records it added or changed. Every KEYFRAME_EVERY-th snapshot in a chain
+(or one whose delta would not be much smaller) is stored in full, so
+rebuilding a snapshot applies at most KEYFRAME_EVERY - 1 deltas. Storage
+therefore grows with what changed between snapshots rather than with the
+length of the series, and an unchanged series costs one index entry.
+
+Layout under web/public/series/archive/:
+    index.json                 {"series": {name: {"YYYY-MM-DD": hash}}}
+    objects/<aa>/<hash>.json.gz  {"kind": "full", "records": [...]} or
+                               {"kind": "delta", "base": hash, "depth": n,
+                                "removed": [dates], "upserts": [records]}
+
+    python -m etl archive add                      # snapshot today's published series
+    python -m etl archive list [NAME]
+    python -m etl archive show NAME 2025-05-18     # snapshot on or before that date
+    python -m etl archive restore NAME 2025-05-18 --output srf.json
+    python -m etl archive import                   # fold <name>-<date>.json copies in
+    python -m etl archive verify
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+from collections import OrderedDict
+from datetime import date
+
+from etl.history_store import file_lock
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERIES_DIR = os.path.join(BASE, "web", "public", "series")
+ARCHIVE_DIR = os.path.join(SERIES_DIR, "archive")
+
+# Longest delta chain before a snapshot is stored in full
+KEYFRAME_EVERY = 16
+# A delta larger than this share of the full snapshot is stored in full instead
+MAX_DELTA_RATIO = 0.5
+# Rebuilt snapshots kept in memory, by hash
+SNAPSHOT_CACHE_SIZE = 32
+
+# Full copies written by the old backup script: <name>-YYYY-MM-DD.json
+LEGACY_NAME = re.compile(r"^(?P<name>.+)-(?P<day>\d{4}-\d{2}-\d{2})\.json$")
+
+
+def canonical(records: list) -> bytes:
+    return json.dumps(records, separators=(",", ":")).encode()
+
+
+def content_hash(records: list) -> str:
+    return hashlib.sha256(canonical(records)).hexdigest()
+
+
+def make_delta(base: list, records: list) -> dict:
+    """Dates removed from `base` and records of `records` that are new or changed, keyed by date"""
+    before = {record["date"]: record for record in base}
+    after = {record["date"]: record for record in records}
+    return {
+        "removed": [day for day in before if day not in after],
+        "upserts": [record for day, record in after.items() if before.get(day) != record],
+    }
+
+
+def apply_delta(base: list, delta: dict) -> list:
+    by_date = {record["date"]: record for record in base}
+    for day in delta["removed"]:
+        del by_date[day]
+    for record in delta["upserts"]:
+        by_date[record["date"]] = record
+    return [by_date[day] for day in sorted(by_date)]
+
+
+def _deltable(records: list) -> bool:
+    """Deltas key records by date, so the dates must be unique and in order"""
+    days = [record.get("date") if isinstance(record, dict) else None for record in records]
+    return all(isinstance(day, str) for day in days) and all(a < b for a, b in zip(days, days[1:]))
+
+
+class SeriesArchive:
+    """Dated snapshots of published series, stored as content-addressed deltas"""
+
+    def __init__(self, root: str = ARCHIVE_DIR):
+        self.root = root
+        self.index_path = os.path.join(root, "index.json")
+        self.lock_path = os.path.join(root, "archive.lock")
+        self._snapshots = OrderedDict()
+
+    # ---------- index and objects ----------
+
+    def read_index(self) -> dict:
+        try:
+            with open(self.index_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"series": {}}
+
+    def _write_index(self, index: dict):
+        tmp = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(index, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.index_path)
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.json.gz")
+
+    def _read_object(self, digest: str) -> dict:
+        with gzip.open(self._object_path(digest), "rt") as f:
+            return json.load(f)
+
+    def _write_object(self, digest: str, obj: dict) -> int:
+        path = self._object_path(digest)
+        data = gzip.compress(json.dumps(obj, separators=(",", ":")).encode(), compresslevel=9, mtime=0)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        return len(data)
+
+    # ---------- reading ----------
+
+    def names(self) -> list:
+        return sorted(self.read_index()["series"])
+
+    def dates(self, name: str) -> list:
+        return sorted(self.read_index()["series"].get(name, {}))
+
+    def resolve(self, name: str, day=None):
+        """(date, hash) of the latest snapshot of `name` on or before `day` (default: latest)"""
+        snapshots = self.read_index()["series"].get(name, {})
+        day = str(day) if day is not None else None
+        eligible = [d for d in snapshots if day is None or d <= day]
+        if not eligible:
+            raise KeyError(f"No snapshot of {name!r}" + (f" on or before {day}" if day else ""))
+        latest = max(eligible)
+        return latest, snapshots[latest]
+
+    def records(self, digest: str) -> list:
+        """The snapshot stored under `digest`, rebuilt from its keyframe and deltas"""
+        cached = self._snapshots.get(digest)
+        if cached is not None:
+            self._snapshots.move_to_end(digest)
+            return cached
+        chain, current = [], digest
+        while True:
+            cached = self._snapshots.get(current)
+            if cached is not None:
+                records = cached
+                break
+            obj = self._read_object(current)
+            if obj["kind"] == "full":
+                records = obj["records"]
+                break
+            chain.append(obj)
+            current = obj["base"]
+        for delta in reversed(chain):
+            records = apply_delta(records, delta)
+        self._remember(digest, records)
+        return records
+
+    def snapshot(self, name: str, day=None) -> list:
+        """Records of `name` as archived on `day` (or the latest snapshot before it)"""
+        return self.records(self.resolve(name, day)[1])
+
+    def _remember(self, digest: str, records: list):
+        self._snapshots[digest] = records
+        self._snapshots.move_to_end(digest)
+        while len(self._snapshots) > SNAPSHOT_CACHE_SIZE:
+            self._snapshots.popitem(last=False)
+
+    # ---------- writing ----------
+
+    def add(self, name: str, records: list, day=None) -> dict:
+        """
+        Archive `records` as the snapshot of `name` on `day` (default today),
+        replacing an earlier snapshot of the same day. Returns
+        {"hash", "kind", "bytes"}; kind is "same" when the content is already stored.
+        """
+        day = str(day or date.today())
+        digest = content_hash(records)
+        os.makedirs(self.root, exist_ok=True)
+        with file_lock(self.lock_path):
+            index = self.read_index()
+            snapshots = index["series"].setdefault(name, {})
+            if os.path.exists(self._object_path(digest)):
+                kind, size = "same", 0
+            else:
+                base = self._base(snapshots, day)
+                obj = {"kind": "full", "records": records}
+                if base is not None and _deltable(records) and _deltable(self.records(base[0])):
+                    base_digest, depth = base[0], base[1] + 1
+                    delta = make_delta(self.records(base_digest), records)
+                    small = len(canonical(delta["upserts"])) <= MAX_DELTA_RATIO * len(canonical(records))
+                    if depth < KEYFRAME_EVERY and small:
+                        obj = {"kind": "delta", "base": base_digest, "depth": depth, **delta}
+                kind, size = obj["kind"], self._write_object(digest, obj)
+            snapshots[day] = digest
+            self._write_index(index)
+        self._remember(digest, records)
+        return {"hash": digest, "kind": kind, "bytes": size}
+
+    def _base(self, snapshots: dict, day: str):
+        """(hash, chain depth) of the snapshot a new one on `day` is diffed against"""
+        earlier = [d for d in snapshots if d < day] or [d for d in snapshots if d == day]
+        if not earlier:
+            return None
+        digest = snapshots[max(earlier)]
+        return digest, self._read_object(digest).get("depth", 0)
+
+    def add_files(self, paths, day=None) -> dict:
+        """Archive published series files (<series>/<name>.json); returns name -> add() result"""
+        results = {}
+        for path in paths:
+            name = os.path.basename(path)[:-len(".json")]
+            with open(path, "r") as f:
+                results[name] = self.add(name, json.load(f), day)
+        return results
+
+    def import_legacy(self, remove: bool = True) -> list:
+        """Fold full <name>-YYYY-MM-DD.json copies in the archive directory into the archive"""
+        found = []
+        for entry in sorted(os.listdir(self.root)) if os.path.isdir(self.root) else []:
+            match = LEGACY_NAME.match(entry)
+            if match:
+                found.append((match["day"], match["name"], os.path.join(self.root, entry)))
+        imported = []
+        for day, name, path in sorted(found):  # oldest first, so deltas run forwards
+            with open(path, "r") as f:
+                records = json.load(f)
+            result = self.add(name, records, day)
+            if content_hash(self.snapshot(name, day)) != result["hash"]:
+                raise ValueError(f"Archived {path} does not rebuild to the same content; kept the file")
+            if remove:
+                os.remove(path)
+            imported.append((name, day, result))
+        return imported
+
+    def verify(self) -> list:
+        """Problems found rebuilding every snapshot and checking its hash"""
+        problems = []
+        for name, snapshots in self.read_index()["series"].items():
+            for day, digest in sorted(snapshots.items()):
+                try:
+                    if content_hash(self.records(digest)) != digest:
+                        problems.append(f"{name} {day}: rebuilt content does not match {digest[:12]}")
+                except (OSError, ValueError, KeyError) as e:
+                    problems.append(f"{name} {day}: {type(e).__name__}: {e}")
+        return problems
+
+    def disk_bytes(self) -> int:
+        total = 0
+        for directory, _, files in os.walk(os.path.join(self.root, "objects")):
+            total += sum(os.path.getsize(os.path.join(directory, name)) for name in files)
+        return total
+
+
+def published_series(series_dir: str = SERIES_DIR) -> list:
+    """The record series files published in `series_dir` (<name>.json, not .col.json)"""
+    return sorted(
+        os.path.join(series_dir, name) for name in os.listdir(series_dir)
+        if name.endswith(".json") and not name.endswith(".col.json")
+        and os.path.isfile(os.path.join(series_dir, name))
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m etl archive", description="Delta-compressed series archive")
+    parser.add_argument("--root", default=ARCHIVE_DIR, help="archive directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("add", help="snapshot published series")
+    command.add_argument("names", nargs="*", help="series names (default: every published series)")
+    command.add_argument("--date", default=None, help="snapshot date (default today)")
+    command.add_argument("--series-dir", default=SERIES_DIR)
+
+    command = commands.add_parser("list", help="snapshot dates per series")
+    command.add_argument("name", nargs="?")
+
+    for name, help_text in (("show", "print a snapshot"), ("restore", "write a snapshot to a file")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("name")
+        command.add_argument("date", nargs="?", default=None, help="YYYY-MM-DD (default: latest)")
+        if name == "restore":
+            command.add_argument("--output", default=None, help="file to write (default <name>-<date>.json)")
+
+    commands.add_parser("import", help="fold full <name>-<date>.json copies into the archive")
+    commands.add_parser("verify", help="rebuild every snapshot and check its hash")
+    args = parser.parse_args(argv)
+
+    archive = SeriesArchive(args.root)
+    if args.command == "add":
+        paths = published_series(args.series_dir)
+        if args.names:
+            paths = [p for p in paths if os.path.basename(p)[:-len(".json")] in args.names]
+        for name, result in archive.add_files(paths, args.date).items():
+            print(f"{name:<24} {result['kind']:<6} {result['bytes']:>8} bytes  {result['hash'][:12]}")
+    elif args.command == "list":
+        names = [args.name] if args.name else archive.names()
+        for name in names:
+            dates = archive.dates(name)
+            print(f"{name:<24} {len(dates):>4} snapshot(s)  {dates[0] if dates else ''} .. {dates[-1] if dates else ''}")
+        print(f"{archive.disk_bytes()} bytes in objects/")
+    elif args.command in ("show", "restore"):
+        day, digest = archive.resolve(args.name, args.date)
+        records = archive.records(digest)
+        text = json.dumps(records, indent=2)
+        if args.command == "show":
+            print(text)
+        else:
+            output = args.output or f"{args.name}-{day}.json"
+            with open(output, "w") as f:
+                f.write(text)
+            print(f"Wrote {len(records)} records of {args.name} as of {day} to {output}")
+    elif args.command == "import":
+        for name, day, result in archive.import_legacy():
+            print(f"{name:<24} {day}  {result['kind']:<6} {result['bytes']:>8} bytes")
+    elif args.command == "verify":
+        problems = archive.verify()
+        for problem in problems:
+            print(problem)
+        print(f"{len(problems)} problem(s) found" if problems else "OK")
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
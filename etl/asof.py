@@ -0,0 +1,185 @@
+"""
+As-of alignment for the Liquidity Dashboard ETL.
+
+History is stored at each series' native frequency: business-day ON-RRP,
+weekly reserves, daily MOVE and SRF totals, auction statistics on auction
+days. Nothing is forward-filled on disk. Calendar views are built on demand
+with an as-of join, the same semantics as pandas.merge_asof with
+direction="backward": every date of the target calendar takes the latest
+observation on or before it. A daily view over the full range is identical
+to the old resample('D').last().ffill() frame. Views are built only when
+asked for and cached per calendar.
+
+    aligned = AsOfHistory.from_frame(hist)
+    daily = aligned.daily(start="2024-01-01")
+    weekly = aligned.view("W-WED", columns=["reserves"])
+    auctions = aligned.observed(["bill_share", "tail_bp"])
+
+    python -m etl asof view reserves --freq W-WED --last 8
+    python -m etl asof compact      # drop forward-filled repeats from data/history
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Calendars the views are usually asked for; any pandas frequency string works
+FREQUENCIES = {"daily": "D", "business": "B", "weekly": "W-WED"}
+
+
+def asof_positions(observed: np.ndarray, calendar: np.ndarray) -> np.ndarray:
+    """Index of the latest observation on or before each calendar date (-1 if none)"""
+    return np.searchsorted(observed, calendar, side="right") - 1
+
+
+def strip_repeats(hist: pd.DataFrame) -> pd.DataFrame:
+    """
+    Blank every value that repeats its column's previous observation and drop
+    rows left empty. Forward-filled history becomes native-frequency history
+    without changing any as-of view; the last row is kept so views still end
+    on the same date.
+    """
+    stripped = {}
+    for column in hist.columns:
+        values = hist[column]
+        previous = values.ffill().shift()
+        repeat = values.notna() & (values == previous)
+        repeat.iloc[-1:] = False
+        stripped[column] = values.mask(repeat)
+    frame = pd.DataFrame(stripped, index=hist.index)
+    keep = frame.notna().any(axis=1)
+    keep.iloc[-1:] = True
+    return frame[keep]
+
+
+class AsOfHistory:
+    """Native-frequency series with lazily built, cached calendar views"""
+
+    def __init__(self, series: dict):
+        self.columns = list(series)
+        self._days = {}
+        self._values = {}
+        for name, values in series.items():
+            values = values.dropna()
+            values = values[~values.index.duplicated(keep="last")].sort_index()
+            self._days[name] = values.index.values.astype("datetime64[ns]")
+            self._values[name] = values.to_numpy(dtype="float64")
+        self._views = {}
+
+    @classmethod
+    def from_frame(cls, hist: pd.DataFrame) -> "AsOfHistory":
+        """Split a date-indexed frame into one native series per column"""
+        if not isinstance(hist.index, pd.DatetimeIndex):
+            hist = hist.set_axis(pd.to_datetime(hist.index))
+        return cls({column: hist[column] for column in hist.columns})
+
+    @property
+    def start(self) -> pd.Timestamp:
+        return min(pd.Timestamp(days[0]) for days in self._days.values() if len(days))
+
+    @property
+    def end(self) -> pd.Timestamp:
+        return max(pd.Timestamp(days[-1]) for days in self._days.values() if len(days))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(self._days[c].nbytes + self._values[c].nbytes for c in self.columns)
+
+    def native(self, column: str, start=None, end=None, seed: bool = False) -> pd.Series:
+        """
+        The observations of one column between `start` and `end`, as stored.
+        With `seed`, the last observation before `start` is included too, so
+        the value in force at `start` is known even after a gap in the history.
+        """
+        days, values = self._days[column], self._values[column]
+        lo = 0 if start is None else np.searchsorted(days, np.datetime64(pd.Timestamp(start)), "left")
+        lo = max(lo - 1, 0) if seed else lo
+        hi = len(days) if end is None else np.searchsorted(days, np.datetime64(pd.Timestamp(end)), "right")
+        return pd.Series(values[lo:hi], index=pd.DatetimeIndex(days[lo:hi], name="date"), name=column)
+
+    def align(self, calendar, columns=None) -> pd.DataFrame:
+        """As-of join of `columns` (default all) onto the dates of `calendar`"""
+        calendar = pd.DatetimeIndex(calendar, name="date")
+        target = calendar.values.astype("datetime64[ns]")
+        aligned = {}
+        for column in columns or self.columns:
+            at = asof_positions(self._days[column], target)
+            values = np.full(len(at), np.nan)
+            values[at >= 0] = self._values[column][at[at >= 0]]
+            aligned[column] = values
+        return pd.DataFrame(aligned, index=calendar)
+
+    def view(self, freq: str = "D", start=None, end=None, columns=None) -> pd.DataFrame:
+        """
+        The history on a regular calendar (`freq`, e.g. "D", "B", "W-WED"),
+        from `start` (default the first observation) to `end` (default the last).
+        """
+        start = pd.Timestamp(start).normalize() if start is not None else self.start
+        end = pd.Timestamp(end).normalize() if end is not None else self.end
+        key = (FREQUENCIES.get(freq, freq), start, end, tuple(columns or self.columns))
+        if key not in self._views:
+            self._views[key] = self.align(pd.date_range(start, end, freq=key[0]), key[3])
+        return self._views[key]
+
+    def daily(self, start=None, end=None, columns=None) -> pd.DataFrame:
+        return self.view("D", start, end, columns)
+
+    def business(self, start=None, end=None, columns=None) -> pd.DataFrame:
+        return self.view("B", start, end, columns)
+
+    def weekly(self, start=None, end=None, columns=None) -> pd.DataFrame:
+        return self.view("W-WED", start, end, columns)
+
+    def observed(self, columns, start=None, end=None, seed: bool = False) -> pd.DataFrame:
+        """`columns` as-of aligned on the dates any of them was observed (`seed` as in native)"""
+        calendar = pd.DatetimeIndex([], name="date")
+        for column in columns:
+            calendar = calendar.union(self.native(column, start, end, seed).index)
+        return self.align(calendar, columns)
+
+
+def main(argv=None):
+    from etl.history_store import HistoryStore
+
+    parser = argparse.ArgumentParser(prog="python -m etl asof", description="Native-frequency history views")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("view", help="print columns on a calendar")
+    command.add_argument("columns", nargs="*", help="history columns (default all)")
+    command.add_argument("--freq", default="D", help="daily, business, weekly or a pandas frequency")
+    command.add_argument("--start", default=None)
+    command.add_argument("--end", default=None)
+    command.add_argument("--last", type=int, default=20)
+
+    command = commands.add_parser("compact", help="drop forward-filled repeats from the history store")
+    command.add_argument("--dry-run", action="store_true", help="report only")
+    args = parser.parse_args(argv)
+
+    store = HistoryStore(os.path.join(BASE, "data", "history"),
+                         legacy_path=os.path.join(BASE, "data", "history.parquet"))
+    # A view only needs its own columns, up to its end; the start is not pushed
+    # down because the first days take observations from before it
+    hist = store.read(args.columns or None, end=args.end) if args.command == "view" else store.read()
+    if hist.empty:
+        print(f"No history in {store.root}")
+        return 1
+
+    if args.command == "view":
+        aligned = AsOfHistory.from_frame(hist)
+        print(aligned.view(args.freq, args.start, args.end, args.columns or None).tail(args.last).to_string())
+    elif args.command == "compact":
+        native = strip_repeats(hist)
+        print(f"{int(hist.notna().sum().sum())} values in {len(hist)} rows -> "
+              f"{int(native.notna().sum().sum())} values in {len(native)} rows")
+        if not args.dry_run:
+            store.replace(native)
+            print(f"History rewritten at native frequency in {store.root}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Persisted Treasury auction results for the Liquidity Dashboard ETL.
+Every auction on the TreasuryDirect results page is kept in one table
+keyed by (CUSIP, auction date); a run only adds auctions it has not seen.
+bill_share and tail_bp are then derived per day over a rolling window of
+that table instead of from whichever auctions the page happens to list.
+"""
+import os
+
+import pandas as pd
+
+from etl.extract import extract
+from etl.history_store import file_lock
+
+# Days of auctions behind each day's bill share and worst tail
+AUCTION_WINDOW_DAYS = 28
+
+# Consecutive already-stored auctions after which the page scan stops
+STOP_AFTER_SEEN = 5
+
+KEY = ["cusip", "auction_date"]
+COLUMNS = KEY + ["security_type", "security_term", "high_yield", "when_issued", "tail_bp"]
+
+
+def parse_auctions(html: str, seen: set = None, stop_after_seen: int = STOP_AFTER_SEEN) -> pd.DataFrame:
+    """
+    Auction rows of the results table. The page lists the newest auctions
+    first, so given the `seen` (cusip, auction_date) keys the scan stops after
+    `stop_after_seen` consecutive known auctions instead of reading the rest.
+    """
+    known_run = 0
+    seen_cusips = {cusip for cusip, _ in seen or ()}
+
+    def stop(row):
+        nonlocal known_run
+        cusip = row.get("cusip", "").strip()
+        # a CUSIP is reopened at later auctions, so only the full key counts as seen
+        known = cusip in seen_cusips and (cusip, pd.to_datetime(row.get("auction_date"), errors="coerce")) in seen
+        known_run = known_run + 1 if known else 0
+        return known_run >= stop_after_seen
+
+    table = pd.DataFrame(extract("auctions", html, stop=stop if seen else None))
+    if table.empty:
+        return pd.DataFrame({column: pd.Series(dtype="object") for column in COLUMNS})
+    auctions = pd.DataFrame({
+        "cusip": table["cusip"].astype(str).str.strip(),
+        "auction_date": pd.to_datetime(table["auction_date"], errors="coerce"),
+        "security_type": table["security_type"].astype(str).str.strip(),
+        "security_term": table["security_term"].astype(str).str.strip() if "security_term" in table else None,
+    })
+    for column in ("high_yield", "when_issued"):
+        values = table[column].astype(str).str.rstrip("%") if column in table else None
+        auctions[column] = pd.to_numeric(values, errors="coerce") if values is not None else float("nan")
+    auctions["tail_bp"] = ((auctions["high_yield"] - auctions["when_issued"]) * 100).round(2)  # bp
+    auctions = auctions.dropna(subset=KEY)
+    return auctions.drop_duplicates(KEY, keep="last")[COLUMNS].reset_index(drop=True)
+
+
+class AuctionStore:
+    """Auction results keyed by (cusip, auction_date) in a single parquet file"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.path = os.path.join(root, "auctions.parquet")
+        self.lock_path = os.path.join(root, "auctions.lock")
+        os.makedirs(root, exist_ok=True)
+
+    def read(self) -> pd.DataFrame:
+        if not os.path.exists(self.path):
+            return pd.DataFrame({column: pd.Series(dtype="object") for column in COLUMNS})
+        return pd.read_parquet(self.path)
+
+    def keys(self) -> set:
+        """(cusip, auction_date) of every stored auction"""
+        auctions = self.read()
+        return set(zip(auctions["cusip"], auctions["auction_date"]))
+
+    def query(self, start=None, end=None, security_type: str = None) -> pd.DataFrame:
+        """Stored auctions between `start` and `end` (inclusive), optionally of one security type"""
+        auctions = self.read()
+        mask = pd.Series(True, index=auctions.index)
+        if start is not None:
+            mask &= auctions["auction_date"] >= pd.Timestamp(start)
+        if end is not None:
+            mask &= auctions["auction_date"] <= pd.Timestamp(end)
+        if security_type is not None:
+            mask &= auctions["security_type"].str.contains(security_type, case=False)
+        return auctions[mask]
+
+    def ingest(self, auctions: pd.DataFrame) -> pd.DataFrame:
+        """Store the auctions not seen before and return them"""
+        with file_lock(self.lock_path):
+            stored = self.read()
+            seen = pd.MultiIndex.from_frame(stored[KEY]) if len(stored) else None
+            new = auctions if seen is None else auctions[~pd.MultiIndex.from_frame(auctions[KEY]).isin(seen)]
+            if new.empty:
+                return new
+            table = pd.concat([stored, new], ignore_index=True) if len(stored) else new.reset_index(drop=True)
+            table = table.sort_values(KEY[::-1], kind="stable").reset_index(drop=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            table.to_parquet(tmp, index=False)
+            os.replace(tmp, self.path)
+        return new
+
+
+def rolling_stats(auctions: pd.DataFrame, start, end, window_days: int = AUCTION_WINDOW_DAYS) -> pd.DataFrame:
+    """
+    Daily bill_share (bill auctions / all auctions) and tail_bp (worst tail)
+    over the `window_days` ending on each day from `start` to `end`.
+    Days whose window holds no auction are NaN.
+    """
+    start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+    days = pd.date_range(start - pd.Timedelta(days=window_days - 1), end, name="date")
+    auctions = auctions[(auctions["auction_date"] >= days[0]) & (auctions["auction_date"] <= end)]
+
+    by_day = auctions.assign(is_bill=auctions["security_type"].str.contains("Bill", case=False)).groupby("auction_date")
+    per_day = pd.DataFrame({
+        "auctions": by_day.size(),
+        "bills": by_day["is_bill"].sum(),
+        "worst": by_day["tail_bp"].max(),
+    }).reindex(days)
+
+    counts = per_day[["auctions", "bills"]].fillna(0).rolling(window_days, min_periods=1).sum()
+    worst = per_day["worst"].astype("float64").rolling(window_days, min_periods=1).max()
+    stats = pd.DataFrame({
+        "bill_share": (counts["bills"] / counts["auctions"]).where(counts["auctions"] > 0).round(2),
+        "tail_bp": worst.round(2),
+    })
+    return stats.loc[start:]
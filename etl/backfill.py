@@ -0,0 +1,338 @@
+"""
+Bulk, resumable FRED backfill for the Liquidity Dashboard ETL.
+
+Each series is split into date windows aligned to calendar years
+(WINDOW_YEARS long), and all windows of all series are fetched in parallel
+over one pooled session. A token bucket keeps the whole run under FRED's
+per-key request limit, and requests answered with 429 or a 5xx are retried
+with backoff. Every finished window is written as its own parquet file, and
+those files are the checkpoint: an interrupted backfill skips them when it
+is run again. Series metadata (first and last observation) is fetched once
+and kept in state.json.
+
+Layout under data/backfill/:
+    state.json                          series metadata from FRED
+    windows/<SERIES>/<start>_<end>.parquet
+    series/<SERIES>.parquet             all windows of a series, combined
+    backfill.lock                       held by a running backfill
+
+    python -m etl backfill run DFF T10Y2Y RRPONTSYD --workers 8
+    python -m etl backfill run WRBWFRBL --into-history    # also merge into data/history
+    python -m etl backfill status
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+
+import pandas as pd
+import requests
+
+from etl.fetch_direct import EXTRA_SERIES
+from etl.history_store import file_lock
+from etl.registry import fred_series
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKFILL_DIR = os.path.join(BASE, "data", "backfill")
+
+# Series fetched when none are named (the dashboard's and fetch_direct.py's)
+DEFAULT_SERIES = tuple(fred_series().values()) + EXTRA_SERIES
+
+# FRED allows 120 requests per minute per API key; stay under it
+REQUESTS_PER_MINUTE = 100
+# Requests that may go out back to back before the rate applies
+BURST = 8
+WORKERS = 8
+# Years of observations per request; decades-long daily series still fit FRED's 100k row limit
+WINDOW_YEARS = 10
+MAX_ATTEMPTS = 5
+# HTTP statuses worth retrying after a pause
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, at most `capacity` saved up"""
+
+    def __init__(self, rate: float, capacity: int = BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.granted = 0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Block until a token is available and take it"""
+        while True:
+            with self.lock:
+                self._refill(time.monotonic())
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.granted += 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Hold every caller back for about `seconds` (after a 429)"""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+def windows(start: date, end: date, years: int = WINDOW_YEARS) -> list:
+    """
+    [(first, last)] date windows covering start..end. Boundaries fall on
+    1 January of years divisible by `years`, so the same windows come out
+    however far the series has grown since the last run.
+    """
+    spans = []
+    year = start.year - start.year % years
+    while date(year, 1, 1) <= end:
+        first = max(start, date(year, 1, 1))
+        last = min(end, date(year + years, 1, 1) - timedelta(days=1))
+        if first <= last:
+            spans.append((first, last))
+        year += years
+    return spans
+
+
+class Backfill:
+    """Parallel, rate-limited, checkpointed download of whole FRED series"""
+
+    def __init__(self, api_key: str, root: str = BACKFILL_DIR, workers: int = WORKERS,
+                 requests_per_minute: float = REQUESTS_PER_MINUTE, window_years: int = WINDOW_YEARS,
+                 session: requests.Session = None):
+        from etl.concurrent_fetch import make_session
+
+        self.api_key = api_key
+        self.root = root
+        self.workers = workers
+        self.window_years = window_years
+        self.bucket = TokenBucket(requests_per_minute / 60.0)
+        self.session = session or make_session(pool_size=workers)
+        self.state_path = os.path.join(root, "state.json")
+        self.lock_path = os.path.join(root, "backfill.lock")
+        os.makedirs(root, exist_ok=True)
+
+    # ---------- requests ----------
+
+    def _redact(self, error: Exception) -> str:
+        return f"{type(error).__name__}: {str(error).replace(self.api_key, 'API_KEY_HIDDEN')}"
+
+    def _call(self, fn, *args, **kwargs):
+        """Run one FRED request under the rate limit, retrying throttling and server errors"""
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            self.bucket.acquire()
+            try:
+                return fn(self.session, self.api_key, *args, **kwargs)
+            except requests.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                if status not in RETRY_STATUS or attempt == MAX_ATTEMPTS:
+                    raise
+                if status == 429:
+                    self.bucket.pause(2 ** attempt)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == MAX_ATTEMPTS:
+                    raise
+            time.sleep(min(2 ** attempt, 30))
+
+    # ---------- checkpoint ----------
+
+    def read_state(self) -> dict:
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"series": {}}
+
+    def _window_path(self, series: str, first: date, last: date) -> str:
+        return os.path.join(self.root, "windows", series, f"{first.isoformat()}_{last.isoformat()}.parquet")
+
+    def series_path(self, series: str) -> str:
+        return os.path.join(self.root, "series", f"{series}.parquet")
+
+    def info(self, series_ids, refresh: bool = False) -> dict:
+        """Metadata of each series, fetched in parallel for those not in state.json yet"""
+        from etl.fred_ingest import fetch_series_info
+
+        state = self.read_state()
+        missing = [s for s in series_ids if refresh or s not in state["series"]]
+        if missing:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                futures = {pool.submit(self._call, fetch_series_info, s): s for s in missing}
+                for future in as_completed(futures):
+                    series = futures[future]
+                    try:
+                        state["series"][series] = future.result()
+                    except Exception as e:
+                        print(f"ERROR reading {series} metadata: {self._redact(e)}")
+            tmp = f"{self.state_path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(state, f, indent=2, sort_keys=True)
+            os.replace(tmp, self.state_path)
+        return {s: state["series"][s] for s in series_ids if s in state["series"]}
+
+    def plan(self, series_ids, start: str = None, end: str = None, refresh: bool = False) -> tuple:
+        """(windows still to fetch, windows already on disk) as lists of (series, first, last)"""
+        todo, done = [], []
+        for series, meta in self.info(series_ids, refresh).items():
+            first = max(date.fromisoformat(meta["observation_start"]), date.fromisoformat(start) if start else date.min)
+            last = min(date.fromisoformat(meta["observation_end"]), date.fromisoformat(end) if end else date.max)
+            for span in windows(first, last, self.window_years):
+                (done if os.path.exists(self._window_path(series, *span)) else todo).append((series,) + span)
+        return todo, done
+
+    # ---------- fetching ----------
+
+    def fetch_window(self, series: str, first: date, last: date) -> int:
+        """Download one window and checkpoint it; returns the observation count"""
+        from etl.fred_ingest import fetch_observations
+
+        values = self._call(fetch_observations, series, first.isoformat(), end=last.isoformat())
+        path = self._window_path(series, first, last)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        values.rename("value").to_frame().to_parquet(tmp)
+        os.replace(tmp, path)
+        return len(values)
+
+    def run(self, series_ids, start: str = None, end: str = None, refresh: bool = False) -> dict:
+        """
+        Fetch every window not on disk yet, then combine each series.
+        Returns series -> observation count; series with failed windows are left out.
+        """
+        started = time.perf_counter()
+        with file_lock(self.lock_path, timeout=5):
+            todo, done = self.plan(series_ids, start, end, refresh)
+            print(f"Backfill: {len(todo)} window(s) to fetch, {len(done)} already on disk "
+                  f"({self.bucket.rate * 60:.0f} requests/min, {self.workers} workers)")
+            failed, fetched = set(), 0
+            pool = ThreadPoolExecutor(max_workers=self.workers)
+            try:
+                futures = {pool.submit(self.fetch_window, *window): window for window in todo}
+                for i, future in enumerate(as_completed(futures), 1):
+                    series, first, last = futures[future]
+                    try:
+                        count = future.result()
+                        fetched += count
+                        print(f"  [{i}/{len(todo)}] {series} {first}..{last}: {count} observations")
+                    except Exception as e:
+                        failed.add(series)
+                        print(f"  [{i}/{len(todo)}] {series} {first}..{last}: ERROR {self._redact(e)}")
+            except KeyboardInterrupt:
+                pool.shutdown(wait=False, cancel_futures=True)
+                print("Interrupted; finished windows are kept, run again to resume")
+                raise
+            pool.shutdown()
+
+            planned = {window[0] for window in todo + done}
+            combined = {series: len(self.combine(series)) for series in series_ids
+                        if series in planned and series not in failed}
+        elapsed = time.perf_counter() - started
+        print(f"Fetched {fetched} observations in {self.bucket.granted} request(s), {elapsed:.1f}s")
+        if failed:
+            print(f"Windows failed for {', '.join(sorted(failed))}; run again to retry them")
+        return combined
+
+    def combine(self, series: str) -> pd.Series:
+        """Concatenate a series' windows into series/<SERIES>.parquet and return it"""
+        folder = os.path.join(self.root, "windows", series)
+        names = sorted(name for name in os.listdir(folder) if name.endswith(".parquet")) if os.path.isdir(folder) else []
+        frames = [pd.read_parquet(os.path.join(folder, name)) for name in names]
+        frame = pd.concat(frames) if frames else pd.DataFrame({"value": pd.Series(dtype="float64")})
+        frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+        frame.index.name = "date"
+        path = self.series_path(series)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        frame.to_parquet(tmp)
+        os.replace(tmp, path)
+        return frame["value"].rename(series)
+
+    def load(self, series: str) -> pd.Series:
+        """A combined series as a date-indexed Series"""
+        return pd.read_parquet(self.series_path(series))["value"].rename(series)
+
+
+def into_history(backfill: Backfill, series_ids, base: str = BASE) -> list:
+    """
+    Merge the combined dashboard series among `series_ids` into the history
+    store under `base`. Dates without a vintage are recorded as first
+    releases, and the pipeline state is moved back to the earliest merged
+    date so the next derive recomputes the backfilled days. Returns the
+    history columns merged.
+    """
+    from etl.history_store import HistoryStore
+    from etl.pipeline import FRED_SERIES, mark_changed
+    from etl.vintage_store import VintageStore
+
+    columns = {series: column for column, series in FRED_SERIES.items() if series in series_ids}
+    observed = pd.DataFrame({column: backfill.load(series) for series, column in columns.items()})
+    if observed.empty:
+        return []
+    data = os.path.join(base, "data")
+    store = HistoryStore(os.path.join(data, "history"), legacy_path=os.path.join(data, "history.parquet"))
+    store.append(observed)
+    VintageStore(os.path.join(data, "vintages")).seed(observed, list(observed.columns))
+    since = mark_changed(os.path.join(data, "pipeline_state.json"), observed.index.min())
+    print(f"Merged {', '.join(observed.columns)} into {store.root}; derived metrics recompute from {since.date()}")
+    return list(observed.columns)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m etl backfill", description="Bulk FRED backfill")
+    parser.add_argument("--root", default=BACKFILL_DIR, help="backfill directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("run", help="fetch (or resume fetching) whole series")
+    command.add_argument("series", nargs="*", help=f"FRED series ids (default {' '.join(DEFAULT_SERIES)})")
+    command.add_argument("--start", default=None, help="YYYY-MM-DD (default: first observation)")
+    command.add_argument("--end", default=None, help="YYYY-MM-DD (default: last observation)")
+    command.add_argument("--workers", type=int, default=WORKERS)
+    command.add_argument("--rpm", type=float, default=REQUESTS_PER_MINUTE, help="requests per minute")
+    command.add_argument("--window-years", type=int, default=WINDOW_YEARS)
+    command.add_argument("--refresh", action="store_true", help="re-read series metadata (picks up new observations)")
+    command.add_argument("--into-history", action="store_true",
+                         help="merge the dashboard's series into the history store")
+
+    commands.add_parser("status", help="series and windows on disk")
+    args = parser.parse_args(argv)
+
+    if args.command == "status":
+        backfill = Backfill(api_key="", root=args.root)
+        for series, meta in sorted(backfill.read_state()["series"].items()):
+            folder = os.path.join(args.root, "windows", series)
+            count = len(os.listdir(folder)) if os.path.isdir(folder) else 0
+            rows = len(backfill.load(series)) if os.path.exists(backfill.series_path(series)) else 0
+            print(f"{series:<12} {meta['observation_start']}..{meta['observation_end']} "
+                  f"{meta.get('frequency_short') or '?':<3} {count:>3} window(s) {rows:>7} observations  {meta['title']}")
+        return 0
+
+    api_key = os.getenv("FRED_API_KEY", "")
+    if not api_key:
+        print("ERROR: FRED_API_KEY environment variable not set")
+        return 1
+    backfill = Backfill(api_key, root=args.root, workers=args.workers,
+                        requests_per_minute=args.rpm, window_years=args.window_years)
+    series_ids = [s.upper() for s in args.series] or list(DEFAULT_SERIES)
+    try:
+        combined = backfill.run(series_ids, args.start, args.end, refresh=args.refresh)
+    except KeyboardInterrupt:
+        return 130
+
+    if args.into_history:
+        into_history(backfill, combined)
+    return 0 if len(combined) == len(series_ids) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,354 @@
+"""
+Offline benchmark suite for the Liquidity Dashboard ETL.
+
+Builds synthetic histories of 1, 10, 50 and 100 years in the shape
+create_initial_data.py produces, with derived metrics, vintages and the
+published files of the day before, then times a real Pipeline run of one
+new day in a temp dir. Only the HTTP session is stubbed: FRED, MOVE, SRF
+and auction responses are canned, so source parsing, SRF and auction
+ingest, the vintage store, history appends, pipeline state, alignment,
+derived metrics, status and publishing all run as in production. Stage
+times are the pipeline's own run metrics (etl/run_metrics.py), plus the
+wall time of each of fetch, derive and publish.
+The HTML extractors are timed on their saved fixtures grown 1, 10 and
+100 times, next to the BeautifulSoup / pandas.read_html parsers they
+replaced when those are installed.
+The metric store is timed against a full parse of public/data/history.json
+for a one-quarter range, an as-of lookup and a three-metric slice.
+Results are saved as JSON under data/benchmarks/. Pass --baseline to fail
+when a stage got slower than the given run by more than --threshold.
+
+Usage:
+    python etl/benchmark.py                      # all sizes
+    python etl/benchmark.py --years 1 10 --repeat 5
+    python etl/benchmark.py --years --extract-scales 1 1000   # extractors only
+    python etl/benchmark.py --baseline data/benchmarks/bench-20250101-000000.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE not in sys.path:
+    sys.path.insert(0, BASE)
+
+import pandas as pd
+
+from etl.auctions import parse_auctions
+from etl.create_initial_data import make_history
+from etl.extract import extract, fixture
+from etl.fred_ingest import FRED_OBSERVATIONS_URL
+from etl.metric_store import SOURCE_PATH, MetricStore, build
+from etl.pipeline import VINTAGE_METRICS, WINDOW_DAYS, Pipeline
+from etl.sources import AUCTIONS_URL, MOVE_URL
+from etl.srf import SRF_SEARCH_URL
+
+RESULTS_DIR = os.path.join(BASE, "data", "benchmarks")
+DEFAULT_YEARS = (1, 10, 50, 100)
+DEFAULT_EXTRACT_SCALES = (1, 10, 100)
+
+# Level each stubbed FRED series is quoted around
+STUB_FRED_LEVELS = {"RRPONTSYD": 120000.0, "WRBWFRBL": 2900000.0}
+
+
+class StubResponse:
+    def __init__(self, url: str, text: str, status_code: int = 200):
+        self.url = url
+        self.status_code = status_code
+        self.content = text.encode()
+        self.headers = {}
+
+
+class StubSession:
+    """requests.Session stand-in answering each source's URL with a canned response"""
+
+    def __init__(self):
+        self.pages = {MOVE_URL: fixture("move"), AUCTIONS_URL: fixture("auctions")}
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        if url == FRED_OBSERVATIONS_URL:
+            return StubResponse(url, self._fred(params["series_id"], params["observation_start"]))
+        if url.startswith(SRF_SEARCH_URL):
+            return StubResponse(url, self._srf())
+        if url in self.pages:
+            return StubResponse(url, self.pages[url])
+        return StubResponse(url, "", 404)
+
+    @staticmethod
+    def _fred(series: str, start: str) -> str:
+        # weekly series on Wednesdays, the others on business days, through today
+        freq = "W-WED" if series == "WRBWFRBL" else "B"
+        days = pd.date_range(start, date.today(), freq=freq)
+        level = STUB_FRED_LEVELS.get(series, 100.0)
+        return json.dumps({"observations": [
+            {"date": day.strftime("%Y-%m-%d"), "value": str(level + day.toordinal() % 100)} for day in days
+        ]})
+
+    @staticmethod
+    def _srf() -> str:
+        days = pd.bdate_range(end=date.today() - timedelta(days=1), periods=5)
+        return "operationDate,total_submitted\n" + "".join(
+            f"{day:%Y-%m-%d},{(i + 1) * 1e9:.0f}\n" for i, day in enumerate(days))
+
+
+def _time(fn, repeat: int):
+    """Best wall time of `repeat` calls and the last return value"""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _pipeline(base: str, full: bool) -> Pipeline:
+    return Pipeline(base=base, api_key="benchmark", fred_mode="incremental", planned=False,
+                    metrics_path=os.path.join(base, "runs.jsonl"), session=StubSession(),
+                    window_days=10 ** 6 if full else WINDOW_DAYS)
+
+
+def run_size(years: int, repeat: int, full: bool) -> dict:
+    """Time a pipeline run of one new day on top of a synthetic history of `years` years"""
+    workdir = tempfile.mkdtemp(prefix=f"etl-bench-{years}y-")
+    try:
+        # The stores as a daily run finds them: history through yesterday,
+        # derived metrics, vintages and the published files already there
+        template = os.path.join(workdir, "template")
+        history = make_history(days=365 * years, end_date=date.today() - timedelta(days=1))
+        setup = _pipeline(template, full)
+        setup.history.replace(history)
+        setup.vintages.seed(history, VINTAGE_METRICS)
+        setup.vintages.compact()
+        setup.derive()
+        setup.publish()
+
+        best, result = {}, None
+        for i in range(repeat):
+            base = os.path.join(workdir, f"run-{i}")
+            shutil.copytree(template, base)
+            pipeline = _pipeline(base, full)
+            timings = {}
+            for stage in ("fetch", "derive", "publish"):
+                started = time.perf_counter()
+                result = getattr(pipeline, stage)()
+                timings[f"{stage}_total"] = time.perf_counter() - started
+            pipeline.metrics.end_stage()
+            timings.update({name: stage["seconds"] for name, stage in pipeline.metrics.record["stages"].items()})
+            for name, seconds in timings.items():
+                best[name] = min(best.get(name, float("inf")), seconds)
+            shutil.rmtree(base, ignore_errors=True)
+
+        if result is None:
+            raise RuntimeError("The benchmark pipeline run did not publish")
+        stages = {name: round(seconds, 6) for name, seconds in best.items()}
+        return {
+            "years": years,
+            "history_rows": int(len(pipeline.hist)),
+            "window_rows": int(len(pipeline.daily)),
+            "files_written": len(result.written),
+            "bytes_published": result.bytes_written,
+            "stages": stages,
+            "total": round(sum(seconds for name, seconds in stages.items() if name.endswith("_total")), 6),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _grow(page: str, start: str, end: str, times: int) -> str:
+    """`page` with the markup between `start` and `end` repeated `times` times"""
+    i = page.index(start) + len(start)
+    j = page.index(end, i)
+    return page[:i] + page[i:j] * times + page[j:]
+
+
+def _soup_move(page: str) -> float:
+    from bs4 import BeautifulSoup
+    return float(BeautifulSoup(page, "html.parser").find("span", class_="mod-ui-data-list__value").text)
+
+
+def _read_html_auctions(page: str):
+    import io
+    return pd.read_html(io.StringIO(page), match="CUSIP")[0]
+
+
+def run_extractors(scale: int, repeat: int) -> dict:
+    """Parse time of each extractor on its fixture grown `scale` times"""
+    # MOVE: the page grows below the quote (history tables, footer)
+    move_page = _grow(fixture("move"), '<section class="mod-tearsheet-historical-prices">', "</section>", scale)
+    # auctions: the results table grows older rows
+    auctions_page = _grow(fixture("auctions"), "<tbody>", "</tbody>", scale)
+    parsed = parse_auctions(fixture("auctions"))
+    # a later run: all but the 4 newest auctions are already stored
+    seen = set(zip(parsed["cusip"][4:], parsed["auction_date"][4:]))
+
+    cases = {
+        "move_stream": lambda: extract("move", move_page),
+        "auctions_stream": lambda: parse_auctions(auctions_page),
+        "auctions_stream_seen": lambda: parse_auctions(auctions_page, seen=seen),
+    }
+    try:
+        import bs4  # noqa: F401
+        cases["move_bs4"] = lambda: _soup_move(move_page)
+    except ImportError:
+        pass
+    try:
+        import lxml  # noqa: F401
+        cases["auctions_read_html"] = lambda: _read_html_auctions(auctions_page)
+    except ImportError:
+        pass
+
+    stages = {name: round(_time(fn, repeat)[0], 6) for name, fn in cases.items()}
+    return {
+        "scale": scale,
+        "page_bytes": {"move": len(move_page.encode()), "auctions": len(auctions_page.encode())},
+        "stages": stages,
+    }
+
+
+def run_metric_store(repeat: int, source: str = SOURCE_PATH) -> dict:
+    """Query times of the memory-mapped metric store against parsing the JSON document"""
+    workdir = tempfile.mkdtemp(prefix="etl-bench-metric-store-")
+    try:
+        start, end = "2024-01-01", "2024-03-31"
+
+        def parse_range():
+            with open(source, "r") as f:
+                days = json.load(f)
+            return [(day["date"], m["value"]) for day in days if start <= day["date"] <= end
+                    for m in day["metrics"] if m["id"] == "sofr"]
+
+        timings = {}
+        timings["json_parse_range"], _ = _time(parse_range, repeat)
+        timings["build"], manifest = _time(lambda: build(source, workdir), 1)
+        timings["open"], store = _time(lambda: MetricStore(workdir), repeat)
+        store.values("sofr")  # map the column once, as a warm reader would
+        # single queries are microseconds; time batches for a stable figure
+        batch = 1000
+        for name, query in (
+            ("range", lambda: store.range("sofr", start, end)),
+            ("as_of", lambda: store.as_of("sofr", end)),
+            ("slice_3", lambda: store.slice(["sofr", "bill_share", "bank_reserves"], start, end)),
+        ):
+            seconds, _ = _time(lambda: [query() for _ in range(batch)], repeat)
+            timings[name] = seconds / batch
+        return {
+            "source_bytes": os.path.getsize(source),
+            "rows": manifest["rows"],
+            "metrics": len(manifest["metrics"]),
+            "stages": {name: round(seconds, 9) for name, seconds in timings.items()},
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(results: dict, baseline_path: str, threshold: float) -> list:
+    """Stages that got slower than the baseline by more than `threshold`x"""
+    with open(baseline_path, "r") as f:
+        saved = json.load(f)
+    baseline = {r["years"]: r for r in saved["results"]}
+    regressions = []
+    extract_baseline = {r["scale"]: r for r in saved.get("extractors", [])}
+    for result in results.get("extractors", []):
+        base = extract_baseline.get(result["scale"])
+        if not base:
+            continue
+        for stage, seconds in result["stages"].items():
+            before = base["stages"].get(stage)
+            if before and seconds > 1e-3 and seconds > before * threshold:
+                regressions.append(f"extract x{result['scale']} {stage}: {before:.4f}s -> {seconds:.4f}s")
+    for result in results["results"]:
+        base = baseline.get(result["years"])
+        if not base:
+            continue
+        for stage, seconds in result["stages"].items():
+            before = base["stages"].get(stage)
+            # ignore sub-millisecond stages; their noise dominates
+            if before and seconds > 1e-3 and seconds > before * threshold:
+                regressions.append(f"{result['years']}y {stage}: {before:.4f}s -> {seconds:.4f}s")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ETL stages on synthetic histories")
+    parser.add_argument("--years", type=int, nargs="*", default=list(DEFAULT_YEARS))
+    parser.add_argument("--extract-scales", type=int, nargs="*", default=list(DEFAULT_EXTRACT_SCALES),
+                        help="fixture growth factors for the HTML extractor timings")
+    parser.add_argument("--repeat", type=int, default=3, help="repeats per stage (best time is kept)")
+    parser.add_argument("--full", action="store_true", help="run downstream stages on the full history, not the 10-year window")
+    parser.add_argument("--skip-metric-store", action="store_true", help="don't time the history.json metric store")
+    parser.add_argument("--output", default=None, help="results file (default data/benchmarks/bench-<timestamp>.json)")
+    parser.add_argument("--baseline", default=None, help="previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.5, help="slowdown factor reported as a regression")
+    args = parser.parse_args(argv)
+
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "full_history": args.full,
+        "results": [],
+        "extractors": [],
+        "metric_store": None,
+    }
+
+    stdout = sys.stdout
+    for years in args.years:
+        # stage code prints progress; keep the benchmark output readable
+        sys.stdout = open(os.devnull, "w")
+        try:
+            result = run_size(years, args.repeat, args.full)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        results["results"].append(result)
+        print(f"\n{years} year(s): {result['history_rows']} history rows, {result['window_rows']} published rows")
+        for stage, seconds in result["stages"].items():
+            print(f"  {stage:<18} {seconds * 1000:10.2f} ms")
+        print(f"  {'total':<18} {result['total'] * 1000:10.2f} ms")
+
+    for scale in args.extract_scales:
+        sys.stdout = open(os.devnull, "w")
+        try:
+            result = run_extractors(scale, args.repeat)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        results["extractors"].append(result)
+        pages = ", ".join(f"{name} {size / 1024:.0f} KB" for name, size in result["page_bytes"].items())
+        print(f"\nextractors x{scale} ({pages})")
+        for stage, seconds in result["stages"].items():
+            print(f"  {stage:<22} {seconds * 1000:10.2f} ms")
+
+    if not args.skip_metric_store and os.path.exists(SOURCE_PATH):
+        result = results["metric_store"] = run_metric_store(args.repeat)
+        print(f"\nmetric store ({result['source_bytes'] / 1024:.0f} KB source, {result['rows']} dates, "
+              f"{result['metrics']} metrics)")
+        for stage, seconds in result["stages"].items():
+            print(f"  {stage:<22} {seconds * 1e6:10.1f} us")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.threshold)
+        if regressions:
+            print(f"\nREGRESSIONS (> {args.threshold}x slower than {args.baseline}):")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""
+Quick health checks of the ETL stores and outputs.
+Only the standard library is used so `python -m etl status` and
+`python -m etl validate` start instantly: manifests are read as JSON,
+published files are checked against the sizes (or, with deep=True, the
+sha256 digests) recorded in data/publish_manifest.json.
+"""
+import hashlib
+import json
+import os
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RULE_LEVELS = ("amber", "red")
+RULE_MODES = ("all", "any")
+RULE_OPERATORS = ("<", "<=", ">", ">=")
+
+REGISTRY_KEYS = ("source", "units", "frequency", "release")
+RELEASE_WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+
+def _load_json(path: str):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def store_manifest(root: str):
+    """The manifest of a HistoryStore directory, or None"""
+    return _load_json(os.path.join(root, "manifest.json"))
+
+
+def store_last_date(root: str, manifest: dict):
+    """
+    Newest date in a store: the manifest's last_date, which only moves on
+    compaction, or a later day appended to the journal since
+    """
+    last = manifest.get("last_date") or ""
+    journal = manifest.get("journal")
+    if journal:
+        try:
+            with open(os.path.join(root, journal), "r") as f:
+                for line in f:
+                    try:
+                        last = max(last, json.loads(line).get("date") or "")
+                    except ValueError:
+                        continue
+        except OSError:
+            pass
+    return last or None
+
+
+def last_run(metrics_path: str):
+    """The newest record of data/metrics/runs.jsonl without reading the whole file"""
+    try:
+        with open(metrics_path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - 65536))
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    for line in reversed(lines):
+        try:
+            return json.loads(line)
+        except ValueError:
+            continue
+    return None
+
+
+def _check_store(root: str, name: str, problems: list):
+    manifest = store_manifest(root)
+    if manifest is None:
+        problems.append(f"{name}: no manifest in {root}")
+        return None
+    files = list(manifest.get("partitions", {}).values())
+    if manifest.get("journal"):
+        files.append(manifest["journal"])
+    for file in files:
+        if not os.path.exists(os.path.join(root, file)):
+            problems.append(f"{name}: {file} is named by the manifest but missing")
+    return manifest
+
+
+def _check_thresholds(path: str, problems: list):
+    thresholds = _load_json(path)
+    if not isinstance(thresholds, dict):
+        problems.append(f"thresholds: {path} is missing or not valid JSON")
+        return
+    for metric, levels in thresholds.items():
+        if metric.startswith("_"):
+            continue
+        for level, rule in levels.items():
+            if level not in RULE_LEVELS or not isinstance(rule, dict):
+                problems.append(f"thresholds: {metric}.{level} is not an amber/red rule")
+                continue
+            for mode, conditions in rule.items():
+                if mode not in RULE_MODES:
+                    problems.append(f"thresholds: {metric}.{level} uses unknown mode {mode!r}")
+                    continue
+                for condition in conditions:
+                    if len(condition) != 3 or condition[1] not in RULE_OPERATORS:
+                        problems.append(f"thresholds: {metric}.{level} has a bad condition {condition!r}")
+
+
+def _check_registry(path: str, problems: list):
+    registry = _load_json(path)
+    if not isinstance(registry, dict) or not isinstance(registry.get("series"), dict):
+        problems.append(f"registry: {path} is missing or has no series")
+        return
+    for metric, entry in registry["series"].items():
+        missing = [key for key in REGISTRY_KEYS if key not in entry]
+        if missing:
+            problems.append(f"registry: {metric} has no {', '.join(missing)}")
+            continue
+        if entry["source"] == "fred" and not entry.get("id"):
+            problems.append(f"registry: {metric} is a FRED series without an id")
+        release = entry["release"]
+        days = release.get("days", "business")
+        if days not in ("business", "daily") and not set(days.split(",")) <= set(RELEASE_WEEKDAYS):
+            problems.append(f"registry: {metric} has unknown release days {days!r}")
+        for key in ("open", "time"):
+            clock = release.get(key, "00:00")
+            hour, _, minute = clock.partition(":")
+            if not (hour.isdigit() and minute.isdigit() and int(hour) < 24 and int(minute) < 60):
+                problems.append(f"registry: {metric} has a bad release {key} {clock!r}")
+
+
+def _check_published(manifest_path: str, deep: bool, problems: list) -> int:
+    manifest = _load_json(manifest_path)
+    if manifest is None:
+        problems.append(f"publish: no manifest at {manifest_path}")
+        return 0
+    for path, entry in manifest.items():
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            problems.append(f"publish: {path} is missing")
+            continue
+        if size != entry["size"]:
+            problems.append(f"publish: {path} is {size} bytes, manifest says {entry['size']}")
+        elif deep:
+            with open(path, "rb") as f:
+                if hashlib.sha256(f.read()).hexdigest() != entry["sha256"]:
+                    problems.append(f"publish: {path} does not match its recorded sha256")
+    return len(manifest)
+
+
+def validate(base: str = BASE, deep: bool = False) -> list:
+    """Problems found in the stores and published outputs under `base`"""
+    data = os.path.join(base, "data")
+    problems = []
+
+    history = _check_store(os.path.join(data, "history"), "history", problems)
+    derived = _check_store(os.path.join(data, "derived"), "derived", problems)
+    if history and derived:
+        history_last = store_last_date(os.path.join(data, "history"), history)
+        derived_last = store_last_date(os.path.join(data, "derived"), derived)
+        if (derived_last or "") < (history_last or ""):
+            problems.append(f"derived: ends {derived_last}, history ends {history_last}; run the derive stage")
+
+    _check_thresholds(os.path.join(base, "web", "data", "thresholds.json"), problems)
+    _check_registry(os.path.join(base, "web", "data", "series.json"), problems)
+    _check_published(os.path.join(data, "publish_manifest.json"), deep, problems)
+
+    dashboard = _load_json(os.path.join(base, "web", "public", "dashboard.json"))
+    if not isinstance(dashboard, dict):
+        problems.append("publish: dashboard.json is missing or not valid JSON")
+    else:
+        for key in ("date", "status"):
+            if key not in dashboard:
+                problems.append(f"publish: dashboard.json has no {key!r}")
+    return problems
+
+
+def status(base: str = BASE) -> list:
+    """Summary lines describing the stores, the last publish and the last run"""
+    data = os.path.join(base, "data")
+    lines = []
+    for name in ("history", "derived"):
+        root = os.path.join(data, name)
+        manifest = store_manifest(root)
+        if manifest is None:
+            lines.append(f"{name:<10} none")
+            continue
+        lines.append(f"{name:<10} {manifest.get('rows', 0)} rows {manifest.get('first_date')} .. "
+                     f"{store_last_date(root, manifest)}, generation {manifest.get('generation')}, "
+                     f"{len(manifest.get('partitions', {}))} partition(s), "
+                     f"journal {'pending' if manifest.get('journal') else 'empty'}")
+
+    dashboard = _load_json(os.path.join(base, "web", "public", "dashboard.json"))
+    if isinstance(dashboard, dict):
+        colours = ", ".join(f"{k}={v}" for k, v in (dashboard.get("status") or {}).items())
+        lines.append(f"{'dashboard':<10} {dashboard.get('date')}: {colours}")
+    else:
+        lines.append(f"{'dashboard':<10} none")
+
+    run = last_run(os.path.join(data, "metrics", "runs.jsonl"))
+    if run:
+        failed = [name for name, source in run.get("sources", {}).items() if source.get("error")]
+        lines.append(f"{'last run':<10} {run['run']} {run.get('status')} in {run.get('seconds')}s"
+                     + (f", failed sources: {', '.join(failed)}" if failed else ""))
+    else:
+        lines.append(f"{'last run':<10} none recorded")
+    return lines
@@ -0,0 +1,214 @@
+"""
+Command line entry point of the Liquidity Dashboard ETL: python -m etl <command>
+
+    fetch         pull every source into the history store
+    derive        align as of each day, update derived metrics and classify status
+    publish       write the dashboard JSON (derives first)
+    run           fetch, derive and publish (what etl/fetch_data.py does)
+    daemon        stay running; fetch each source on its cadence, publish each tick
+    validate      check the stores and published files; exits 1 on problems
+    status        one-screen summary of the stores, outputs and last run
+    metrics       query run metrics (see etl/run_metrics.py)
+    metric-store  build / query the memory-mapped store of public/data/history.json
+    serve         local series query server, reloaded on publish (see etl/serve.py)
+    archive       dated, delta-compressed snapshots of the published series
+    vintages      values as known on a past day; revisions and status backtests
+    asof          daily / business-day / weekly views of the native-frequency history
+    backfill      rate-limited, resumable bulk download of whole FRED series
+    plan          which sources have a release due, from the series registry
+
+Each command imports only what it needs: validate and status use the
+standard library alone, so they start without loading pandas or requests.
+"""
+import argparse
+import sys
+
+
+def _pipeline_command(args):
+    from etl.pipeline import STAGES, Pipeline
+
+    stages = STAGES if args.command == "run" else (args.command,)
+    if args.command == "publish":
+        stages = ("derive", "publish")
+    pipeline = Pipeline(fred_mode=args.fred_mode, http_cache=False if args.no_cache else None,
+                        planned=False if args.all_sources else None)
+    pipeline.run(stages)
+    return 0
+
+
+def _cadences(values):
+    cadences = {}
+    for value in values or []:
+        name, _, seconds = value.partition("=")
+        try:
+            cadences[name] = float(seconds)
+        except ValueError:
+            raise SystemExit(f"--cadence expects NAME=SECONDS, got {value!r}")
+    return cadences
+
+
+def _daemon_command(args):
+    from etl.daemon import Scheduler
+    from etl.pipeline import Pipeline
+
+    pipeline = Pipeline(fred_mode=args.fred_mode, http_cache=False if args.no_cache else None,
+                        planned=False if args.all_sources else None)
+    Scheduler(pipeline, _cadences(args.cadence)).run_forever(max_ticks=args.max_ticks)
+    return 0
+
+
+def _validate_command(args):
+    from etl.checks import validate
+
+    problems = validate(deep=args.deep)
+    for problem in problems:
+        print(problem)
+    print(f"{len(problems)} problem(s) found" if problems else "OK")
+    return 1 if problems else 0
+
+
+def _status_command(args):
+    from etl.checks import status
+
+    print("\n".join(status()))
+    return 0
+
+
+def _metrics_command(args):
+    from etl.run_metrics import main
+
+    return main(args.rest)
+
+
+def _metric_store_command(args):
+    from etl.metric_store import main
+
+    return main(args.rest)
+
+
+def _serve_command(args):
+    from etl.serve import main
+
+    return main(args.rest)
+
+
+def _archive_command(args):
+    from etl.archive import main
+
+    return main(args.rest)
+
+
+def _vintages_command(args):
+    from etl.vintage_store import main
+
+    return main(args.rest)
+
+
+def _asof_command(args):
+    from etl.asof import main
+
+    return main(args.rest)
+
+
+def _backfill_command(args):
+    from etl.backfill import main
+
+    return main(args.rest)
+
+
+def _plan_command(args):
+    from etl.registry import main
+
+    return main(args.rest)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m etl", description="Liquidity Dashboard ETL")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for name, help_text in (
+        ("fetch", "pull every source into the history store"),
+        ("derive", "align as of each day, update derived metrics and classify status"),
+        ("publish", "write the dashboard JSON (derives first)"),
+        ("run", "fetch, derive and publish"),
+        ("daemon", "stay running and publish after each scheduled fetch"),
+    ):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("--fred-mode", choices=["incremental", "latest"], default=None,
+                             help="FRED ingest mode (default $FRED_INGEST_MODE or incremental)")
+        command.add_argument("--no-cache", action="store_true", help="bypass the HTTP response cache")
+        command.add_argument("--all-sources", action="store_true",
+                             help="fetch every source, not only those with a release due")
+        command.set_defaults(handler=_pipeline_command)
+        if name == "daemon":
+            command.add_argument("--cadence", action="append", metavar="NAME=SECONDS",
+                                 help="seconds between pulls of one source (repeatable)")
+            command.add_argument("--max-ticks", type=int, default=None, help="exit after this many ticks")
+            command.set_defaults(handler=_daemon_command)
+
+    command = commands.add_parser("validate", help="check the stores and published files")
+    command.add_argument("--deep", action="store_true", help="verify sha256 of every published file")
+    command.set_defaults(handler=_validate_command)
+
+    command = commands.add_parser("status", help="summary of the stores, outputs and last run")
+    command.set_defaults(handler=_status_command)
+
+    command = commands.add_parser("metrics", help="query run metrics", add_help=False)
+    command.add_argument("rest", nargs=argparse.REMAINDER)
+    command.set_defaults(handler=_metrics_command)
+
+    command = commands.add_parser("metric-store", help="build or query the history.json metric store", add_help=False)
+    command.add_argument("rest", nargs=argparse.REMAINDER)
+    command.set_defaults(handler=_metric_store_command)
+
+    command = commands.add_parser("serve", help="serve published series from memory", add_help=False)
+    command.add_argument("rest", nargs=argparse.REMAINDER)
+    command.set_defaults(handler=_serve_command)
+
+    command = commands.add_parser("archive", help="snapshot, list and restore archived series", add_help=False)
+    command.add_argument("rest", nargs=argparse.REMAINDER)
+    command.set_defaults(handler=_archive_command)
+
+    command = commands.add_parser("vintages", help="query values as they were known on a past day", add_help=False)
+    command.add_argument("rest", nargs=argparse.REMAINDER)
+    command.set_defaults(handler=_vintages_command)
+
+    command = commands.add_parser("asof", help="calendar views of the native-frequency history", add_help=False)
+    command.add_argument("rest", nargs=argparse.REMAINDER)
+    command.set_defaults(handler=_asof_command)
+
+    command = commands.add_parser("backfill", help="bulk download of whole FRED series", add_help=False)
+    command.add_argument("rest", nargs=argparse.REMAINDER)
+    command.set_defaults(handler=_backfill_command)
+
+    command = commands.add_parser("plan", help="which sources have a release due", add_help=False)
+    command.add_argument("rest", nargs=argparse.REMAINDER)
+    command.set_defaults(handler=_plan_command)
+    return parser
+
+
+# Commands whose arguments are parsed by the module they hand over to.
+# argparse's REMAINDER drops a remainder that starts with an option, so
+# these are dispatched before the top-level parser sees them.
+PASSTHROUGH = {
+    "metrics": _metrics_command,
+    "metric-store": _metric_store_command,
+    "serve": _serve_command,
+    "archive": _archive_command,
+    "vintages": _vintages_command,
+    "asof": _asof_command,
+    "backfill": _backfill_command,
+    "plan": _plan_command,
+}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in PASSTHROUGH:
+        return PASSTHROUGH[argv[0]](argparse.Namespace(rest=argv[1:]))
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
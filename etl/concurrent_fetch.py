@@ -0,0 +1,70 @@
+"""
+Concurrent source fetching for the Liquidity Dashboard ETL.
+Runs every data source in parallel over one shared, pooled HTTP session
+so a run takes as long as the slowest source rather than the sum of all of them.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = "Mozilla/5.0"
+
+# Name of the fetch_all task running on the current worker thread
+_task = threading.local()
+
+
+def current_task():
+    """The fetch_all task name of the calling thread, or None outside fetch_all"""
+    return getattr(_task, "name", None)
+
+
+def make_session(pool_size: int = 8) -> requests.Session:
+    """Create an HTTP session whose connection pool is shared by all fetch threads"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"User-Agent": USER_AGENT})
+    return session
+
+
+def _timed(name, fn):
+    _task.name = name
+    start = time.perf_counter()
+    try:
+        return fn(), None, time.perf_counter() - start
+    except Exception as e:
+        return None, e, time.perf_counter() - start
+    finally:
+        _task.name = None
+
+
+def fetch_all(tasks: dict, max_workers: int = None):
+    """
+    Run each zero-argument callable in `tasks` on its own worker thread.
+    Returns (results, timings) keyed like `tasks`; timings are in seconds.
+    A task that raises gets a result of None and its error is printed.
+    """
+    results, timings = {}, {}
+    if not tasks:
+        return results, timings
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers or len(tasks)) as pool:
+        futures = {name: pool.submit(_timed, name, fn) for name, fn in tasks.items()}
+        for name, future in futures.items():
+            value, error, elapsed = future.result()
+            if error is not None:
+                print(f"ERROR in source {name}: {type(error).__name__}: {error}")
+            results[name] = value
+            timings[name] = elapsed
+    total = time.perf_counter() - start
+
+    print("\nSource fetch timings:")
+    for name, elapsed in sorted(timings.items(), key=lambda kv: -kv[1]):
+        print(f"  {name:<12} {elapsed:6.2f}s")
+    print(f"  {'total':<12} {total:6.2f}s (sum of sources {sum(timings.values()):.2f}s)")
+    return results, timings
@@ -0,0 +1,110 @@
+"""
+Long-running scheduler for the Liquidity Dashboard ETL.
+
+One process keeps the pipeline warm: pandas is imported once, the history
+is held in memory (and read again only when another writer changes the
+store) and the pooled HTTP session keeps its connections open. Each source
+is pulled on its own cadence. Every tick fetches the sources that are due,
+then derives and publishes, so an update costs a fraction of a second
+instead of a cold start. A source whose cadence comes up with no release
+due on its calendar (etl/registry.py) is skipped until its next slot, so
+weekly reserves are not polled between releases.
+
+    python -m etl daemon
+    python -m etl daemon --cadence move=300 --cadence bills=3600
+"""
+import signal
+import threading
+import time
+import traceback
+
+from etl.pipeline import SOURCES, Pipeline
+
+# Seconds between pulls of each source while a release is due; none is worth
+# polling faster than its HTTP cache TTL
+DEFAULT_CADENCES = {
+    "on_rrp": 60 * 60,
+    "reserves": 6 * 60 * 60,
+    "move": 15 * 60,
+    "srf": 60 * 60,
+    "bills": 6 * 60 * 60,
+}
+
+# Cadence of registry sources not listed above
+FALLBACK_CADENCE = 60 * 60
+
+
+class Scheduler:
+    """Runs pipeline ticks whenever one or more sources are due"""
+
+    def __init__(self, pipeline: Pipeline, cadences: dict = None, clock=time.monotonic):
+        self.pipeline = pipeline
+        self.cadences = {**dict.fromkeys(SOURCES, FALLBACK_CADENCE), **DEFAULT_CADENCES, **(cadences or {})}
+        unknown = set(self.cadences) - set(SOURCES)
+        if unknown:
+            raise ValueError(f"Unknown source(s) in cadences: {', '.join(sorted(unknown))}")
+        self.clock = clock
+        now = clock()
+        # every source is due on the first tick
+        self.next_due = {name: now for name in self.cadences}
+        self.ticks = 0
+        self._stop = threading.Event()
+
+    def due(self, now: float) -> list:
+        return [name for name, at in self.next_due.items() if at <= now]
+
+    def tick(self, names: list) -> bool:
+        """Fetch `names`, derive and publish; True when the tick succeeded"""
+        self.ticks += 1
+        started = time.perf_counter()
+        self.pipeline.start_run()
+        try:
+            self.pipeline.run(names=names)
+            ok = True
+        except Exception:
+            traceback.print_exc()
+            # drop in-memory state; the next tick starts again from the store
+            self.pipeline.hist = None
+            ok = False
+
+        self.reschedule(names)
+        print(f"[daemon] tick {self.ticks} ({', '.join(names)}) {'ok' if ok else 'FAILED'} "
+              f"in {time.perf_counter() - started:.2f}s")
+        return ok
+
+    def reschedule(self, names: list):
+        now = self.clock()
+        for name in names:
+            following = self.next_due[name] + self.cadences[name]
+            # after a long tick or a suspended machine, don't replay missed slots
+            self.next_due[name] = following if following > now else now + self.cadences[name]
+
+    def stop(self, *_):
+        self._stop.set()
+
+    def run_forever(self, max_ticks: int = None):
+        """Tick until stopped by SIGINT/SIGTERM or after `max_ticks` ticks"""
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                signal.signal(sig, self.stop)
+            except ValueError:
+                pass  # not the main thread; rely on stop()
+
+        print("[daemon] cadences: " + ", ".join(f"{n}={s}s" for n, s in self.cadences.items()))
+        while not self._stop.is_set():
+            now = self.clock()
+            names = self.due(now)
+            if names and self.pipeline.planned:
+                due = self.pipeline.due_sources(names)
+                self.reschedule([name for name in names if name not in due])
+                names = list(due)
+            if names:
+                self.tick(names)
+                if max_ticks is not None and self.ticks >= max_ticks:
+                    break
+                continue
+            wait = min(self.next_due.values()) - now
+            nxt = min(self.next_due, key=self.next_due.get)
+            print(f"[daemon] next tick in {wait:.0f}s ({nxt})")
+            self._stop.wait(wait)
+        print(f"[daemon] stopped after {self.ticks} tick(s)")
@@ -0,0 +1,102 @@
+"""
+Level-of-detail series pyramids for chart rendering.
+A chart can only draw about a thousand points, so each published series is
+also decimated to a few fixed point counts (LTTB by default, or min/max
+buckets). A small index records the spacing of each level. A chart picks
+the coarsest level that still puts a point on every pixel of its visible
+range, so a small or zoomed-out chart loads a coarse level and a wide or
+zoomed-in one a finer level (or the full series).
+"""
+import numpy as np
+import pandas as pd
+
+# Point counts of the pyramid levels, coarse to fine
+LEVELS = (256, 1024, 4096)
+
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of the `n_out` points to keep"""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    # n_out - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+
+    # Average point of every "next" bucket, from prefix sums in one pass
+    next_lo = edges[1:]
+    next_hi = np.append(edges[2:], n)
+    cx = np.concatenate(([0.0], np.cumsum(x)))
+    cy = np.concatenate(([0.0], np.cumsum(y)))
+    counts = next_hi - next_lo
+    avg_xs = (cx[next_hi] - cx[next_lo]) / counts
+    avg_ys = (cy[next_hi] - cy[next_lo]) / counts
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        avg_x, avg_y = avg_xs[i], avg_ys[i]
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def minmax(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Min/max decimation: the lowest and highest point of n_out/2 buckets"""
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+    edges = np.linspace(0, n, n_out // 2 + 1).astype(np.int64)
+    keep = []
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if hi > lo:
+            keep.extend((lo + int(np.argmin(y[lo:hi])), lo + int(np.argmax(y[lo:hi]))))
+    return np.unique(keep)
+
+
+METHODS = {"lttb": lttb, "minmax": minmax}
+
+
+def build_pyramid(values: pd.Series, levels=LEVELS, method: str = "lttb"):
+    """
+    Decimate a date-indexed series to each level that is smaller than the series.
+    Returns ({points: Series}, index) where each index level gives its point
+    count and average spacing in days; pick_level() chooses among them.
+    """
+    values = values.dropna()
+    days = values.index.values.astype("datetime64[D]").astype("int64").astype("float64")
+    y = values.to_numpy(dtype="float64")
+    span = float(days[-1] - days[0]) if len(days) > 1 else 0.0
+
+    pyramid, index_levels = {}, []
+    for points in sorted(levels):
+        if points >= len(values):
+            continue
+        keep = METHODS[method](days, y, points)
+        pyramid[points] = values.iloc[keep]
+        spacing = span / max(len(keep) - 1, 1)
+        index_levels.append({"points": int(len(keep)), "spacing_days": round(spacing, 3)})
+
+    index = {
+        "method": method,
+        "points": int(len(values)),
+        "start": str(values.index[0].date()) if len(values) else None,
+        "end": str(values.index[-1].date()) if len(values) else None,
+        "levels": index_levels,
+    }
+    return pyramid, index
+
+
+def pick_level(index: dict, visible_days: float, pixels: int):
+    """
+    The coarsest level of a pyramid index that still gives at least `pixels`
+    points across `visible_days` days, or None for the full series.
+    web/lib/data.ts getSeriesForRange applies the same rule.
+    """
+    for level in index["levels"]:
+        if level["spacing_days"] > 0 and visible_days / level["spacing_days"] >= pixels:
+            return level
+    return None
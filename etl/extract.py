@@ -0,0 +1,267 @@
+"""
+Targeted HTML extraction for scraped sources.
+Pages are fed to an extractor in chunks, and extraction stops as soon as
+the target has been read, so no document tree is built and the cost
+depends on where the target sits rather than on the size of the page.
+NodeText is event-driven: it handles the stdlib HTMLParser callbacks.
+TableRows is not: it replaces HTMLParser.feed with a regex scan for
+table, row and cell tags only, which keeps a scan that does read the
+whole table cheaper than tokenising every tag or building the table with
+pandas.read_html.
+
+Extractors are registered by name:
+
+    @register("move")
+    def move_value(text): ...
+
+    extract("move", html)
+
+Saved pages for every registered extractor live in etl/fixtures/ and
+etl/benchmark.py times them against the full-tree parsers they replace.
+"""
+import html
+import os
+import re
+from abc import ABC, abstractmethod
+from html.parser import HTMLParser
+
+# Characters fed to the parser between early-exit checks
+CHUNK_SIZE = 16 * 1024
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Saved page each registered extractor is checked and benchmarked against
+FIXTURES = {
+    "move": "ft_move_tearsheet.html",
+    "auctions": "treasurydirect_auction_results.html",
+}
+
+EXTRACTORS = {}
+
+# Table structure tags; comments and scripts are skipped whole, and an
+# unterminated one (split across chunks) holds the scan until the next chunk
+_TABLE_TAGS = re.compile(r"<!--.*?-->|<script\b.*?</script\s*>|(<!--|<script\b)"
+                         r"|<(/?)(table|tr|td|th)(?=[\s/>])[^>]*>", re.I | re.S)
+_ANY_TAG = re.compile(r"<[^>]*>")
+# A whole table row and its cells, for rows without nested tables, comments or scripts
+_ROW = re.compile(r"\s*<tr(?=[\s>])[^>]*>(.*?)</tr\s*>", re.I | re.S)
+_CELL = re.compile(r"<t[dh](?=[\s>])[^>]*>(.*?)</t[dh]\s*>", re.I | re.S)
+_CELL_OPEN = re.compile(r"<t[dh](?=[\s>])", re.I)
+_NESTED = re.compile(r"<(?:table|tr|!--|script)\b", re.I)
+
+
+def normalise_column(name) -> str:
+    """'Auction Date', 'auctionDate' and 'auction_date' all become 'auction_date'"""
+    name = re.sub(r"(?<=[a-z0-9])(?=[A-Z])", "_", str(name).strip())
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+def register(name: str):
+    def decorator(fn):
+        EXTRACTORS[name] = fn
+        return fn
+    return decorator
+
+
+def extract(name: str, text: str, **kwargs):
+    """Run the extractor registered as `name` on a page"""
+    return EXTRACTORS[name](text, **kwargs)
+
+
+def fixture(name: str) -> str:
+    """The saved page for the extractor registered as `name`"""
+    with open(os.path.join(FIXTURE_DIR, FIXTURES[name]), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+class _Finished(Exception):
+    """Raised from a handler to abandon the rest of the chunk being parsed"""
+
+
+class StreamExtractor(HTMLParser, ABC):
+    """
+    Chunked extractor that stops consuming input once `finish()` is called.
+    Subclasses either handle HTMLParser's callbacks or override `feed` with
+    their own scan, and return what they found from `result()`.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.done = False
+        self.consumed = 0
+
+    def finish(self):
+        self.done = True
+        raise _Finished
+
+    def run(self, text, chunk_size: int = CHUNK_SIZE):
+        """Feed `text` (a string or an iterable of string chunks) until finished"""
+        chunks = (text[i:i + chunk_size] for i in range(0, len(text), chunk_size)) if isinstance(text, str) else text
+        try:
+            for chunk in chunks:
+                self.consumed += len(chunk)
+                self.feed(chunk)
+            self.close()
+        except _Finished:
+            pass
+        return self.result()
+
+    @abstractmethod
+    def result(self):
+        """What was extracted, or None when the target was not found"""
+
+
+class NodeText(StreamExtractor):
+    """Text of the first `tag` element carrying CSS class `css_class`"""
+
+    def __init__(self, tag: str, css_class: str):
+        super().__init__()
+        self.tag = tag
+        self.css_class = css_class
+        self.depth = 0
+        self.parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if self.depth:
+            if tag == self.tag:
+                self.depth += 1
+            return
+        if tag == self.tag and self.css_class in (dict(attrs).get("class") or "").split():
+            self.depth = 1
+
+    def handle_endtag(self, tag):
+        if self.depth and tag == self.tag:
+            self.depth -= 1
+            if not self.depth:
+                self.finish()
+
+    def handle_data(self, data):
+        if self.depth:
+            self.parts.append(data)
+
+    def result(self):
+        return "".join(self.parts).strip() if self.done else None
+
+
+def _cell_text(markup: str) -> str:
+    """Text of a cell's markup, whitespace collapsed"""
+    return " ".join(html.unescape(_ANY_TAG.sub("", markup)).split())
+
+
+class TableRows(StreamExtractor):
+    """
+    Rows of the first table whose header row holds all `required` columns,
+    as dicts keyed by normalised header names. `stop(row)` returning True
+    ends the scan before that row; the table end ends it as well.
+
+    This is a regex scan, not HTMLParser parsing: only table, row and cell
+    tags matter, so `feed` finds them with regexes and never calls
+    HTMLParser.feed. Plain rows of the matched table are read whole;
+    anything else (nested tables, rows split across chunks, unclosed cells)
+    goes tag by tag through handle_starttag/handle_endtag. Cell text has
+    inner tags removed and entities unescaped, as HTMLParser would.
+    """
+
+    def __init__(self, required, stop=None):
+        super().__init__()
+        self.required = {normalise_column(name) for name in required}
+        self.stop = stop
+        self.headers = None
+        self.header_depth = None
+        self.rows = []
+        self.row = None
+        self.cell = None
+        self.tables = 0
+
+    def feed(self, data):
+        self.rawdata += data
+        pos = 0
+        while True:
+            if self.headers is not None and self.row is None and self.tables == self.header_depth:
+                pos = self._whole_rows(pos)
+            match = _TABLE_TAGS.search(self.rawdata, pos)
+            if match is None or match.group(1):
+                break
+            if self.cell is not None:
+                self.cell.append(self.rawdata[pos:match.start()])
+            pos = match.end()
+            if match.group(3):
+                tag = match.group(3).lower()
+                if match.group(2):
+                    self.handle_endtag(tag)
+                else:
+                    self.handle_starttag(tag, ())
+        self.rawdata = self.rawdata[pos:]
+
+    def _whole_rows(self, pos: int) -> int:
+        """Read the plain rows starting at `pos`; returns where the first other markup starts"""
+        while True:
+            match = _ROW.match(self.rawdata, pos)
+            if match is None:
+                return pos
+            body = match.group(1)
+            cells = _CELL.findall(body)
+            if _NESTED.search(body) or len(cells) != len(_CELL_OPEN.findall(body)):
+                return pos
+            pos = match.end()
+            self._end_row([_cell_text(cell) for cell in cells])
+
+    def close(self):
+        self.rawdata = ""
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "table":
+            self.tables += 1
+        elif tag == "tr" and self.tables:
+            self.row = []
+        elif tag in ("td", "th") and self.row is not None:
+            self.cell = []
+
+    def handle_endtag(self, tag):
+        if tag in ("td", "th") and self.cell is not None:
+            self.row.append(_cell_text("".join(self.cell)))
+            self.cell = None
+        elif tag == "tr" and self.row is not None:
+            self._end_row(self.row)
+            self.row = None
+        elif tag == "table" and self.tables:
+            if self.tables == self.header_depth:
+                self.finish()
+            self.tables -= 1
+
+    def _end_row(self, cells):
+        if self.headers is None:
+            names = [normalise_column(cell) for cell in cells]
+            if self.required <= set(names):
+                self.headers = names
+                self.header_depth = self.tables
+            return
+        if not any(cells):
+            return
+        row = dict(zip(self.headers, cells))
+        if self.stop is not None and self.stop(row):
+            self.finish()
+        self.rows.append(row)
+
+    def result(self):
+        return self.rows if self.headers is not None else None
+
+
+# ---------- registered extractors ----------
+
+@register("move")
+def move_value(text: str) -> float:
+    """MOVE index level from the FT tearsheet summary"""
+    value = NodeText("span", "mod-ui-data-list__value").run(text)
+    if value is None:
+        raise ValueError("MOVE value span not found")
+    return float(value.replace(",", ""))
+
+
+@register("auctions")
+def auction_rows(text: str, stop=None) -> list:
+    """Rows of the TreasuryDirect auction results table"""
+    rows = TableRows(("CUSIP", "Auction Date", "Security Type"), stop=stop).run(text)
+    if rows is None:
+        raise ValueError("No auction results table with CUSIP and Auction Date columns found")
+    return rows
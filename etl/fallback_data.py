@@ -4,14 +4,23 @@ This script generates realistic data when the FRED API is unavailable
 """
 import os
 import sys
-import json
 import pathlib
 import pandas as pd
 from datetime import date, timedelta
 import traceback
 
+# Make the etl package importable when this file is run as a script
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
 def generate_fallback_data():
     """Generate realistic fallback data when FRED API fails"""
+    from etl.asof import AsOfHistory
+    from etl.history_store import HistoryStore
+    from etl.status import classify_row
+    from etl.publish import publish
+
     try:
         # Get absolute paths
         script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -45,13 +54,13 @@ def generate_fallback_data():
             "tail_bp": 3.5,
         }
         
-        # Create or load history file
-        hist_path = os.path.join(data_dir, "history.parquet")
-        if os.path.exists(hist_path):
-            print(f"Loading existing history from {hist_path}")
-            hist = pd.read_parquet(hist_path)
+        # Create or load the history store
+        store = HistoryStore(os.path.join(data_dir, "history"), legacy_path=os.path.join(data_dir, "history.parquet"))
+        if store.exists():
+            print(f"Loading existing history from {store.root}")
+            hist = store.read()
         else:
-            print(f"Creating new history file at {hist_path}")
+            print(f"Creating new history store at {store.root}")
             # Generate data for the past 365 days
             dates = []
             on_rrp_values = []
@@ -83,59 +92,28 @@ def generate_fallback_data():
                 'tail_bp': tail_bp_values
             }
             hist = pd.DataFrame(data).set_index('date')
+            hist.index = pd.to_datetime(hist.index)
+            store.replace(hist)
         
         # Add today's row to history
         new_row = pd.DataFrame([row])
         new_row['date'] = pd.to_datetime(new_row['date'])
         new_row = new_row.set_index('date')
-        hist = pd.concat([hist, new_row]).drop_duplicates(keep="last")
+        store.append(new_row)
+        hist = pd.concat([hist, new_row])
+        hist = hist[~hist.index.duplicated(keep="last")]
         
-        # Keep last 365 days and save
-        hist = hist.tail(365)
-        hist.to_parquet(hist_path)
+        # Publish the last 365 days, as-of aligned to daily
+        aligned = AsOfHistory.from_frame(hist)
+        hist = aligned.daily(start=max(aligned.start, aligned.end - pd.Timedelta(days=364)))
         print(f"Updated history saved with {len(hist)} records")
         
         # Calculate status indicators
-        status = {}
-        status["on_rrp"] = "red" if row["on_rrp"] < 50_000 else "amber" if row["on_rrp"] < 100_000 else "green"
-        status["reserves"] = "red" if row["reserves"] < 2_500_000 else "amber" if row["reserves"] < 3_000_000 else "green"
-        status["move"] = "red" if row["move"] >= 140 else "amber" if row["move"] >= 120 else "green"
-        status["srf"] = "red" if row["srf"] >= 100_000 else "amber" if row["srf"] >= 25_000 else "green"
-        status["tail"] = "red" if (row["bill_share"] > 0.6 and row["tail_bp"] >= 4) else "amber" if (row["bill_share"] > 0.6 or row["tail_bp"] >= 4) else "green"
-        row["status"] = status
-        
-        # Save dashboard.json
-        dash_path = os.path.join(public_dir, "dashboard.json")
-        with open(dash_path, 'w') as f:
-            json.dump(row, f, indent=2)
-        print(f"Dashboard JSON saved to {dash_path}")
-        
-        # Generate series JSON files
-        metrics = ["on_rrp", "reserves", "move", "srf"]
-        for metric in metrics:
-            series_data = hist[[metric]].reset_index()
-            series_data = series_data.rename(columns={metric: "value"})
-            series_path = os.path.join(series_dir, f"{metric}.json")
-            with open(series_path, 'w') as f:
-                f.write(series_data.to_json(orient="records", date_format='iso'))
-            print(f"{metric} series JSON saved to {series_path}")
-        
-        # Generate funding combined series
-        funding_data = hist[["bill_share", "tail_bp"]].reset_index()
-        funding_data["value"] = (funding_data["bill_share"] * 100) + (funding_data["tail_bp"] / 10)
-        funding_data = funding_data[["date", "value"]]
-        funding_path = os.path.join(series_dir, "funding.json")
-        with open(funding_path, 'w') as f:
-            f.write(funding_data.to_json(orient="records", date_format='iso'))
-        print(f"Funding series JSON saved to {funding_path}")
+        row["status"] = classify_row(row)
         
-        # Generate individual bill_share and tail_bp series
-        bill_share_data = hist[["bill_share"]].rename(columns={"bill_share": "value"}).reset_index()
-        tail_bp_data = hist[["tail_bp"]].rename(columns={"tail_bp": "value"}).reset_index()
-        with open(os.path.join(series_dir, "bill_share.json"), 'w') as f:
-            f.write(bill_share_data.to_json(orient="records", date_format='iso'))
-        with open(os.path.join(series_dir, "tail_bp.json"), 'w') as f:
-            f.write(tail_bp_data.to_json(orient="records", date_format='iso'))
+        # Write dashboard, sparks, auctions and series JSON (unchanged files are skipped)
+        publish(hist, row, public_dir, series_dir, os.path.join(data_dir, "publish_manifest.json"),
+                native=aligned, start=hist.index[0])
         
         print("Fallback data generation completed successfully")
         return True
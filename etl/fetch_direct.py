@@ -8,6 +8,20 @@ import json
 import requests
 from datetime import date
 
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Make the etl package importable when this file is run as a script
+if BASE not in sys.path:
+    sys.path.insert(0, BASE)
+
+from etl.registry import fred_series
+
+# Checked alongside the dashboard's FRED series from the registry
+EXTRA_SERIES = (
+    'DFF',        # Federal Funds Rate
+    'T10Y2Y',     # 10-Year Treasury Constant Maturity Minus 2-Year
+)
+
 def main():
     """Main function to fetch data directly from FRED API"""
     
@@ -19,12 +33,7 @@ def main():
     
     print(f"Using FRED API key: {api_key[:4]}...{api_key[-4:]}")
     
-    series_ids = [
-        'RRPONTSYD',  # ON-RRP
-        'WRBWFRBL',   # Reserves
-        'DFF',        # Federal Funds Rate
-        'T10Y2Y',     # 10-Year Treasury Constant Maturity Minus 2-Year
-    ]
+    series_ids = list(fred_series().values()) + list(EXTRA_SERIES)
     
     results = {}
     
@@ -0,0 +1,108 @@
+"""
+Incremental FRED ingestion for the Liquidity Dashboard ETL.
+Instead of asking FRED for the latest observation only, each series is
+requested from the day after the last date already stored in history,
+so missed runs are caught up without re-downloading the full series.
+The last few weeks are requested again so that revisions reach the
+vintage store (etl/vintage_store.py).
+"""
+from datetime import date, timedelta
+
+import pandas as pd
+import requests
+
+FRED_OBSERVATIONS_URL = "https://api.stlouisfed.org/fred/series/observations"
+FRED_SERIES_URL = "https://api.stlouisfed.org/fred/series"
+
+# How far back to go for a series that has no stored history yet
+DEFAULT_LOOKBACK_DAYS = 3650
+
+# Recent observations re-requested each run so revisions are picked up
+REVISION_WINDOW_DAYS = 35
+
+
+def last_stored_dates(hist: pd.DataFrame, columns) -> dict:
+    """Last date with a non-null value for each column (None if absent)"""
+    last = {}
+    for column in columns:
+        if hist is None or column not in hist.columns:
+            last[column] = None
+            continue
+        valid = hist[column].dropna()
+        last[column] = valid.index.max().date() if len(valid) else None
+    return last
+
+
+def observation_start(last_date, revision_days: int = 0) -> str:
+    """First date to request given the last stored date, reaching back `revision_days` for revisions"""
+    if last_date is None:
+        return (date.today() - timedelta(days=DEFAULT_LOOKBACK_DAYS)).isoformat()
+    return (last_date + timedelta(days=1) - timedelta(days=revision_days)).isoformat()
+
+
+def fetch_observations(session: requests.Session, api_key: str, series: str, start: str, cache=None,
+                       end: str = None) -> pd.Series:
+    """
+    Fetch every observation of `series` from `start` onwards (through `end` if given).
+    Returns a float Series indexed by observation date; missing values ('.') are dropped.
+    Raises on HTTP or API errors so the caller can tell "no new data" from "failed".
+    If a ResponseCache is given the request goes through it.
+    """
+    params = {
+        "series_id": series,
+        "api_key": api_key,
+        "file_type": "json",
+        "observation_start": start,
+    }
+    if end is not None:
+        params["observation_end"] = end
+    if cache is not None:
+        response = cache.get(session, FRED_OBSERVATIONS_URL, "fred", params=params)
+    else:
+        response = session.get(FRED_OBSERVATIONS_URL, params=params, timeout=30)
+    response.raise_for_status()
+    data = response.json()
+
+    if "observations" not in data:
+        raise ValueError(data.get("error_message", f"No 'observations' key in response for {series}"))
+
+    obs = [o for o in data["observations"] if o.get("value") not in (None, ".")]
+    if not obs:
+        return pd.Series(dtype="float64", name=series)
+
+    values = pd.Series(
+        [float(o["value"]) for o in obs],
+        index=pd.to_datetime([o["date"] for o in obs]),
+        name=series,
+    )
+    values.index.name = "date"
+    return values
+
+
+def fetch_series_info(session: requests.Session, api_key: str, series: str) -> dict:
+    """Title, units, frequency and observation range of `series` from FRED's series endpoint"""
+    params = {"series_id": series, "api_key": api_key, "file_type": "json"}
+    response = session.get(FRED_SERIES_URL, params=params, timeout=30)
+    response.raise_for_status()
+    data = response.json()
+    if not data.get("seriess"):
+        raise ValueError(data.get("error_message", f"No series info for {series}"))
+    info = data["seriess"][0]
+    return {key: info.get(key) for key in
+            ("title", "units", "frequency_short", "observation_start", "observation_end", "last_updated")}
+
+
+def merge_observations(hist: pd.DataFrame, new: dict) -> pd.DataFrame:
+    """
+    Merge new observations into history in one pass.
+    `new` maps history column -> Series of observations; new values win over stored ones.
+    """
+    new = {column: values for column, values in new.items() if values is not None and len(values)}
+    if not new:
+        return hist
+    frame = pd.DataFrame(new)
+    frame.index.name = "date"
+    if hist is None or hist.empty:
+        return frame.sort_index()
+    merged = frame.combine_first(hist)
+    return merged[list(hist.columns) + [c for c in merged.columns if c not in hist.columns]]
@@ -0,0 +1,429 @@
+"""
+Append-only history store for the Liquidity Dashboard ETL.
+
+Daily rows are appended to a JSON-lines journal, so an append costs the same
+however long the history is. The journal is periodically compacted into
+year-partitioned parquet files. Only the years the journal touched are
+rewritten.
+
+Partitions are written compact: dates as int32 day offsets (parquet DATE),
+float columns as float32 when every value survives the round trip at its
+decimal precision (otherwise float64), categoricals dictionary-encoded,
+zstd pages and one row group per calendar month. read(columns, start, end)
+projects columns and skips partitions and row groups by their date
+statistics, so the last 30 days of one column is one or two row groups of
+one file. Partitions written by earlier versions are still read as they are.
+
+Layout under data/history/:
+    manifest.json             current generation: partition files + journal
+    part-<year>-<gen>.parquet one file per calendar year
+    journal-<gen>.jsonl       rows appended since the last compaction
+    history.lock              held by writers (append / compact / replace)
+
+Writers serialise on the lock file. Every file is written to a temporary path
+and atomically renamed into place. The manifest is swapped last. Readers never
+take the lock: they read whatever generation the manifest names, and files of
+the previous generation are kept until the next compaction.
+"""
+import json
+import math
+import os
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Compact once the journal grows past this many bytes (~ a few months of rows)
+COMPACT_BYTES = 64 * 1024
+LOCK_TIMEOUT = 60
+STALE_LOCK_SECONDS = 10 * 60
+
+# Parquet codec of the partitions. Only categorical columns are dictionary
+# encoded: at a month of native-frequency values per row group, float
+# dictionaries cost more than they save. Statistics are kept for the date
+# column alone, the only one reads are pruned on.
+COMPRESSION = "zstd"
+
+# float32 holds integers exactly below 2**24, so a value with d decimals
+# survives a float32 round trip once rounded to d places when |x| * 10**d < 2**23
+FLOAT32_LIMIT = 2 ** 23
+MAX_DECIMALS = 6
+
+# Parquet schema metadata key holding the decimals of each float32 column
+SCHEMA_KEY = b"history_store"
+
+
+class HistoryLockTimeout(RuntimeError):
+    pass
+
+
+def _atomic_write_bytes(path: str, data: bytes):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _clean(value):
+    if value is None:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if hasattr(value, "item"):  # numpy scalar
+        value = value.item()
+        if isinstance(value, float) and math.isnan(value):
+            return None
+    return value
+
+
+def _to_frame(rows) -> pd.DataFrame:
+    """Accept a dict, a list of dicts or a date-indexed DataFrame"""
+    if isinstance(rows, pd.DataFrame):
+        frame = rows.copy()
+    else:
+        if isinstance(rows, dict):
+            rows = [rows]
+        frame = pd.DataFrame(list(rows))
+        frame = frame.set_index("date")
+    frame.index = pd.to_datetime(frame.index)
+    frame.index.name = "date"
+    return frame
+
+
+def float32_decimals(values: np.ndarray):
+    """Decimals float32 stores `values` to losslessly, or None when it can't"""
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return 0
+    peak = np.abs(values).max()
+    for decimals in range(MAX_DECIMALS + 1):
+        if not peak * 10 ** decimals < FLOAT32_LIMIT:
+            return None
+        if np.array_equal(np.round(values, decimals), values):
+            restored = np.round(values.astype(np.float32).astype(np.float64), decimals)
+            return decimals if np.array_equal(restored, values) else None
+    return None
+
+
+def write_partition(path: str, frame: pd.DataFrame):
+    """Write a date-indexed frame as parquet with one row group per calendar month"""
+    arrays = [pa.array(frame.index.values.astype("datetime64[D]"), type=pa.date32())]
+    decimals = {}
+    for column in frame.columns:
+        values = frame[column]
+        if pd.api.types.is_float_dtype(values) or pd.api.types.is_integer_dtype(values):
+            values = values.to_numpy(dtype="float64")
+            places = float32_decimals(values)
+            if places is not None:
+                decimals[column] = places
+                values = values.astype(np.float32)
+        arrays.append(pa.array(values, from_pandas=True))
+    table = pa.Table.from_arrays(arrays, names=["date"] + [str(c) for c in frame.columns])
+    table = table.replace_schema_metadata({SCHEMA_KEY: json.dumps({"decimals": decimals})})
+    dictionary = [field.name for field in table.schema if pa.types.is_dictionary(field.type)]
+
+    months = frame.index.year.to_numpy() * 12 + frame.index.month.to_numpy()
+    bounds = np.flatnonzero(np.r_[True, months[1:] != months[:-1], True]) if len(frame) else [0, 0]
+    with pq.ParquetWriter(path, table.schema, compression=COMPRESSION, use_dictionary=dictionary,
+                          write_statistics=["date"]) as writer:
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            writer.write_table(table.slice(lo, hi - lo))
+
+
+def read_partition(path: str, columns=None, start=None, end=None) -> pd.DataFrame:
+    """
+    `columns` (default all) of one partition between `start` and `end`.
+    Only the row groups whose date statistics overlap the range are read.
+    """
+    parquet = pq.ParquetFile(path)
+    schema = parquet.schema_arrow
+    at = schema.get_field_index("date")
+    groups = []
+    for i in range(parquet.num_row_groups):
+        stats = parquet.metadata.row_group(i).column(at).statistics
+        if stats is not None and stats.has_min_max and (
+                (start is not None and pd.Timestamp(stats.max) < start)
+                or (end is not None and pd.Timestamp(stats.min) > end)):
+            continue
+        groups.append(i)
+    names = [name for name in (schema.names if columns is None else columns) if name in schema.names and name != "date"]
+    table = parquet.read_row_groups(groups, columns=["date"] + names)
+
+    decimals = json.loads((schema.metadata or {}).get(SCHEMA_KEY, b"{}")).get("decimals", {})
+    index = pd.DatetimeIndex(table.column("date").to_numpy().astype("datetime64[ns]"), name="date")
+    frame = {}
+    for name in names:
+        column = table.column(name)
+        if pa.types.is_dictionary(column.type):
+            frame[name] = column.to_pandas().array
+        elif name in decimals:
+            frame[name] = np.round(column.to_numpy().astype(np.float64), decimals[name])
+        else:
+            frame[name] = column.to_numpy()
+    frame = pd.DataFrame(frame, index=index, columns=names)
+    if start is not None or end is not None:
+        frame = frame.loc[start:end]
+    return frame
+
+
+@contextmanager
+def file_lock(lock_path: str, timeout: float = LOCK_TIMEOUT):
+    """Exclusive lock via an O_EXCL lock file (works on Windows and POSIX)"""
+    deadline = time.time() + timeout
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(fd, str(os.getpid()).encode())
+            os.close(fd)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > STALE_LOCK_SECONDS:
+                    print(f"Breaking stale lock {lock_path}")
+                    os.remove(lock_path)
+                    continue
+            except OSError:
+                continue
+            if time.time() > deadline:
+                raise HistoryLockTimeout(f"Timed out waiting for {lock_path}")
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        try:
+            os.remove(lock_path)
+        except OSError:
+            pass
+
+
+def _latest(frame: pd.DataFrame, latest: dict) -> dict:
+    """`latest` updated with the newest date each column of `frame` has a value on"""
+    latest = dict(latest)
+    for column in frame.columns:
+        day = frame[column].last_valid_index()
+        if day is not None and (column not in latest or day.date() > latest[column]):
+            latest[column] = day.date()
+    return latest
+
+
+class HistoryStore:
+    """Journaled, year-partitioned history of daily dashboard values"""
+
+    def __init__(self, root: str, legacy_path: str = None, compact_bytes: int = COMPACT_BYTES,
+                 create: bool = True):
+        """With create=False nothing is created or migrated; use it for read-only looks at the store"""
+        self.root = root
+        self.legacy_path = legacy_path
+        self.compact_bytes = compact_bytes
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self.lock_path = os.path.join(root, "history.lock")
+        if not create:
+            return
+        os.makedirs(root, exist_ok=True)
+        if not os.path.exists(self.manifest_path) and legacy_path and os.path.exists(legacy_path):
+            print(f"Migrating legacy history from {legacy_path} into {root}")
+            self.replace(pd.read_parquet(legacy_path))
+
+    # ---------- locking ----------
+
+    def lock(self, timeout: float = LOCK_TIMEOUT):
+        """Exclusive writer lock on this store"""
+        return file_lock(self.lock_path, timeout)
+
+    # ---------- manifest ----------
+
+    def _read_manifest(self) -> dict:
+        try:
+            with open(self.manifest_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"generation": 0, "partitions": {}, "journal": None, "retired": []}
+
+    def _write_manifest(self, manifest: dict):
+        _atomic_write_bytes(self.manifest_path, json.dumps(manifest, indent=2).encode())
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    # ---------- reading ----------
+
+    def _read_journal(self, name: str) -> pd.DataFrame:
+        if not name or not os.path.exists(self._path(name)):
+            return pd.DataFrame()
+        records = []
+        with open(self._path(name), "r") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # a torn final line from a concurrent append; it will be complete next read
+                    continue
+        if not records:
+            return pd.DataFrame()
+        return _to_frame(records)
+
+    def _read_generation(self, manifest: dict, columns=None, start=None, end=None) -> pd.DataFrame:
+        parts = [
+            read_partition(self._path(name), columns, start, end)
+            for year, name in sorted(manifest["partitions"].items())
+            if (start is None or int(year) >= start.year) and (end is None or int(year) <= end.year)
+        ]
+        journal = self._read_journal(manifest.get("journal"))
+        if not journal.empty:
+            if columns is not None:
+                journal = journal[[column for column in columns if column in journal.columns]]
+            journal = journal.sort_index().loc[start:end]
+        frames = [p for p in parts + [journal] if not p.empty]
+        if not frames:
+            return pd.DataFrame(index=pd.DatetimeIndex([], name="date"))
+        hist = pd.concat(frames)
+        if not journal.empty:
+            # journal rows win column by column over compacted values
+            hist = hist.groupby(level=0, sort=True).last()
+        if columns is not None:
+            hist = hist.dropna(how="all")
+        hist.index.name = "date"
+        return hist
+
+    def read(self, columns=None, start=None, end=None) -> pd.DataFrame:
+        """
+        Consistent snapshot of the history (partitions + journal replay).
+        `columns` projects the read; `start` and `end` bound it by date, and
+        only the partitions and row groups in that range are read. With
+        `columns`, dates where none of them has a value are left out.
+        """
+        start = None if start is None else pd.Timestamp(start).normalize()
+        end = None if end is None else pd.Timestamp(end).normalize()
+        columns = None if columns is None else list(columns)
+        for _ in range(5):
+            manifest = self._read_manifest()
+            try:
+                return self._read_generation(manifest, columns, start, end)
+            except FileNotFoundError:
+                # a compaction retired this generation while we were reading; retry
+                time.sleep(0.05)
+        return self._read_generation(self._read_manifest(), columns, start, end)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.manifest_path)
+
+    def latest_dates(self) -> dict:
+        """
+        Column -> date of its newest value. Partitions are read newest year
+        first and only until every column has been seen; a legacy file not
+        migrated yet is read as it is.
+        """
+        if not self.exists():
+            if self.legacy_path and os.path.exists(self.legacy_path):
+                return _latest(pd.read_parquet(self.legacy_path), {})
+            return {}
+        manifest = self._read_manifest()
+        journal = self._read_journal(manifest.get("journal"))
+        latest, columns = _latest(journal, {}), set(journal.columns)
+        for year, name in sorted(manifest["partitions"].items(), reverse=True):
+            frame = read_partition(self._path(name))
+            latest, columns = _latest(frame, latest), columns | set(frame.columns)
+            if columns <= set(latest):
+                break
+        return latest
+
+    def version(self) -> tuple:
+        """Cheap stamp that changes whenever any writer appends, compacts or replaces"""
+        manifest = self._read_manifest()
+        journal = manifest.get("journal")
+        try:
+            journal_size = os.path.getsize(self._path(journal)) if journal else 0
+        except OSError:
+            journal_size = 0
+        return manifest["generation"], journal, journal_size
+
+    # ---------- writing ----------
+
+    def append(self, rows, compact: bool = True):
+        """Append rows to the journal and return how many; cost does not depend on history size"""
+        frame = _to_frame(rows)
+        if frame.empty:
+            return 0
+        lines = []
+        for ts, values in zip(frame.index, frame.to_dict(orient="records")):
+            record = {"date": ts.strftime("%Y-%m-%d")}
+            record.update({k: _clean(v) for k, v in values.items()})
+            lines.append(json.dumps(record))
+
+        with self.lock():
+            manifest = self._read_manifest()
+            if not manifest.get("journal"):
+                manifest["journal"] = f"journal-{manifest['generation']}.jsonl"
+                self._write_manifest(manifest)
+            path = self._path(manifest["journal"])
+            with open(path, "a") as f:
+                f.write("\n".join(lines) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            journal_size = os.path.getsize(path)
+
+        print(f"Appended {len(lines)} row(s) to history journal")
+        if compact and journal_size >= self.compact_bytes:
+            self.compact()
+        return len(lines)
+
+    def _write_generation(self, manifest: dict, hist: pd.DataFrame, years, partitions: dict) -> dict:
+        """Write partitions for `years` on top of `partitions`, then swap the manifest"""
+        generation = manifest["generation"] + 1
+        partitions = dict(partitions)
+        for year in sorted(years):
+            name = f"part-{year}-{generation}.parquet"
+            tmp = self._path(f"{name}.{os.getpid()}.tmp")
+            write_partition(tmp, hist[hist.index.year == year])
+            os.replace(tmp, self._path(name))
+            partitions[str(year)] = name
+
+        # Files still named by the outgoing manifest stay for in-flight readers;
+        # the ones it had already retired can go now.
+        for name in manifest.get("retired", []):
+            try:
+                os.remove(self._path(name))
+            except OSError:
+                pass
+        live = set(partitions.values())
+        retired = [name for name in manifest["partitions"].values() if name not in live]
+        if manifest.get("journal"):
+            retired.append(manifest["journal"])
+
+        new_manifest = {
+            "generation": generation,
+            "partitions": partitions,
+            "journal": None,
+            "retired": retired,
+            "columns": list(hist.columns),
+            "rows": int(len(hist)),
+            "first_date": hist.index.min().strftime("%Y-%m-%d") if len(hist) else None,
+            "last_date": hist.index.max().strftime("%Y-%m-%d") if len(hist) else None,
+        }
+        self._write_manifest(new_manifest)
+        return new_manifest
+
+    def compact(self):
+        """Fold the journal into the year partitions it touches"""
+        with self.lock():
+            manifest = self._read_manifest()
+            journal = self._read_journal(manifest.get("journal"))
+            if journal.empty:
+                return
+            hist = self._read_generation(manifest)
+            years = set(journal.index.year)
+            new_manifest = self._write_generation(manifest, hist, years, manifest["partitions"])
+        print(f"Compacted history journal into {len(years)} partition(s), generation {new_manifest['generation']}")
+
+    def replace(self, hist: pd.DataFrame):
+        """Rewrite the whole store from a frame (bootstrap / synthetic data)"""
+        hist = _to_frame(hist).sort_index()
+        hist = hist[~hist.index.duplicated(keep="last")]
+        with self.lock():
+            self._write_generation(self._read_manifest(), hist, set(hist.index.year), {})
+        print(f"History store rewritten with {len(hist)} rows")
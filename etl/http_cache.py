@@ -0,0 +1,205 @@
+"""
+Persistent HTTP response cache for the Liquidity Dashboard ETL.
+Responses are kept on disk under data/http_cache with a per-source TTL.
+Once an entry is stale it is revalidated with ETag / Last-Modified, so
+unchanged pages cost a 304 instead of a full download. The cache is
+bounded in size and evicts least-recently-used bodies first.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+
+from etl.concurrent_fetch import current_task
+
+# Seconds a cached response is served without touching the network
+SOURCE_TTLS = {
+    "fred": 60 * 60,
+    "move": 15 * 60,
+    "srf": 60 * 60,
+    "auctions": 6 * 60 * 60,
+}
+DEFAULT_TTL = 15 * 60
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Query parameters that must never be part of the cache key or the index
+SECRET_PARAMS = ("api_key",)
+
+
+class CachedResponse:
+    """The subset of requests.Response the ETL uses, backed by cache or network"""
+
+    def __init__(self, url, status_code, content, headers=None, from_cache=False, bytes_received=0):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.from_cache = from_cache
+        self.bytes_received = bytes_received
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+
+class ResponseCache:
+    """On-disk, size-bounded HTTP cache with conditional revalidation"""
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_MAX_BYTES, ttls: dict = None, enabled: bool = True):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttls = dict(SOURCE_TTLS, **(ttls or {}))
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(root, "index.json")
+        os.makedirs(root, exist_ok=True)
+        self._index = self._load_index()
+        # One entry per get() for run metrics, tagged with the fetch_all task
+        self.requests = []
+
+    # ---------- index ----------
+
+    def _load_index(self) -> dict:
+        try:
+            with open(self._index_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        tmp = f"{self._index_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._index, f, separators=(",", ":"))
+        os.replace(tmp, self._index_path)
+
+    def _body_path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.body")
+
+    @staticmethod
+    def key_for(url: str, params: dict = None) -> str:
+        public = sorted((k, str(v)) for k, v in (params or {}).items() if k not in SECRET_PARAMS)
+        return hashlib.sha256(json.dumps([url, public]).encode()).hexdigest()[:32]
+
+    def _read_body(self, key: str):
+        try:
+            with open(self._body_path(key), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _store(self, key: str, source: str, response: requests.Response, now: float):
+        body_path = self._body_path(key)
+        tmp = f"{body_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(response.content)
+        os.replace(tmp, body_path)
+        self._index[key] = {
+            "source": source,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "content_type": response.headers.get("Content-Type"),
+            "fetched_at": now,
+            "last_used": now,
+            "size": len(response.content),
+        }
+
+    def _evict(self):
+        total = sum(entry["size"] for entry in self._index.values())
+        if total <= self.max_bytes:
+            return
+        for key, entry in sorted(self._index.items(), key=lambda kv: kv[1]["last_used"]):
+            try:
+                os.remove(self._body_path(key))
+            except OSError:
+                pass
+            total -= entry["size"]
+            del self._index[key]
+            if total <= self.max_bytes:
+                break
+
+    # ---------- fetching ----------
+
+    def get(self, session: requests.Session, url: str, source: str, params: dict = None,
+            headers: dict = None, timeout: int = 30) -> CachedResponse:
+        """
+        GET `url` through the cache.
+        Fresh entries are served from disk; stale ones are revalidated with
+        If-None-Match / If-Modified-Since. If the network fails and a stale copy
+        exists, the stale copy is returned rather than raising.
+        """
+        response = self._get(session, url, source, params, headers, timeout)
+        with self._lock:
+            self.requests.append({
+                "task": current_task() or source,
+                "source": source,
+                "status": response.status_code,
+                "bytes": response.bytes_received,
+                "from_cache": response.from_cache,
+            })
+        return response
+
+    def _get(self, session, url, source, params, headers, timeout) -> CachedResponse:
+        if not self.enabled:
+            response = session.get(url, params=params, headers=headers, timeout=timeout)
+            return CachedResponse(url, response.status_code, response.content, response.headers,
+                                  bytes_received=len(response.content))
+
+        key = self.key_for(url, params)
+        ttl = self.ttls.get(source, DEFAULT_TTL)
+        now = time.time()
+
+        with self._lock:
+            entry = dict(self._index.get(key) or {})
+        body = self._read_body(key) if entry else None
+
+        if body is not None and now - entry["fetched_at"] < ttl:
+            with self._lock:
+                if key in self._index:
+                    self._index[key]["last_used"] = now
+                    self._save_index()
+            print(f"[cache] {source}: fresh hit ({len(body)} bytes, age {now - entry['fetched_at']:.0f}s)")
+            return CachedResponse(url, 200, body, {"Content-Type": entry.get("content_type") or ""}, from_cache=True)
+
+        conditional = dict(headers or {})
+        if body is not None:
+            if entry.get("etag"):
+                conditional["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                conditional["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            response = session.get(url, params=params, headers=conditional, timeout=timeout)
+        except requests.exceptions.RequestException as e:
+            if body is None:
+                raise
+            print(f"[cache] {source}: network error ({e}), serving stale copy")
+            return CachedResponse(url, 200, body, {"Content-Type": entry.get("content_type") or ""}, from_cache=True)
+
+        if response.status_code == 304 and body is not None:
+            with self._lock:
+                if key in self._index:
+                    self._index[key]["fetched_at"] = now
+                    self._index[key]["last_used"] = now
+                    self._save_index()
+            print(f"[cache] {source}: not modified, reusing {len(body)} cached bytes")
+            return CachedResponse(url, 304, body, response.headers, from_cache=True)
+
+        if response.status_code == 200:
+            with self._lock:
+                self._store(key, source, response, now)
+                self._evict()
+                self._save_index()
+            print(f"[cache] {source}: stored {len(response.content)} bytes")
+
+        return CachedResponse(url, response.status_code, response.content, response.headers,
+                              bytes_received=len(response.content))
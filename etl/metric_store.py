@@ -0,0 +1,301 @@
+"""
+Memory-mapped columnar store for public/data/history.json.
+
+history.json is long format: one object per day holding a list of
+{id, value, unit} metrics, so reading one metric over one range means
+parsing the whole document. build() streams the document once, one day
+object at a time, into one .npy array per metric aligned on a shared date
+index. MetricStore maps those files read-only. Range, as-of and
+multi-metric queries then cost a binary search on the dates, and they
+return NumPy views into the mapping rather than copies.
+
+Layout under data/metric_store/:
+    manifest.json        current generation: metrics, units, date span, source stamp
+    <gen>/dates.npy      datetime64[D], sorted and unique
+    <gen>/m<i>.npy       float64 per date, NaN where the day has no value
+    <gen>/m<i>.last.npy  int32 row of the last value at or before each row (-1: none yet)
+
+A rebuild writes a new generation directory and swaps the manifest last.
+Stores opened earlier keep reading their own generation; it is removed two
+builds later.
+
+    python -m etl metric-store build
+    python -m etl metric-store query sofr --start 2024-01-01 --end 2024-03-31
+    python -m etl metric-store query sofr bill_share --as-of 2024-03-31
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+from array import array
+
+import numpy as np
+
+from etl.history_store import file_lock
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_PATH = os.path.join(BASE, "public", "data", "history.json")
+METRIC_STORE_DIR = os.path.join(BASE, "data", "metric_store")
+
+# Characters read from the source between decode attempts
+CHUNK_SIZE = 64 * 1024
+
+_SEPARATORS = re.compile(r"[\s,]*")
+
+
+def iter_days(path: str, chunk_size: int = CHUNK_SIZE):
+    """Yield the objects of a top-level JSON array one by one, holding one chunk at a time"""
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith("["):
+            raise ValueError(f"{path} is not a JSON array")
+        pos = 1
+        while True:
+            pos = _SEPARATORS.match(buffer, pos).end()
+            if pos < len(buffer) and buffer[pos] == "]":
+                return
+            try:
+                if pos == len(buffer):
+                    raise json.JSONDecodeError("need more input", buffer, pos)
+                item, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                more = f.read(chunk_size)
+                if not more:
+                    raise ValueError(f"{path} ends inside the array")
+                buffer, pos = buffer[pos:] + more, 0
+                continue
+            yield item
+
+
+def source_stamp(path: str) -> dict:
+    stat = os.stat(path)
+    return {"path": os.path.abspath(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _read_manifest(root: str):
+    try:
+        with open(os.path.join(root, "manifest.json"), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_current(source: str = SOURCE_PATH, root: str = METRIC_STORE_DIR) -> bool:
+    """True when the store was built from `source` as it is now"""
+    manifest = _read_manifest(root)
+    return manifest is not None and manifest["source"] == source_stamp(source)
+
+
+def _columns(days):
+    """Dates (day numbers) and per-metric values of the day objects, in input order"""
+    dates = array("q")
+    values, units = {}, {}
+    for row, day in enumerate(days):
+        dates.append(int(np.datetime64(day["date"], "D").astype(np.int64)))
+        today = {}
+        for metric in day.get("metrics", ()):
+            name, value, unit = metric["id"], metric.get("value"), metric.get("unit")
+            if name not in values:
+                values[name] = array("d", [np.nan]) * row
+                units[name] = unit
+            elif units[name] != unit:
+                raise ValueError(f"{name} on {day['date']} is in {unit}, earlier days in {units[name]}")
+            today[name] = np.nan if value is None else float(value)
+        for name, column in values.items():
+            column.append(today.get(name, np.nan))
+    return dates, values, units
+
+
+def last_valid(values: np.ndarray) -> np.ndarray:
+    """Row of the last non-NaN value at or before each row; -1 before the first"""
+    rows = np.where(np.isnan(values), -1, np.arange(len(values), dtype=np.int32))
+    return np.maximum.accumulate(rows).astype(np.int32) if len(rows) else rows.astype(np.int32)
+
+
+def build(source: str = SOURCE_PATH, root: str = METRIC_STORE_DIR, chunk_size: int = CHUNK_SIZE) -> dict:
+    """Convert `source` into a new generation of the store under `root` and return its manifest"""
+    stamp = source_stamp(source)
+    dates, values, units = _columns(iter_days(source, chunk_size))
+
+    day_numbers = np.frombuffer(dates, dtype=np.int64)
+    # sort by date; for repeated dates the later day object wins
+    order = np.argsort(day_numbers, kind="stable")
+    day_numbers = day_numbers[order]
+    keep = np.append(day_numbers[1:] != day_numbers[:-1], True) if len(day_numbers) else np.ones(0, bool)
+    order, day_numbers = order[keep], day_numbers[keep]
+
+    os.makedirs(root, exist_ok=True)
+    with file_lock(os.path.join(root, "metric_store.lock")):
+        previous = _read_manifest(root) or {"generation": 0}
+        generation = previous["generation"] + 1
+        directory = os.path.join(root, str(generation))
+        tmp = f"{directory}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        np.save(os.path.join(tmp, "dates.npy"), day_numbers.astype("datetime64[D]"))
+        metrics = {}
+        for i, name in enumerate(sorted(values)):
+            column = np.frombuffer(values[name], dtype=np.float64)[order]
+            np.save(os.path.join(tmp, f"m{i}.npy"), column)
+            np.save(os.path.join(tmp, f"m{i}.last.npy"), last_valid(column))
+            metrics[name] = {"file": f"m{i}", "unit": units[name], "count": int(np.count_nonzero(~np.isnan(column)))}
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(tmp, directory)
+
+        span = day_numbers.astype("datetime64[D]")
+        manifest = {
+            "generation": generation,
+            "rows": int(len(span)),
+            "start": str(span[0]) if len(span) else None,
+            "end": str(span[-1]) if len(span) else None,
+            "metrics": metrics,
+            "source": stamp,
+        }
+        manifest_path = os.path.join(root, "manifest.json")
+        with open(f"{manifest_path}.{os.getpid()}.tmp", "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(f"{manifest_path}.{os.getpid()}.tmp", manifest_path)
+
+        # keep the previous generation for stores opened before the swap
+        for name in os.listdir(root):
+            if name.isdigit() and int(name) < generation - 1:
+                shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+    return manifest
+
+
+def _day(value) -> np.datetime64:
+    """A date string, date, datetime, Timestamp or datetime64 as a datetime64[D]"""
+    return np.datetime64(value, "D")
+
+
+class MetricStore:
+    """Read-only, memory-mapped view of one generation of the metric store"""
+
+    def __init__(self, root: str = METRIC_STORE_DIR):
+        self.root = root
+        self.manifest = _read_manifest(root)
+        if self.manifest is None:
+            raise FileNotFoundError(f"No metric store in {root}; run: python -m etl metric-store build")
+        self.directory = os.path.join(root, str(self.manifest["generation"]))
+        self.dates = np.load(os.path.join(self.directory, "dates.npy"), mmap_mode="r")
+        self._values = {}
+        self._last = {}
+
+    @property
+    def metrics(self) -> list:
+        return list(self.manifest["metrics"])
+
+    def unit(self, metric: str) -> str:
+        return self._entry(metric)["unit"]
+
+    def _entry(self, metric: str) -> dict:
+        try:
+            return self.manifest["metrics"][metric]
+        except KeyError:
+            raise KeyError(f"Unknown metric {metric!r}; the store holds {', '.join(self.metrics)}") from None
+
+    def values(self, metric: str) -> np.ndarray:
+        """The whole column of `metric`, aligned on `dates`"""
+        column = self._values.get(metric)
+        if column is None:
+            path = os.path.join(self.directory, self._entry(metric)["file"] + ".npy")
+            column = self._values[metric] = np.load(path, mmap_mode="r")
+        return column
+
+    def _last_valid(self, metric: str) -> np.ndarray:
+        rows = self._last.get(metric)
+        if rows is None:
+            path = os.path.join(self.directory, self._entry(metric)["file"] + ".last.npy")
+            rows = self._last[metric] = np.load(path, mmap_mode="r")
+        return rows
+
+    def bounds(self, start=None, end=None) -> tuple:
+        """Row slice [i, j) of the dates between `start` and `end` (inclusive)"""
+        i = 0 if start is None else int(np.searchsorted(self.dates, _day(start), "left"))
+        j = len(self.dates) if end is None else int(np.searchsorted(self.dates, _day(end), "right"))
+        return i, max(i, j)
+
+    def range(self, metric: str, start=None, end=None) -> tuple:
+        """(dates, values) of `metric` between `start` and `end`, as views into the store"""
+        i, j = self.bounds(start, end)
+        return self.dates[i:j], self.values(metric)[i:j]
+
+    def slice(self, metrics, start=None, end=None) -> tuple:
+        """(dates, {metric: values}) of several metrics over one date range, as views"""
+        i, j = self.bounds(start, end)
+        return self.dates[i:j], {metric: self.values(metric)[i:j] for metric in metrics}
+
+    def as_of(self, metric: str, when) -> tuple:
+        """(date, value) of the last value of `metric` on or before `when`; (None, nan) if there is none"""
+        i = int(np.searchsorted(self.dates, _day(when), "right")) - 1
+        row = int(self._last_valid(metric)[i]) if i >= 0 else -1
+        if row < 0:
+            return None, float("nan")
+        return self.dates[row], float(self.values(metric)[row])
+
+    def as_of_many(self, metric: str, whens) -> tuple:
+        """Vectorized as_of over an array of dates; NaT / NaN where there is no earlier value"""
+        whens = np.asarray(whens, dtype="datetime64[D]")
+        if not len(self.dates):
+            return np.full(len(whens), np.datetime64("NaT"), "datetime64[D]"), np.full(len(whens), np.nan)
+        i = np.searchsorted(self.dates, whens, "right") - 1
+        rows = np.where(i >= 0, self._last_valid(metric)[np.maximum(i, 0)], -1)
+        found = rows >= 0
+        dates = np.where(found, self.dates[np.maximum(rows, 0)], np.datetime64("NaT"))
+        values = np.where(found, self.values(metric)[np.maximum(rows, 0)], np.nan)
+        return dates.astype("datetime64[D]"), values
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m etl metric-store",
+                                     description="Memory-mapped columnar store for public/data/history.json")
+    parser.add_argument("--root", default=METRIC_STORE_DIR, help="store directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("build", help="convert the source document into a new store generation")
+    command.add_argument("--source", default=SOURCE_PATH)
+    command.add_argument("--force", action="store_true", help="rebuild even if the source is unchanged")
+
+    command = commands.add_parser("query", help="print a range or as-of slice of one or more metrics")
+    command.add_argument("metrics", nargs="*", help="metric ids (default: list the metrics)")
+    command.add_argument("--start", default=None)
+    command.add_argument("--end", default=None)
+    command.add_argument("--as-of", default=None, help="value on or before this date instead of a range")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        if not args.force and is_current(args.source, args.root):
+            print(f"{args.root} is up to date with {args.source}")
+            return 0
+        manifest = build(args.source, args.root)
+        print(f"Built generation {manifest['generation']}: {manifest['rows']} dates "
+              f"{manifest['start']} .. {manifest['end']}, {len(manifest['metrics'])} metrics")
+        return 0
+
+    store = MetricStore(args.root)
+    if not args.metrics:
+        for name, entry in store.manifest["metrics"].items():
+            print(f"{name:<32} {entry['unit'] or '':<6} {entry['count']:>6} values")
+        return 0
+    unknown = [metric for metric in args.metrics if metric not in store.manifest["metrics"]]
+    if unknown:
+        print(f"Unknown metric(s) {', '.join(unknown)}; the store holds {', '.join(store.metrics)}", file=sys.stderr)
+        return 1
+    if args.as_of:
+        for metric in args.metrics:
+            day, value = store.as_of(metric, args.as_of)
+            print(f"{metric:<32} {day}  {value}")
+        return 0
+    dates, columns = store.slice(args.metrics, args.start, args.end)
+    print("date        " + "  ".join(f"{metric:>16}" for metric in args.metrics))
+    for row, day in enumerate(dates):
+        print(f"{day}  " + "  ".join(f"{columns[metric][row]:>16.6g}" for metric in args.metrics))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,491 @@
+"""
+The Liquidity Dashboard ETL as callable stages.
+
+    Pipeline().run()                          # fetch -> derive -> publish
+    p = Pipeline(base=tmpdir); p.fetch(); p.derive(); p.publish()
+
+Stages can also run on their own (python -m etl derive / publish). derive
+and publish then start from the stored history; the earliest date the last
+fetch changed is kept in data/pipeline_state.json so derive only recomputes
+what that fetch touched. Other writers of the history (python -m etl backfill
+--into-history) move it back with mark_changed().
+
+The series come from the registry in web/data/series.json (etl/registry.py).
+run() fetches only the sources with a release due since their last fetch,
+kept in data/fetch_plan.json; FETCH_PLAN=off fetches every source every run.
+"""
+import hashlib
+import json
+import os
+from datetime import date, datetime, timezone
+
+import pandas as pd
+
+from etl import registry
+from etl.archive import SeriesArchive
+from etl.asof import AsOfHistory
+from etl.auctions import AuctionStore
+from etl.derived import DERIVED, update_derived
+from etl.history_store import HistoryStore
+from etl.run_metrics import RunMetrics
+from etl.srf import SrfStore
+from etl.status import classify, classify_row, status_transitions
+from etl.vintage_store import VintageStore
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# History column -> FRED series id, from the series registry
+FRED_SERIES = registry.fred_series()
+
+# Every fetch task, in registry order; Pipeline.fetch(names=...) can pull a subset
+SOURCES = tuple(registry.fetch_tasks())
+
+# Columns of the dashboard snapshot row besides date, derived metrics and status
+ROW_COLUMNS = ("on_rrp", "reserves", "move", "srf", "bill_share", "tail_bp")
+
+# Observed columns recorded with the day they were fetched; MOVE is left out
+# because a scrape is a quote of the moment, not a dated observation
+VINTAGE_METRICS = tuple(FRED_SERIES) + ("srf", "bill_share", "tail_bp")
+
+# Published window: the last 10 years, counted in calendar days
+WINDOW_DAYS = 3650
+
+STAGES = ("fetch", "derive", "publish")
+
+
+def read_since(state_path: str):
+    """Earliest date changed since the last derive, or None"""
+    try:
+        with open(state_path, "r") as f:
+            since = json.load(f).get("since")
+    except (OSError, ValueError):
+        return None
+    return None if since is None else pd.Timestamp(since)
+
+
+def write_since(state_path: str, since):
+    tmp = f"{state_path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"since": None if since is None else str(pd.Timestamp(since).date())}, f)
+    os.replace(tmp, state_path)
+
+
+def mark_changed(state_path: str, since):
+    """Record that history from `since` on changed; an earlier pending date is kept. Returns the date kept"""
+    pending = read_since(state_path)
+    since = pd.Timestamp(since).normalize()
+    since = since if pending is None else min(since, pending)
+    write_since(state_path, since)
+    return since
+
+
+class Pipeline:
+    """One ETL run over the data/ and web/public/ trees under `base`"""
+
+    def __init__(self, base: str = BASE, api_key: str = None, fred_mode: str = None,
+                 http_cache: bool = None, metrics_path: str = None, planned: bool = None,
+                 session=None, window_days: int = WINDOW_DAYS):
+        self.base = base
+        self.data = os.path.join(base, "data")
+        self.pub = os.path.join(base, "web", "public")
+        self.series_dir = os.path.join(self.pub, "series")
+        for path in (self.data, self.pub, self.series_dir):
+            os.makedirs(path, exist_ok=True)
+
+        self.api_key = os.getenv("FRED_API_KEY", "") if api_key is None else api_key
+        # "incremental" requests every observation since the last stored date,
+        # "latest" keeps the old behaviour of storing the newest observation only
+        self.fred_mode = fred_mode or os.getenv("FRED_INGEST_MODE", "incremental")
+        # On-disk response cache shared by every source (set HTTP_CACHE=off to bypass)
+        self.http_cache = os.getenv("HTTP_CACHE", "on") != "off" if http_cache is None else http_cache
+        # Fetch only sources with a release due since their last fetch (FETCH_PLAN=off fetches all)
+        self.planned = os.getenv("FETCH_PLAN", "on") != "off" if planned is None else planned
+        # Calendar days of history aligned to daily and published
+        self.window_days = window_days
+
+        self.history = HistoryStore(os.path.join(self.data, "history"),
+                                    legacy_path=os.path.join(self.data, "history.parquet"))
+        self.derived_store = HistoryStore(os.path.join(self.data, "derived"))
+        self.auctions = AuctionStore(os.path.join(self.data, "auctions"))
+        self.srf = SrfStore(os.path.join(self.data, "srf"))
+        self.archive = SeriesArchive(os.path.join(self.series_dir, "archive"))
+        self.vintages = VintageStore(os.path.join(self.data, "vintages"))
+        self.state_path = os.path.join(self.data, "pipeline_state.json")
+        self.plan_path = os.path.join(self.data, "fetch_plan.json")
+        self.manifest_path = os.path.join(self.data, "publish_manifest.json")
+        self.metrics_path = metrics_path or os.path.join(self.data, "metrics", "runs.jsonl")
+
+        # A given session (etl/benchmark.py passes a stub) replaces the pooled one
+        self._session = session
+        self._cache = None
+        self.hist = None
+        self._hist_version = None
+        self._published_inputs = None
+        self.start_run()
+
+    def start_run(self):
+        """
+        Reset per-run state. The session, the response cache and the in-memory
+        history are kept, so a long-lived Pipeline runs warm from the second run on.
+        """
+        # Per-stage timings, per-source fetch stats and row counts for this run,
+        # appended to data/metrics/runs.jsonl (query with etl/run_metrics.py)
+        self.metrics = RunMetrics(self.metrics_path)
+        if self._cache is not None:
+            self._cache.requests.clear()
+        self.row = None
+        self.since = None
+        self.daily = None
+        self.derived = None
+        self.aligned = None
+        self.window_start = None
+        self.transitions = None
+
+    # ---------- shared resources ----------
+
+    @property
+    def session(self):
+        """One pooled session shared by every source"""
+        if self._session is None:
+            from etl.concurrent_fetch import make_session
+            self._session = make_session()
+        return self._session
+
+    @property
+    def cache(self):
+        if self._cache is None:
+            from etl.http_cache import ResponseCache
+            self._cache = ResponseCache(os.path.join(self.data, "http_cache"), enabled=self.http_cache)
+        return self._cache
+
+    def load_history(self) -> pd.DataFrame:
+        """
+        The stored history (None when there is none yet). It is read once and
+        kept in memory; it is only read again when another writer changed the store.
+        """
+        if not self.history.exists():
+            return self.hist
+        version = self.history.version()
+        if self.hist is None or version != self._hist_version:
+            hist = self.history.read()
+            self.hist = None if hist.empty else hist
+            self._hist_version = version
+            self.metrics.rows(rows_read=len(hist))
+        return self.hist
+
+    def _write_checked(self, checked: dict):
+        checked = {**registry.read_checked(self.plan_path), **checked}
+        tmp = f"{self.plan_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({name: at.isoformat(timespec="seconds") for name, at in checked.items()}, f, indent=2)
+        os.replace(tmp, self.plan_path)
+
+    def plan(self, now=None) -> dict:
+        """Fetch task -> (due, reason) from the release calendar of each source"""
+        hist = self.load_history()
+        latest = {} if hist is None else {
+            column: hist[column].last_valid_index().date() for column in hist.columns if hist[column].notna().any()
+        }
+        return registry.plan(now, registry.read_checked(self.plan_path), latest)
+
+    def due_sources(self, names=None, now=None) -> tuple:
+        """The sources in `names` (default all) that have a release due; reports the others"""
+        decisions = self.plan(now)
+        due = []
+        for name in SOURCES if names is None else names:
+            fetch, reason = decisions.get(name, (True, "not in the registry"))
+            if fetch:
+                due.append(name)
+            else:
+                print(f"Skipping {name}: {reason}")
+        return tuple(due)
+
+    # ---------- stages ----------
+
+    def fetch(self, names=None):
+        """
+        Pull the sources in `names` (default all of SOURCES), merge new values
+        into the history store and return today's row. Sources not pulled keep
+        their latest stored value. Returns None when all FRED calls failed and
+        the fallback generator wrote the outputs instead.
+        """
+        from etl import sources
+        from etl.concurrent_fetch import fetch_all
+        from etl.fred_ingest import (REVISION_WINDOW_DAYS, last_stored_dates, merge_observations,
+                                      observation_start)
+
+        print(f"Starting ETL process with FRED API key: {'Available' if self.api_key else 'MISSING'}")
+        print(f"FRED ingest mode: {self.fred_mode}")
+
+        self.metrics.lap("history_load")
+        hist = self.load_history()
+        incremental = self.fred_mode == "incremental"
+        session, cache, key = self.session, self.cache, self.api_key
+
+        last_date = hist.index.max() if hist is not None else None
+        if incremental:
+            last_dates = last_stored_dates(hist, FRED_SERIES)
+            fred_tasks = {
+                column: (lambda s=series, d=last_dates[column]:
+                         sources.fred_since(session, cache, key, s, observation_start(d, REVISION_WINDOW_DAYS)))
+                for column, series in FRED_SERIES.items()
+            }
+        else:
+            verbose = os.environ.get("CI") == "true"
+            fred_tasks = {column: (lambda s=series: sources.fred(session, cache, key, s, verbose=verbose))
+                          for column, series in FRED_SERIES.items()}
+
+        tasks = {
+            **fred_tasks,
+            "move":     lambda: sources.get_move(session, cache),
+            "srf":      lambda: sources.get_srf(session, cache, self.srf),
+            "bills":    lambda: sources.get_auctions(session, cache, self.auctions, since=last_date),
+        }
+        due = SOURCES if names is None else tuple(names)
+        tasks = {name: task for name, task in tasks.items() if name in due}
+
+        # All sources run concurrently; wall time is set by the slowest one
+        self.metrics.lap("fetch")
+        requests_before = len(cache.requests)
+        fetched, timings = fetch_all(tasks)
+        failed = {name for name, value in fetched.items() if value is None}
+        self.metrics.sources_from(timings, cache.requests[requests_before:],
+                                  errors={name: "fetch failed" for name in failed})
+        # Only a successful fetch counts as checked; failed sources stay due
+        checked_at = datetime.now(timezone.utc)
+        self._write_checked({name: checked_at for name in fetched if name not in failed})
+
+        new_observations = {}
+        if incremental:
+            # Keep the observation series for the bulk merge and report the newest value
+            for column in FRED_SERIES:
+                if column not in fetched:
+                    continue
+                observations = fetched[column]
+                new_observations[column] = observations
+                # Failed or nothing new: the stored value stands
+                fetched[column] = observations.iloc[-1] if observations is not None and len(observations) else None
+
+        # Daily SRF totals (through the last operation day) and auction statistics
+        # are merged like observations; today's row takes the newest value
+        totals = fetched.get("srf")
+        if totals is not None:
+            new_observations["srf"] = totals
+            fetched["srf"] = totals.iloc[-1]
+
+        stats = fetched.get("bills")
+        if stats is not None:
+            for column in ("bill_share", "tail_bp"):
+                new_observations[column] = stats[column].dropna()
+            latest = stats.iloc[-1]
+            fetched["bills"] = None if latest.isna().any() else (latest["bill_share"], latest["tail_bp"])
+
+        # Record every observation with today as the day it became known; only
+        # new or revised values go on to the history merge, so re-requested
+        # observations that did not change are not appended again
+        self.metrics.lap("vintages")
+        recorded = self.vintages.record({c: v for c, v in new_observations.items() if c in VINTAGE_METRICS})
+        new_observations = {c: recorded.get(c) if c in VINTAGE_METRICS else v for c, v in new_observations.items()}
+
+        # Sources not due this time (or that failed) keep their latest stored value
+        fetched = {**stored_values(hist), **{name: value for name, value in fetched.items() if value is not None}}
+
+        row = {
+            "date": date.today().isoformat(),
+            "on_rrp":   fetched.get("on_rrp") or 0,
+            "reserves": fetched.get("reserves") or 0,
+            "move":     fetched["move"] if fetched.get("move") is not None else 120,
+            "srf":      float(fetched.get("srf", 0.0)),
+        }
+        row["bill_share"], row["tail_bp"] = fetched.get("bills") or (0.5, 2)
+
+        # Check if all our API calls failed and need to use fallback data
+        fred_run = [column for column in FRED_SERIES if column in tasks]
+        if fred_run and all(column in failed for column in fred_run):
+            print("WARNING: All FRED API calls failed. Attempting to use fallback data.")
+            try:
+                from etl.fallback_data import generate_fallback_data
+                if generate_fallback_data():
+                    print("Fallback data generation succeeded.")
+                    self.hist = None
+                    self._hist_version = None
+                    return None
+                print("Fallback data generation failed. Continuing with zeros.")
+            except Exception as e:
+                print(f"Error importing fallback data module: {e}")
+                print("Continuing with zeros.")
+
+        # Round billions to one decimal for smoother sparklines
+        row["on_rrp"] = round(row["on_rrp"], 0)
+        row["reserves"] = round(row["reserves"], 0)
+
+        # ---------- history ----------
+        self.metrics.lap("merge")
+        if hist is not None:
+            print(f"Loaded existing history from {self.history.root} ({len(hist)} rows)")
+        else:
+            print(f"No history found in {self.history.root}, creating a new DataFrame")
+            hist = pd.DataFrame(index=pd.DatetimeIndex([], name="date"))
+
+        # Values fetched today without an observation date of their own (MOVE,
+        # FRED in "latest" mode) are observations dated today. Everything else
+        # was merged at its own date, so nothing is carried forward on disk.
+        # A value already stored for today (a daemon tick repeating the last
+        # one) is not journaled again.
+        today = pd.Timestamp(row["date"])
+        undated = ("move",) + (() if incremental else tuple(FRED_SERIES))
+        new_observations.update({
+            column: pd.Series([row[column]], index=pd.DatetimeIndex([today], name="date"))
+            for column in undated
+            if column in tasks and column not in failed and not _stored_on(hist, column, today, row[column])
+        })
+
+        # Bulk-merge every new observation at its own date; new values win column by column
+        observed = {c: v for c, v in new_observations.items() if v is not None and len(v)}
+        if observed:
+            hist = merge_observations(hist, observed)
+            merged = sum(len(v) for v in observed.values())
+            self.metrics.rows(observations_fetched=merged)
+            print(f"Merged {merged} new observations")
+
+        # Persist only what is new this run
+        self.metrics.lap("history_append")
+        appended = self.history.append(pd.DataFrame(observed)) if observed else 0
+        self._hist_version = self.history.version()
+        self.metrics.rows(rows_written=appended)
+        print(f"History saved to {self.history.root}")
+
+        # Earliest date whose inputs changed (or an earlier one still pending); derive recomputes from there
+        self.since = mark_changed(self.state_path, min([today] + [v.index.min() for v in observed.values()]))
+
+        self.hist, self.row = hist, row
+        return row
+
+    def derive(self, since=None) -> dict:
+        """Resample to daily, bring derived metrics up to date and classify status"""
+        self.metrics.lap("align")
+        hist = self.load_history()
+        if hist is None:
+            raise RuntimeError(f"No history in {self.history.root}; run the fetch stage first")
+
+        # History is stored at each series' native frequency; the daily frame is
+        # an as-of view over the window, so weekly reserves and business-day
+        # ON-RRP carry their latest observation without being stored daily
+        aligned = AsOfHistory.from_frame(hist)
+        start = max(aligned.start, aligned.end - pd.Timedelta(days=self.window_days - 1))
+        daily = aligned.daily(start=start)
+        self.metrics.rows(rows_published=len(daily))
+        print(f"History aligned to daily frequency from {start.date()} ({len(hist)} stored rows)")
+
+        # Derived columns are persisted over the whole history; only the trailing
+        # window touched by the last fetch is recomputed
+        self.metrics.lap("derived")
+        since = since or self.since or read_since(self.state_path)
+        derived = update_derived(daily, self.derived_store, since=since)
+        row = dict(self.row) if self.row is not None else latest_row(daily)
+        latest = derived.iloc[-1]
+        for name in DERIVED:
+            row[name] = None if pd.isna(latest[name]) else float(latest[name])
+
+        # Thresholds come from web/data/thresholds.json; the whole history is
+        # classified in one pass so colour changes can be published as well
+        self.metrics.lap("status")
+        row["status"] = classify_row(row)
+        self.transitions = status_transitions(classify(daily))
+
+        self.daily, self.derived, self.row = daily, derived, row
+        self.aligned, self.window_start = aligned, start
+        self.since = None
+        write_since(self.state_path, None)
+        return row
+
+    def publish(self):
+        """Write every dashboard artifact that changed; derives first when needed"""
+        from etl.publish import publish
+
+        if self.daily is None:
+            self.derive()
+        # A long-lived pipeline skips publishing when nothing it publishes changed
+        self.metrics.lap("publish")
+        inputs = self._inputs_digest()
+        if inputs == self._published_inputs:
+            print("Published inputs unchanged since the last publish; nothing to write")
+            self.metrics.rows(files_written=0, bytes_published=0)
+            return None
+
+        # Each artifact is serialized once and only rewritten when its content changed
+        writer = publish(self.daily, self.row, self.pub, self.series_dir, self.manifest_path,
+                         derived=self.derived, transitions=self.transitions,
+                         native=self.aligned, start=self.window_start)
+        self._published_inputs = inputs
+        self.metrics.rows(files_written=len(writer.written), bytes_published=writer.bytes_written)
+
+        # Snapshot the series that changed; unchanged ones keep their last snapshot
+        changed = [path for path in writer.written
+                   if os.path.dirname(path) == self.series_dir and path.endswith(".json") and not path.endswith(".col.json")]
+        if changed:
+            archived = self.archive.add_files(changed)
+            print(f"Archived {len(archived)} series snapshot(s), "
+                  f"{sum(result['bytes'] for result in archived.values())} bytes")
+        return writer
+
+    def _inputs_digest(self) -> str:
+        digest = hashlib.sha256()
+        for frame in (self.daily, self.derived):
+            digest.update(frame.index.asi8.tobytes())
+            digest.update(",".join(frame.columns).encode())
+            digest.update(frame.to_numpy(dtype="float64").tobytes())
+        digest.update(json.dumps([self.row, self.transitions], sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def run(self, stages=STAGES, names=None):
+        """
+        Run `stages` in order and record the run's metrics. `names` limits the
+        fetch; by default it is every source with a release due.
+        """
+        try:
+            if names is None and self.planned and "fetch" in stages:
+                names = self.due_sources()
+            for stage in stages:
+                if stage != "fetch":
+                    getattr(self, stage)()
+                elif self.fetch(names) is None:
+                    self.metrics.save(status="fallback")
+                    return None
+        except Exception as e:
+            print(f"Error in ETL process: {e}")
+            self.metrics.save(status="error")
+            raise
+        self.metrics.save()
+        print("ETL process completed successfully")
+        return self.row
+
+
+def stored_values(hist: pd.DataFrame) -> dict:
+    """Latest stored value of each source, shaped like the fetch results"""
+    if hist is None:
+        return {}
+    latest = hist.ffill().iloc[-1]
+    values = {column: latest[column] for column in ("on_rrp", "reserves", "move", "srf")
+              if column in latest and pd.notna(latest[column])}
+    if pd.notna(latest.get("bill_share")) and pd.notna(latest.get("tail_bp")):
+        values["bills"] = (latest["bill_share"], latest["tail_bp"])
+    return values
+
+
+def _stored_on(hist: pd.DataFrame, column: str, day: pd.Timestamp, value) -> bool:
+    """True when `hist` already holds `value` for `column` on `day`"""
+    if column not in hist.columns or day not in hist.index:
+        return False
+    stored = hist.at[day, column]
+    return pd.notna(stored) and float(stored) == float(value)
+
+
+def latest_row(daily: pd.DataFrame) -> dict:
+    """The dashboard snapshot row rebuilt from the newest day of the history"""
+    last = daily.iloc[-1]
+    row = {"date": daily.index[-1].date().isoformat()}
+    for column in ROW_COLUMNS:
+        value = last.get(column)
+        row[column] = None if value is None or pd.isna(value) else float(value)
+    return row
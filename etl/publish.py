@@ -0,0 +1,253 @@
+"""
+Output stage for the Liquidity Dashboard ETL.
+Builds every published JSON artifact (dashboard, sparks, auctions, per-metric
+series, funding, status transitions) straight from the history frame. Base
+series are published at their native frequency when the pipeline passes its
+as-of history (etl/asof.py); derived series and sparks stay daily.
+Each artifact is serialized exactly once. It is only written when its content
+hash changed, and writes go through a temp file and an atomic rename.
+
+Next to every series/<name>.json a columnar encoding, series/<name>.col.json,
+is written with precompressed .gz and .br siblings. The decimated
+level-of-detail pyramid of each series goes to series/lod/<name>/.
+"""
+import gzip
+import hashlib
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from etl import registry
+from etl.derived import DECIMALS
+from etl.downsample import build_pyramid
+
+try:
+    import brotli
+except ImportError:  # optional: .br siblings are skipped without it
+    brotli = None
+
+# Timestamp format the web tier already parses (matches pandas to_json iso output)
+ISO_FORMAT = "%Y-%m-%dT%H:%M:%S.000"
+
+# Metrics published as series of their own; the auction metrics (one "bills"
+# task in the registry) are published with the funding composite instead
+SERIES_METRICS = [name for name, entry in registry.series().items() if "task" not in entry]
+
+
+def _default(obj):
+    if isinstance(obj, pd.Timestamp):
+        return obj.strftime('%Y-%m-%d')
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _column_values(values) -> list:
+    """Plain Python values with NaN/inf mapped to None"""
+    out = values.tolist() if hasattr(values, "tolist") else list(values)
+    return [None if isinstance(v, float) and not math.isfinite(v) else v for v in out]
+
+
+def _iso_dates(index: pd.DatetimeIndex) -> list:
+    """ISO_FORMAT strings for a date index (fast path for midnight timestamps)"""
+    values = index.values
+    days = values.astype("datetime64[D]")
+    if np.all(days == values):
+        return [d + "T00:00:00.000" for d in np.datetime_as_string(days).tolist()]
+    return index.strftime(ISO_FORMAT).tolist()
+
+
+def frame_records(frame: pd.DataFrame) -> list:
+    """Date-indexed frame -> [{"date": ..., col: ...}, ...] without a to_json round trip"""
+    dates = _iso_dates(frame.index)
+    columns = {col: _column_values(frame[col].to_numpy()) for col in frame.columns}
+    names = list(columns)
+    return [
+        dict(zip(["date"] + names, values))
+        for values in zip(dates, *(columns[n] for n in names))
+    ]
+
+
+def series_records(values: pd.Series) -> list:
+    """Date-indexed series -> [{"date": ..., "value": ...}, ...]"""
+    dates = _iso_dates(values.index)
+    return [{"date": d, "value": v} for d, v in zip(dates, _column_values(values.to_numpy()))]
+
+
+def columnar(values: pd.Series) -> dict:
+    """
+    Columnar encoding of a date-indexed series:
+      {"start": "YYYY-MM-DD", "step": 1, "dtype": "int32", "values": [...]}
+    Dates are a start day plus a constant step in days, or per-point day
+    deltas ("deltas": [...]) when spacing is irregular. `dtype` tells the
+    client which typed array holds the values (nulls are missing points).
+    """
+    days = values.index.values.astype("datetime64[D]").astype("int64")
+    raw = values.to_numpy(dtype="float64")
+    finite = raw[np.isfinite(raw)]
+    integral = finite.size == 0 or (
+        np.all(finite == np.round(finite)) and np.all(np.abs(finite) < 2**31)
+    )
+    encoded = {
+        "start": str(values.index[0].date()) if len(values) else None,
+        "n": int(len(values)),
+        "dtype": "int32" if integral else "float64",
+    }
+    steps = np.diff(days)
+    if steps.size and np.all(steps == steps[0]):
+        encoded["step"] = int(steps[0])
+    elif steps.size:
+        encoded["deltas"] = steps.tolist()
+    else:
+        encoded["step"] = 1
+    if integral:
+        encoded["values"] = [None if not math.isfinite(v) else int(v) for v in raw.tolist()]
+    else:
+        # DECIMALS (6) is well past the precision of any source; keeps the payload short
+        encoded["values"] = _column_values(np.round(raw, DECIMALS))
+    return encoded
+
+
+def compressed_variants(data: bytes) -> dict:
+    """Precompressed siblings keyed by file suffix (gzip is mtime-free so output is stable)"""
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    return variants
+
+
+def encode(payload, indent: int = None) -> bytes:
+    separators = None if indent else (",", ":")
+    return json.dumps(payload, indent=indent, separators=separators, default=_default).encode()
+
+
+class OutputWriter:
+    """Atomic, change-aware file writer that remembers what it last wrote"""
+
+    def __init__(self, manifest_path: str):
+        self.manifest_path = manifest_path
+        try:
+            with open(manifest_path, "r") as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError):
+            self.manifest = {}
+        self.written = []
+        self.skipped = []
+        self.bytes_written = 0
+
+    def _unchanged(self, path: str, digest: str) -> bool:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        entry = self.manifest.get(path)
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            return entry["sha256"] == digest
+        # file touched by something else since our last write: hash what is there
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest() == digest
+
+    def write(self, path: str, data: bytes) -> bool:
+        """Write `data` to `path` unless identical content is already there"""
+        digest = hashlib.sha256(data).hexdigest()
+        if self._unchanged(path, digest):
+            self.skipped.append(path)
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        st = os.stat(path)
+        self.manifest[path] = {"sha256": digest, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        self.written.append(path)
+        self.bytes_written += len(data)
+        return True
+
+    def write_json(self, path: str, payload, indent: int = None, compress: bool = False) -> bool:
+        data = encode(payload, indent=indent)
+        changed = self.write(path, data)
+        suffixes = [".gz"] + ([".br"] if brotli is not None else [])
+        if compress and (changed or not all(os.path.exists(path + s) for s in suffixes)):
+            for suffix, variant in compressed_variants(data).items():
+                self.write(path + suffix, variant)
+        return changed
+
+    def close(self):
+        tmp = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(tmp, self.manifest_path)
+        print(f"Published {len(self.written)} file(s), {self.bytes_written} bytes written; "
+              f"{len(self.skipped)} unchanged file(s) skipped")
+        for path in self.written:
+            print(f"  wrote {path}")
+
+
+def build_artifacts(hist: pd.DataFrame, row: dict, pub_dir: str, series_dir: str,
+                    derived: pd.DataFrame = None, transitions: dict = None,
+                    native=None, start=None) -> dict:
+    """
+    Every published artifact as path -> (payload, indent, compress).
+    `hist` is the daily frame. With `native` (an etl.asof.AsOfHistory) the
+    base series and the auction panel are published at their native
+    frequency from `start` on, instead of forward-filled to daily. Chart
+    series open with the last observation before `start`, so a series whose
+    window holds few observations still starts at its value in force.
+    """
+    if native is not None:
+        start = hist.index[0] if start is None else start
+        auctions = native.observed(["bill_share", "tail_bp"], start=hist.index[-1] - pd.Timedelta(days=364))
+        funding = native.observed(["bill_share", "tail_bp"], start=start, seed=True)
+        series = {metric: native.native(metric, start, seed=True) for metric in SERIES_METRICS if metric in native.columns}
+    else:
+        auctions = hist[["bill_share", "tail_bp"]].tail(365)
+        funding = hist[["bill_share", "tail_bp"]]
+        series = {metric: hist[metric] for metric in SERIES_METRICS if metric in hist.columns}
+
+    artifacts = {
+        # snapshot json
+        os.path.join(pub_dir, "dashboard.json"): (row, 2, False),
+        # spark json (30 pts)
+        os.path.join(pub_dir, "sparks.json"): (frame_records(hist.tail(30)), None, False),
+        # auction panel json (12 m)
+        os.path.join(pub_dir, "auctions.json"): (frame_records(auctions), None, False),
+    }
+
+    # Composite funding 'value' normalized to show bill share and tails together
+    series["funding"] = (funding["bill_share"] * 100) + (funding["tail_bp"] / 10)
+    series["bill_share"] = funding["bill_share"]
+    series["tail_bp"] = funding["tail_bp"]
+    if derived is not None:
+        series.update({name: derived[name] for name in derived.columns})
+
+    for name, values in series.items():
+        artifacts[os.path.join(series_dir, f"{name}.json")] = (series_records(values), None, False)
+        artifacts[os.path.join(series_dir, f"{name}.col.json")] = (columnar(values), None, True)
+
+        # Level-of-detail pyramid: coarse levels first, full series as the last resort
+        pyramid, index = build_pyramid(values)
+        lod_dir = os.path.join(series_dir, "lod", name)
+        for level in index["levels"]:
+            level["file"] = f"{level['points']}.col.json"
+            artifacts[os.path.join(lod_dir, level["file"])] = (columnar(pyramid[level["points"]]), None, True)
+        index["full"] = f"../../{name}.col.json"
+        artifacts[os.path.join(lod_dir, "index.json")] = (index, None, False)
+
+    if transitions is not None:
+        artifacts[os.path.join(pub_dir, "status-transitions.json")] = (transitions, None, False)
+    return artifacts
+
+
+def publish(hist: pd.DataFrame, row: dict, pub_dir: str, series_dir: str, manifest_path: str,
+            derived: pd.DataFrame = None, transitions: dict = None, native=None, start=None) -> OutputWriter:
+    """Serialize and write every artifact that changed since the last run"""
+    writer = OutputWriter(manifest_path)
+    artifacts = build_artifacts(hist, row, pub_dir, series_dir, derived, transitions, native, start)
+    for path, (payload, indent, compress) in artifacts.items():
+        writer.write_json(path, payload, indent=indent, compress=compress)
+    writer.close()
+    return writer
@@ -0,0 +1,189 @@
+"""
+Series registry and release-aware fetch planning for the Liquidity Dashboard.
+
+web/data/series.json lists every dashboard series once, for the ETL and the
+Next.js app alike (web/lib/series.ts): its source (and FRED series id), units,
+native frequency and the calendar its source publishes on. The pipeline takes
+its FRED series, fetch tasks and published series from it, so adding a FRED
+series is one entry there.
+
+Release times are US Eastern: ON-RRP results every business day early in the
+afternoon, the H.4.1 reserves on Thursday afternoon for the Wednesday before,
+SRF totals after the afternoon operation. A source is due when a release has
+come out since it was last fetched, or when an observation that should be
+out by now (`lag_days` before the release) is still missing from the history.
+Sources quoted through the day (MOVE) are due on every poll while their
+session is open. Holidays are not modelled; on one the source is simply
+checked and comes back with nothing new.
+
+    plan(now, checked, latest)      # fetch task -> (due, reason)
+    stored_plan(now)                # the same, from data/ as it is on disk
+
+    python -m etl plan              # what the next run would fetch, and why
+    python -m etl plan --at 2025-06-12T18:00-04:00
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REGISTRY_PATH = os.path.join(BASE, "web", "data", "series.json")
+DATA_DIR = os.path.join(BASE, "data")
+
+# Day names a release's "days" may list, comma separated ("thu", "mon,thu")
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+# Used when the tz database is missing (Windows without the tzdata package)
+EASTERN_STANDARD = timezone(timedelta(hours=-5), "EST")
+
+
+@lru_cache(maxsize=None)
+def load_registry(path: str = REGISTRY_PATH) -> dict:
+    """Registry file: {"timezone": ..., "series": {metric: entry}}"""
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def series(path: str = REGISTRY_PATH) -> dict:
+    """Metric -> registry entry, in registry order"""
+    return load_registry(path)["series"]
+
+
+def fred_series(path: str = REGISTRY_PATH) -> dict:
+    """History column -> FRED series id"""
+    return {name: entry["id"] for name, entry in series(path).items() if entry["source"] == "fred"}
+
+
+def fetch_tasks(path: str = REGISTRY_PATH) -> dict:
+    """Fetch task -> the metrics it fills; metrics without a "task" are their own task"""
+    tasks = {}
+    for name, entry in series(path).items():
+        tasks.setdefault(entry.get("task", name), []).append(name)
+    return tasks
+
+
+def release_zone(path: str = REGISTRY_PATH):
+    try:
+        return ZoneInfo(load_registry(path).get("timezone", "America/New_York"))
+    except ZoneInfoNotFoundError:
+        return EASTERN_STANDARD
+
+
+def _release_days(release: dict) -> set:
+    days = release.get("days", "business")
+    if days == "business":
+        return {0, 1, 2, 3, 4}
+    if days == "daily":
+        return set(range(7))
+    return {WEEKDAYS.index(day.strip()) for day in days.split(",")}
+
+
+def _at(day: date, clock: str, tz) -> datetime:
+    hour, minute = (int(part) for part in clock.split(":"))
+    return datetime.combine(day, time(hour, minute), tzinfo=tz)
+
+
+def last_release(release: dict, now: datetime, tz) -> datetime:
+    """The latest release at or before `now`"""
+    local, days = now.astimezone(tz), _release_days(release)
+    for back in range(8):
+        day = local.date() - timedelta(days=back)
+        if day.weekday() in days and _at(day, release["time"], tz) <= local:
+            return _at(day, release["time"], tz)
+    raise ValueError(f"Release without release days: {release}")
+
+
+def next_release(release: dict, now: datetime, tz) -> datetime:
+    """The first release after `now`"""
+    local, days = now.astimezone(tz), _release_days(release)
+    for ahead in range(8):
+        day = local.date() + timedelta(days=ahead)
+        if day.weekday() in days and _at(day, release["time"], tz) > local:
+            return _at(day, release["time"], tz)
+    raise ValueError(f"Release without release days: {release}")
+
+
+def _in_session(release: dict, now: datetime, tz) -> bool:
+    local = now.astimezone(tz)
+    return ("open" in release and local.weekday() in _release_days(release)
+            and _at(local.date(), release["open"], tz) <= local < _at(local.date(), release["time"], tz))
+
+
+def decide(release: dict, now: datetime, tz, checked: datetime = None, latest=()) -> tuple:
+    """(due, reason) for one source; `latest` holds the newest stored date of each of its metrics"""
+    last = last_release(release, now, tz)
+    if checked is None:
+        return True, "never fetched"
+    if _in_session(release, now, tz):
+        return True, "quoted during the session"
+    if checked < last:
+        return True, f"released {last:%a %Y-%m-%d %H:%M %Z}"
+    if "lag_days" in release:
+        expected = last.date() - timedelta(days=release["lag_days"])
+        if any(day is None or day < expected for day in latest):
+            return True, f"{expected} observation not in the history yet"
+    return False, f"next release {next_release(release, now, tz):%a %Y-%m-%d %H:%M %Z}"
+
+
+def plan(now: datetime = None, checked: dict = None, latest: dict = None, path: str = REGISTRY_PATH) -> dict:
+    """
+    Fetch task -> (due, reason) at `now` (default the current time).
+    `checked` maps tasks to the time of their last successful fetch, `latest`
+    maps metrics to the date of their newest stored observation.
+    """
+    tz = release_zone(path)
+    now = datetime.now(timezone.utc) if now is None else now
+    checked, latest = checked or {}, latest or {}
+    registry = series(path)
+    return {
+        task: decide(registry[metrics[0]]["release"], now, tz, checked.get(task),
+                     [latest.get(metric) for metric in metrics])
+        for task, metrics in fetch_tasks(path).items()
+    }
+
+
+def read_checked(path: str) -> dict:
+    """Fetch task -> time of its last successful fetch, from data/fetch_plan.json"""
+    try:
+        with open(path, "r") as f:
+            return {name: datetime.fromisoformat(at) for name, at in json.load(f).items()}
+    except (OSError, ValueError):
+        return {}
+
+
+def stored_plan(now: datetime = None, data_dir: str = DATA_DIR, path: str = REGISTRY_PATH) -> dict:
+    """
+    plan() from the fetch times in data/fetch_plan.json and the newest dates
+    in the history store. Only reads: nothing is created or migrated.
+    """
+    from etl.history_store import HistoryStore
+
+    store = HistoryStore(os.path.join(data_dir, "history"), legacy_path=os.path.join(data_dir, "history.parquet"),
+                         create=False)
+    return plan(now, read_checked(os.path.join(data_dir, "fetch_plan.json")), store.latest_dates(), path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m etl plan",
+                                     description="Which sources the next fetch would pull, from the series registry")
+    parser.add_argument("--at", default=None, help="plan at this time (ISO 8601, default now)")
+    args = parser.parse_args(argv)
+
+    now = datetime.fromisoformat(args.at) if args.at else datetime.now(timezone.utc)
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=release_zone())
+    registry = series()
+    for task, (due, reason) in stored_plan(now).items():
+        metrics = fetch_tasks()[task]
+        entry = registry[metrics[0]]
+        source = entry["source"] + (f" {entry['id']}" if "id" in entry else "")
+        print(f"{task:<10} {'fetch' if due else 'skip':<6} {source:<15} {entry['frequency']:<8} {reason}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
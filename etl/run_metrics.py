@@ -0,0 +1,225 @@
+"""
+Structured per-run metrics for the Liquidity Dashboard ETL.
+
+Each run records, in one JSON line appended to data/metrics/runs.jsonl:
+  - per-source fetch latency, HTTP status, bytes received and cache use
+  - per-stage wall time and the process's peak resident memory so far
+  - rows read and written
+
+Peak RSS comes from resource.getrusage and costs nothing to read (it is
+not available on Windows). Set TRACE_MEMORY=on to also record each stage's
+peak traced allocation with tracemalloc. Tracing slows the traced stages
+down, so it is off by default and the timings of a traced run are not
+comparable with untraced ones.
+
+The same file doubles as a small query CLI for trends across runs:
+    python etl/run_metrics.py sources            # latency / bytes per source
+    python etl/run_metrics.py stages --last 90   # wall time / memory per stage
+    python etl/run_metrics.py rows
+    python etl/run_metrics.py runs --last 10     # one line per run
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+METRICS_PATH = os.path.join(BASE, "data", "metrics", "runs.jsonl")
+
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS
+RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far, in MB (None where unavailable)"""
+    if resource is None:
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * RSS_UNIT / 1e6, 2)
+
+
+class RunMetrics:
+    """Collects the metrics of one ETL run"""
+
+    def __init__(self, path: str = METRICS_PATH, trace_memory: bool = None):
+        self.path = path
+        self.trace_memory = os.getenv("TRACE_MEMORY", "off") == "on" if trace_memory is None else trace_memory
+        self.started = time.time()
+        self.record = {
+            "run": datetime.now().isoformat(timespec="seconds"),
+            "sources": {},
+            "stages": {},
+            "rows": {},
+        }
+        self._current = None
+        self._stage_start = None
+        # with trace_memory, traced from the first stage until save(), so idle
+        # time in a long-lived process is not slowed down by tracing
+        self._owns_tracing = False
+
+    # ---------- stages ----------
+
+    def lap(self, name: str):
+        """Close the current stage (if any) and start timing `name`"""
+        self.end_stage()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracing = True
+        self._current = name
+        self._stage_start = time.perf_counter()
+        if self._owns_tracing:
+            tracemalloc.reset_peak()
+
+    def end_stage(self):
+        if self._current is None:
+            return
+        stage = {"seconds": round(time.perf_counter() - self._stage_start, 4), "peak_rss_mb": peak_rss_mb()}
+        if self._owns_tracing:
+            stage["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+        self.record["stages"][self._current] = stage
+        self._current = None
+
+    @contextmanager
+    def stage(self, name: str):
+        self.lap(name)
+        try:
+            yield
+        finally:
+            self.end_stage()
+
+    # ---------- sources / rows ----------
+
+    def source(self, name: str, seconds: float, status=None, bytes_received: int = 0,
+               from_cache: bool = False, error: str = None):
+        self.record["sources"][name] = {
+            "seconds": round(seconds, 4),
+            "status": status,
+            "bytes": int(bytes_received),
+            "cached": bool(from_cache),
+            "error": error,
+        }
+
+    def sources_from(self, timings: dict, requests_log: list, errors: dict = None):
+        """Per-source entries from fetch_all timings and a ResponseCache request log"""
+        by_source = {}
+        for entry in requests_log:
+            by_source.setdefault(entry["task"], []).append(entry)
+        for name, seconds in timings.items():
+            entries = by_source.get(name, [])
+            self.source(
+                name,
+                seconds,
+                status=entries[-1]["status"] if entries else None,
+                bytes_received=sum(e["bytes"] for e in entries),
+                from_cache=bool(entries) and all(e["from_cache"] for e in entries),
+                error=(errors or {}).get(name),
+            )
+
+    def rows(self, **counts):
+        self.record["rows"].update({k: int(v) for k, v in counts.items()})
+
+    # ---------- persistence ----------
+
+    def save(self, status: str = "ok"):
+        self.end_stage()
+        self.record["status"] = status
+        self.record["seconds"] = round(time.time() - self.started, 3)
+        self.record["peak_rss_mb"] = peak_rss_mb()
+        if self._owns_tracing:
+            self.record["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+            tracemalloc.stop()
+            self._owns_tracing = False
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(json.dumps(self.record, separators=(",", ":")) + "\n")
+        print(f"Run metrics appended to {self.path}")
+
+
+def load_runs(path: str = METRICS_PATH, last: int = None) -> list:
+    runs = []
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    runs.append(json.loads(line))
+                except ValueError:
+                    continue
+    except OSError:
+        return []
+    return runs[-last:] if last else runs
+
+
+def _summary(values):
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return "-"
+    p95 = values[min(len(values) - 1, int(round(0.95 * (len(values) - 1))))]
+    return f"avg {sum(values) / len(values):9.3f}  p95 {p95:9.3f}  max {values[-1]:9.3f}  n={len(values)}"
+
+
+def _trend(values):
+    """Mean of the newer half relative to the older half, e.g. '+35%'"""
+    values = [v for v in values if v is not None]
+    if len(values) < 4:
+        return ""
+    half = len(values) // 2
+    old, new = sum(values[:half]) / half, sum(values[half:]) / (len(values) - half)
+    return f"  trend {((new / old) - 1) * 100:+.0f}%" if old else ""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query ETL run metrics")
+    parser.add_argument("view", choices=["runs", "sources", "stages", "rows"], nargs="?", default="runs")
+    parser.add_argument("--last", type=int, default=None, help="only the most recent N runs")
+    parser.add_argument("--path", default=METRICS_PATH)
+    args = parser.parse_args(argv)
+
+    runs = load_runs(args.path, args.last)
+    if not runs:
+        print(f"No run metrics in {args.path}")
+        return 1
+
+    if args.view == "runs":
+        for run in runs:
+            slowest = max(run["sources"].items(), key=lambda kv: kv[1]["seconds"], default=(None, {}))
+            peak = run.get("peak_rss_mb") or run.get("peak_mb") or 0
+            print(f"{run['run']}  {run.get('status', '?'):<8} {run.get('seconds', 0):7.2f}s  "
+                  f"peak {peak:7.1f} MB  slowest source {slowest[0]} "
+                  f"({slowest[1].get('seconds', 0):.2f}s)")
+        return 0
+
+    key = {"sources": "sources", "stages": "stages", "rows": "rows"}[args.view]
+    names = sorted({name for run in runs for name in run.get(key, {})})
+    print(f"{len(runs)} run(s) from {runs[0]['run']} to {runs[-1]['run']}")
+    for name in names:
+        entries = [run[key].get(name) for run in runs]
+        if args.view == "rows":
+            print(f"  {name:<20} {_summary(entries)}{_trend(entries)}")
+            continue
+        seconds = [e["seconds"] if e else None for e in entries]
+        print(f"  {name:<20} seconds {_summary(seconds)}{_trend(seconds)}")
+        if args.view == "sources":
+            received = [e["bytes"] if e else None for e in entries]
+            errors = sum(1 for e in entries if e and e.get("error"))
+            statuses = sorted({str(e["status"]) for e in entries if e})
+            print(f"  {'':<20} bytes   {_summary(received)}{_trend(received)}")
+            print(f"  {'':<20} status {', '.join(statuses)}; {errors} error(s)")
+        else:
+            rss = [e.get("peak_rss_mb") if e else None for e in entries]
+            traced = [e.get("peak_mb") if e else None for e in entries]
+            print(f"  {'':<20} RSS MB  {_summary(rss)}{_trend(rss)}")
+            if any(value is not None for value in traced):
+                print(f"  {'':<20} traced  {_summary(traced)}{_trend(traced)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,373 @@
+"""
+Local series query server for the Liquidity Dashboard.
+
+Every published series is loaded into memory once. Range queries are then
+answered from memory, so a chart fetches only the window it draws instead
+of a whole static file:
+
+    GET /series                                 metrics with their span and point count
+    GET /series/<metric>?start=&end=&points=    records in the range, LTTB-decimated to `points`
+        &format=col                             the columnar encoding instead of records
+        &method=minmax                          min/max buckets instead of LTTB
+    GET /kv/<key>                               the value web/lib/kv.ts would read from Redis
+                                                (dashboard, sparks, auctions, last_updated,
+                                                series:<metric>)
+
+Responses carry a content ETag and are gzipped when the client accepts it;
+If-None-Match answers 304. The server polls the publish manifest that
+every ETL publish rewrites, reloads only the files that changed, and then
+drops its cached responses.
+
+    python -m etl serve --port 8787
+    LOCAL_KV_URL=http://127.0.0.1:8787 npm run dev     # web tier reads KV from here
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from etl.downsample import METHODS
+from etl.publish import columnar, encode, series_records
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PUB_DIR = os.path.join(BASE, "web", "public")
+SERIES_DIR = os.path.join(PUB_DIR, "series")
+MANIFEST_PATH = os.path.join(BASE, "data", "publish_manifest.json")
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8787
+
+# Seconds between checks of the publish manifest
+POLL_SECONDS = 2.0
+# Seconds an idle keep-alive connection is held open
+IDLE_SECONDS = 30.0
+# Encoded responses kept per generation of loaded data
+RESPONSE_CACHE_SIZE = 512
+# Bodies smaller than this are sent uncompressed
+GZIP_MIN_BYTES = 512
+
+# kv.ts key -> published file holding the same value
+KV_FILES = {"dashboard": "dashboard.json", "sparks": "sparks.json", "auctions": "auctions.json"}
+
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def read_series(path: str) -> pd.Series:
+    """A published series file, columnar (.col.json) or records (.json), as a date-indexed Series"""
+    with open(path, "r") as f:
+        payload = json.load(f)
+    if isinstance(payload, dict):
+        start = np.datetime64(payload["start"], "D") if payload.get("start") else None
+        n = payload.get("n", len(payload["values"]))
+        if "deltas" in payload:
+            offsets = np.concatenate(([0], np.cumsum(payload["deltas"], dtype=np.int64)))
+        else:
+            offsets = np.arange(n, dtype=np.int64) * payload.get("step", 1)
+        days = start + offsets if start is not None else np.array([], dtype="datetime64[D]")
+        values = np.array([np.nan if v is None else v for v in payload["values"]], dtype=np.float64)
+    else:
+        days = np.array([row["date"][:10] for row in payload], dtype="datetime64[D]")
+        values = np.array([np.nan if row.get("value") is None else row["value"] for row in payload], dtype=np.float64)
+    return pd.Series(values, index=pd.DatetimeIndex(days.astype("datetime64[ns]"), name="date"), name="value")
+
+
+def series_files(series_dir: str) -> dict:
+    """metric -> file to load, preferring the columnar encoding"""
+    files = {}
+    for name in sorted(os.listdir(series_dir)):
+        path = os.path.join(series_dir, name)
+        if not os.path.isfile(path):
+            continue  # archive/, lod/
+        if name.endswith(".col.json"):
+            files[name[:-len(".col.json")]] = path
+        elif name.endswith(".json"):
+            files.setdefault(name[:-len(".json")], path)
+    return files
+
+
+def _stamp(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class SeriesCache:
+    """Published series and KV documents held in memory, reloaded file by file"""
+
+    def __init__(self, pub_dir: str = PUB_DIR, series_dir: str = SERIES_DIR, manifest_path: str = MANIFEST_PATH):
+        self.pub_dir = pub_dir
+        self.series_dir = series_dir
+        self.manifest_path = manifest_path
+        self.series = {}
+        self.documents = {}
+        self.generation = 0
+        self._stamps = {}
+        self._manifest_stamp = None
+        self._responses = OrderedDict()
+
+    def changed(self) -> bool:
+        """True when a publish rewrote the manifest since the last load"""
+        return _stamp(self.manifest_path) != self._manifest_stamp
+
+    def load(self) -> list:
+        """(Re)load every file that changed on disk; returns the names reloaded"""
+        self._manifest_stamp = _stamp(self.manifest_path)
+        wanted = {f"series:{metric}": path for metric, path in series_files(self.series_dir).items()}
+        wanted.update({key: os.path.join(self.pub_dir, name) for key, name in KV_FILES.items()})
+
+        series, documents, reloaded = dict(self.series), dict(self.documents), []
+        for key, path in wanted.items():
+            stamp = _stamp(path)
+            if stamp is None or self._stamps.get(path) == stamp:
+                continue
+            try:
+                if key.startswith("series:"):
+                    series[key[len("series:"):]] = read_series(path)
+                else:
+                    with open(path, "r") as f:
+                        documents[key] = json.load(f)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f"[serve] skipping {path}: {type(e).__name__}: {e}")
+                continue
+            self._stamps[path] = stamp
+            reloaded.append(key)
+
+        gone = {key for key in list(series) if f"series:{key}" not in wanted}
+        for key in gone:
+            del series[key]
+        if reloaded or gone:
+            # swap whole dicts so a request in flight sees one generation
+            self.series, self.documents = series, documents
+            self.generation += 1
+            self._responses.clear()
+        return reloaded
+
+    def last_updated(self):
+        dashboard = self.documents.get("dashboard") or {}
+        if dashboard.get("lastUpdated"):
+            return dashboard["lastUpdated"]
+        stamp = self._stamps.get(os.path.join(self.pub_dir, KV_FILES["dashboard"]))
+        return datetime.fromtimestamp(stamp[0] / 1e9, timezone.utc).isoformat() if stamp else None
+
+    # ---------- queries ----------
+
+    def query(self, metric: str, start=None, end=None, points=None, method: str = "lttb") -> pd.Series:
+        """`metric` between `start` and `end` (inclusive), decimated to at most `points`"""
+        values = self.series[metric]
+        if start is not None or end is not None:
+            index = values.index.values
+            i = 0 if start is None else int(np.searchsorted(index, np.datetime64(start, "ns"), "left"))
+            j = len(index) if end is None else int(np.searchsorted(index, np.datetime64(end, "ns"), "right"))
+            values = values.iloc[i:j]
+        if points is not None and points < len(values):
+            values = values.dropna()
+            days = values.index.values.astype("datetime64[D]").astype("int64").astype("float64")
+            values = values.iloc[METHODS[method](days, values.to_numpy(), points)]
+        return values
+
+    def response(self, key: tuple, build):
+        """(etag, body) of an encoded response, built once per generation"""
+        cached = self._responses.get(key)
+        if cached is not None:
+            self._responses.move_to_end(key)
+            return cached
+        body = build()
+        entry = self._responses[key] = ('"' + hashlib.sha1(body).hexdigest() + '"', body, {})
+        if len(self._responses) > RESPONSE_CACHE_SIZE:
+            self._responses.popitem(last=False)
+        return entry
+
+
+def _date(params: dict, name: str):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return np.datetime64(value, "D")
+    except ValueError:
+        raise BadRequest(f"{name} must be YYYY-MM-DD, got {value!r}") from None
+
+
+def _points(params: dict):
+    value = params.get("points")
+    if not value:
+        return None
+    if not value.isdigit() or int(value) < 3:
+        raise BadRequest(f"points must be an integer >= 3, got {value!r}")
+    return int(value)
+
+
+class SeriesServer:
+    """asyncio HTTP/1.1 front end of a SeriesCache"""
+
+    def __init__(self, cache: SeriesCache, poll_seconds: float = POLL_SECONDS):
+        self.cache = cache
+        self.poll_seconds = poll_seconds
+        self.requests = 0
+
+    # ---------- routing ----------
+
+    def route(self, path: str, params: dict):
+        """(etag, body, compressed variants) for a GET of `path`"""
+        cache = self.cache
+        parts = [unquote(part) for part in path.strip("/").split("/")]
+        if parts == ["series"]:
+            return cache.response(("index",), lambda: encode({
+                metric: {
+                    "start": str(values.index[0].date()) if len(values) else None,
+                    "end": str(values.index[-1].date()) if len(values) else None,
+                    "points": int(len(values)),
+                }
+                for metric, values in sorted(cache.series.items())
+            }))
+        if len(parts) == 2 and parts[0] == "series":
+            metric = parts[1]
+            if metric not in cache.series:
+                raise LookupError(f"Unknown series {metric!r}")
+            start, end, points = _date(params, "start"), _date(params, "end"), _points(params)
+            method = params.get("method", "lttb")
+            if method not in METHODS:
+                raise BadRequest(f"method must be one of {', '.join(METHODS)}")
+            fmt = params.get("format", "records")
+            if fmt not in ("records", "col"):
+                raise BadRequest("format must be records or col")
+
+            def build():
+                values = cache.query(metric, start, end, points, method)
+                return encode(columnar(values) if fmt == "col" else series_records(values))
+            return cache.response(("series", metric, start, end, points, method, fmt), build)
+        if len(parts) == 2 and parts[0] == "kv":
+            key = parts[1]
+            if key == "last_updated":
+                return cache.response(("kv", key), lambda: encode(cache.last_updated()))
+            if key.startswith("series:") and key[len("series:"):] in cache.series:
+                return cache.response(("kv", key), lambda: encode(series_records(cache.series[key[len("series:"):]])))
+            if key in cache.documents:
+                return cache.response(("kv", key), lambda: encode(cache.documents[key]))
+            raise LookupError(f"Unknown key {key!r}")
+        raise LookupError(f"No route for {path}")
+
+    def respond(self, method: str, target: str, headers: dict) -> bytes:
+        """Complete HTTP response for one request"""
+        self.requests += 1
+        extra = {}
+        if method not in ("GET", "HEAD"):
+            status, body = 405, encode({"error": f"{method} not allowed"})
+            extra["Allow"] = "GET, HEAD"
+        else:
+            url = urlsplit(target)
+            params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            try:
+                etag, body, variants = self.route(url.path, params)
+                status = 200
+            except BadRequest as e:
+                status, body = 400, encode({"error": str(e)})
+            except LookupError as e:
+                status, body = 404, encode({"error": e.args[0]})
+            if status == 200:
+                gzipped = "gzip" in headers.get("accept-encoding", "") and len(body) >= GZIP_MIN_BYTES
+                if gzipped:
+                    if "gzip" not in variants:
+                        variants["gzip"] = gzip.compress(body, compresslevel=6, mtime=0)
+                    etag, body = etag[:-1] + '-gzip"', variants["gzip"]
+                    extra["Content-Encoding"] = "gzip"
+                extra.update({"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"})
+                matches = {tag.strip() for tag in headers.get("if-none-match", "").split(",")}
+                if etag in matches or etag.replace('-gzip"', '"') in matches or "*" in matches:
+                    status, body = 304, b""
+                    extra.pop("Content-Encoding", None)
+
+        head = [f"HTTP/1.1 {status} {REASONS[status]}",
+                "Content-Type: application/json",
+                f"Content-Length: {len(body)}",
+                "Access-Control-Allow-Origin: *"]
+        head += [f"{name}: {value}" for name, value in extra.items()]
+        payload = b"" if method == "HEAD" or status == 304 else body
+        return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + payload
+
+    # ---------- connection handling ----------
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await asyncio.wait_for(reader.readline(), IDLE_SECONDS)
+                if not line:
+                    break
+                try:
+                    method, target, version = line.decode("latin-1").split()
+                except ValueError:
+                    writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                    break
+                headers = {}
+                while True:
+                    line = await asyncio.wait_for(reader.readline(), IDLE_SECONDS)
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                writer.write(self.respond(method, target, headers))
+                await writer.drain()
+                if version == "HTTP/1.0" or headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.TimeoutError, ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def watch(self):
+        """Reload whatever a publish rewrote, checking every `poll_seconds`"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            if self.cache.changed():
+                started = time.perf_counter()
+                reloaded = await loop.run_in_executor(None, self.cache.load)
+                if reloaded:
+                    print(f"[serve] reloaded {len(reloaded)} file(s) in {time.perf_counter() - started:.3f}s "
+                          f"(generation {self.cache.generation})")
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle, host, port)
+        watcher = asyncio.create_task(self.watch())
+        print(f"[serve] {len(self.cache.series)} series on http://{host}:{port}/series")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m etl serve", description="Local series query server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--poll", type=float, default=POLL_SECONDS, help="seconds between publish checks")
+    args = parser.parse_args(argv)
+
+    cache = SeriesCache()
+    cache.load()
+    try:
+        asyncio.run(SeriesServer(cache, args.poll).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
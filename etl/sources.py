@@ -0,0 +1,168 @@
+"""
+Data source fetchers for the Liquidity Dashboard ETL.
+Each fetcher takes the shared pooled session and response cache, and
+returns None on failure rather than raising, so one broken source never
+stops a run and the pipeline keeps that source's stored value.
+"""
+import json
+from datetime import date
+
+import pandas as pd
+import requests
+
+from etl.auctions import AUCTION_WINDOW_DAYS, parse_auctions, rolling_stats
+from etl.extract import extract
+from etl.fred_ingest import FRED_OBSERVATIONS_URL, fetch_observations
+from etl.srf import daily_totals, parse_operations, search_url, window_start
+
+MOVE_URL = "https://markets.ft.com/data/indices/tearsheet/summary?s=MOVE:PSE"
+AUCTIONS_URL = "https://www.treasurydirect.gov/auctions/results/"
+
+
+def fred(session: requests.Session, cache, api_key: str, series: str, verbose: bool = False):
+    """Fetch the newest FRED observation of `series`; None on any failure"""
+    if not api_key:
+        print(f"WARNING: FRED API key is not set. Cannot fetch {series} data.")
+        return None
+
+    try:
+        print(f"\nFetching data for series: {series}")
+        # Same query as fetch_direct.py, passed as params so the key stays out of the cache
+        params = {"series_id": series, "api_key": api_key, "file_type": "json", "sort_order": "desc", "limit": 1}
+
+        print(f"Request URL: {FRED_OBSERVATIONS_URL}?series_id={series}&api_key=API_KEY_HIDDEN&file_type=json&sort_order=desc&limit=1")
+        response = cache.get(session, FRED_OBSERVATIONS_URL, "fred", params=params)
+        print(f"Response status: {response.status_code}")
+
+        # Show full response body for debugging in CI environment
+        if verbose:
+            print(f"Raw response: {response.text[:500]}...")
+
+        response.raise_for_status()
+        data = response.json()
+
+        print(f"Response keys: {list(data.keys())}")
+
+        if 'observations' not in data:
+            print(f"WARNING: No 'observations' key in response. Full response: {data}")
+            # Check if there's an error message in the response
+            if 'error_message' in data:
+                print(f"API ERROR: {data['error_message']}")
+            return None
+
+        if not data['observations']:
+            print(f"WARNING: Empty observations list for {series}")
+            return None
+
+        latest = data['observations'][0]
+        print(f"Latest observation: {latest}")
+
+        if 'value' not in latest or latest['value'] == '.':
+            print(f"WARNING: No valid value in observation: {latest}")
+            return None
+
+        value = float(latest['value'])
+        print(f"Parsed value: {value}")
+        return value
+
+    except requests.exceptions.HTTPError as e:
+        print(f"HTTP ERROR fetching FRED data for {series}: {e}")
+        return None
+    except requests.exceptions.ConnectionError as e:
+        print(f"CONNECTION ERROR fetching FRED data for {series}: {e}")
+        return None
+    except requests.exceptions.Timeout as e:
+        print(f"TIMEOUT fetching FRED data for {series}: {e}")
+        return None
+    except requests.exceptions.RequestException as e:
+        print(f"REQUEST ERROR fetching FRED data for {series}: {e}")
+        return None
+    except json.JSONDecodeError as e:
+        print(f"JSON DECODE ERROR for {series}: {e}, Response: {response.text[:500]}")
+        return None
+    except Exception as e:
+        print(f"ERROR fetching FRED data for {series}: {type(e).__name__}: {e}")
+        return None
+
+
+def fred_since(session: requests.Session, cache, api_key: str, series: str, start: str):
+    """Fetch all FRED observations since `start`; None means the fetch failed"""
+    if not api_key:
+        print(f"WARNING: FRED API key is not set. Cannot fetch {series} data.")
+        return None
+    try:
+        print(f"\nFetching {series} observations since {start}")
+        observations = fetch_observations(session, api_key, series, start, cache=cache)
+        print(f"Received {len(observations)} new observations for {series}")
+        return observations
+    except Exception as e:
+        print(f"ERROR fetching FRED observations for {series}: {type(e).__name__}: {str(e).replace(api_key, 'API_KEY_HIDDEN')}")
+        return None
+
+
+def get_move(session: requests.Session, cache):
+    """The current MOVE index level; None when the scrape failed"""
+    try:
+        return extract("move", cache.get(session, MOVE_URL, "move").text)
+    except Exception as e:
+        print(f"Error fetching MOVE index: {e}")
+        return None
+
+
+def get_srf(session: requests.Session, cache, store):
+    """
+    Request SRF operations since the last stored operation date, store them
+    and return daily totals (USD mn) over that window through the last
+    operation day. Later days (weekends, today before its operation is
+    published) are not known yet and are left out rather than reported as 0.
+    None means the fetch failed and stored values should stand.
+    """
+    try:
+        last = store.last_date()
+        start, today = window_start(last), date.today()
+        response = cache.get(session, search_url(start, today), "srf")
+        response.raise_for_status()
+        operations = parse_operations(response.text)
+        stored = store.replace_window(start, operations)
+        print(f"Stored {stored} SRF operation(s) since {start} in {store.path}")
+
+        if last is None:
+            if operations.empty:
+                return None
+            # nothing to compare against before the first operation on record
+            start = operations["operation_date"].min().date()
+        stored = store.read()
+        return daily_totals(stored, start, stored["operation_date"].max())
+    except Exception as e:
+        print(f"Error fetching SRF data: {e}")
+        return None
+
+
+def get_auctions(session: requests.Session, cache, store, since=None):
+    """
+    Ingest auctions not yet in `store`, then return daily rolling bill_share /
+    tail_bp from the earliest day they affect (or `since`) through today.
+    None means the fetch failed and stored values should stand.
+    """
+    try:
+        response = cache.get(session, AUCTIONS_URL, "auctions")
+        response.raise_for_status()
+        new = store.ingest(parse_auctions(response.text, seen=store.keys()))
+        print(f"Stored {len(new)} new auction(s) in {store.path}")
+
+        auctions = store.read()
+        if auctions.empty:
+            return None
+        today = pd.Timestamp(date.today())
+        starts = [today]
+        if len(new):
+            starts.append(new["auction_date"].min())
+        if since is not None:
+            starts.append(pd.Timestamp(since) + pd.Timedelta(days=1))
+        # no partial windows before the first stored auction
+        first_full = auctions["auction_date"].min() + pd.Timedelta(days=AUCTION_WINDOW_DAYS - 1)
+        start = min(max(min(starts), first_full), today)
+        return rolling_stats(auctions, start, today)
+    except Exception as e:
+        print(f"Error fetching auction results: {e}")
+        return None
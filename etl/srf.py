@@ -0,0 +1,88 @@
+"""
+Persisted Standing Repo Facility operations for the Liquidity Dashboard ETL.
+Every operation row from the NY Fed is kept locally. A run requests only
+the window from the last stored operation date (inclusive, since later
+operations of that day may have been published since) and replaces that
+window in the store. The daily srf value is the sum over all operations
+of the day, and days without an operation are a real 0, not a
+forward-filled copy of the last operation.
+"""
+import io
+import os
+from datetime import date, timedelta
+
+import pandas as pd
+
+from etl.extract import normalise_column
+from etl.fred_ingest import DEFAULT_LOOKBACK_DAYS
+from etl.history_store import file_lock
+
+SRF_SEARCH_URL = "https://markets.newyorkfed.org/api/soma/srf/search"
+
+# Amount column of the operations CSV, most specific first
+AMOUNT_COLUMNS = ("total_submitted", "total_amt_submitted", "amount_submitted")
+
+
+def parse_operations(text: str) -> pd.DataFrame:
+    """Operation rows (operation_date, amount in USD) of an SRF search CSV"""
+    table = pd.read_csv(io.StringIO(text))
+    table = table.rename(columns=normalise_column)
+    date_column = "operation_date" if "operation_date" in table else "date"
+    amount_column = next((c for c in AMOUNT_COLUMNS if c in table), None)
+    if date_column not in table or amount_column is None:
+        raise ValueError(f"Unexpected SRF columns: {list(table.columns)}")
+    operations = pd.DataFrame({
+        "operation_date": pd.to_datetime(table[date_column], errors="coerce"),
+        "amount": pd.to_numeric(table[amount_column], errors="coerce").fillna(0.0),
+    })
+    return operations.dropna(subset=["operation_date"]).reset_index(drop=True)
+
+
+class SrfStore:
+    """All SRF operation rows in a single parquet file, ordered by operation date"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.path = os.path.join(root, "operations.parquet")
+        self.lock_path = os.path.join(root, "operations.lock")
+        os.makedirs(root, exist_ok=True)
+
+    def read(self) -> pd.DataFrame:
+        if not os.path.exists(self.path):
+            return pd.DataFrame({"operation_date": pd.Series(dtype="datetime64[ns]"),
+                                 "amount": pd.Series(dtype="float64")})
+        return pd.read_parquet(self.path)
+
+    def last_date(self):
+        operations = self.read()
+        return operations["operation_date"].max().date() if len(operations) else None
+
+    def replace_window(self, start, operations: pd.DataFrame) -> int:
+        """Replace every stored operation on or after `start` with `operations`"""
+        start = pd.Timestamp(start)
+        with file_lock(self.lock_path):
+            stored = self.read()
+            kept = stored[stored["operation_date"] < start]
+            window = operations[operations["operation_date"] >= start]
+            table = pd.concat([kept, window], ignore_index=True) if len(kept) else window.reset_index(drop=True)
+            table = table.sort_values("operation_date", kind="stable").reset_index(drop=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            table.to_parquet(tmp, index=False)
+            os.replace(tmp, self.path)
+        return len(window)
+
+
+def window_start(last_date) -> date:
+    """First day to request: the last stored operation date, or the default lookback"""
+    return last_date if last_date is not None else date.today() - timedelta(days=DEFAULT_LOOKBACK_DAYS)
+
+
+def search_url(start: date, end: date) -> str:
+    return f"{SRF_SEARCH_URL}?startDate={start.isoformat()}&endDate={end.isoformat()}"
+
+
+def daily_totals(operations: pd.DataFrame, start, end) -> pd.Series:
+    """Sum of operations per day in USD mn from `start` to `end`; 0 on days without one"""
+    days = pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), name="date")
+    totals = operations.groupby(operations["operation_date"].dt.normalize())["amount"].sum() / 1e6
+    return totals.reindex(days, fill_value=0.0).rename("srf")
@@ -0,0 +1,81 @@
+"""
+Traffic-light status classification for the Liquidity Dashboard.
+The red/amber thresholds live in one table, web/data/thresholds.json, shared
+with the Next.js API route. classify() labels every day of a history frame in a
+single vectorized pass; status_transitions() reduces the result to the dates on
+which each metric changed colour.
+"""
+import json
+import operator
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+THRESHOLDS_PATH = os.path.join(BASE, "web", "data", "thresholds.json")
+
+LEVELS = ["green", "amber", "red"]
+
+OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+@lru_cache(maxsize=None)
+def load_thresholds(path: str = THRESHOLDS_PATH) -> dict:
+    """Threshold table: metric -> {"red": rule, "amber": rule}; anything else is green"""
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _mask(frame: pd.DataFrame, rule: dict) -> np.ndarray:
+    """Evaluate an {"all": [...]} / {"any": [...]} rule of [column, op, value] conditions"""
+    combine, conditions = next(iter(rule.items()))
+    masks = [
+        OPERATORS[op](frame[column].to_numpy(dtype="float64"), value)
+        for column, op, value in conditions
+    ]
+    return np.logical_and.reduce(masks) if combine == "all" else np.logical_or.reduce(masks)
+
+
+def classify(frame: pd.DataFrame, thresholds: dict = None) -> pd.DataFrame:
+    """Status of every metric on every row of `frame`, as categorical columns"""
+    thresholds = thresholds or load_thresholds()
+    status = {}
+    for metric, rules in thresholds.items():
+        labels = np.select(
+            [_mask(frame, rules["red"]), _mask(frame, rules["amber"])],
+            ["red", "amber"],
+            default="green",
+        )
+        status[metric] = pd.Categorical(labels, categories=LEVELS)
+    return pd.DataFrame(status, index=frame.index)
+
+
+def classify_row(row: dict, thresholds: dict = None) -> dict:
+    """Status dict for a single dashboard row"""
+    frame = pd.DataFrame([{k: v for k, v in row.items() if not isinstance(v, dict)}])
+    return {metric: str(value) for metric, value in classify(frame, thresholds).iloc[0].items()}
+
+
+def status_transitions(status: pd.DataFrame) -> dict:
+    """
+    Compact transition index: metric -> list of {"date", "from", "to"}.
+    The first row of each metric is recorded with "from" = None.
+    """
+    index = {}
+    dates = status.index.strftime("%Y-%m-%d") if isinstance(status.index, pd.DatetimeIndex) else status.index.astype(str)
+    for metric in status.columns:
+        codes = status[metric].cat.codes.to_numpy()
+        changed = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        labels = status[metric].to_numpy()
+        index[metric] = [
+            {"date": dates[i], "from": labels[i - 1] if i else None, "to": labels[i]}
+            for i in changed
+        ]
+    return index
@@ -0,0 +1,499 @@
+"""
+Bitemporal vintage store for the Liquidity Dashboard ETL.
+
+FRED revises series such as WRBWFRBL after their first release, and the
+history store keeps only the newest value per date, so what the dashboard
+showed on a past day could not be reproduced. Here every observation is
+recorded with two dates: the date it is for (`date`) and the day it was
+fetched (`known`). A value is recorded again only when a later fetch
+returns something different, so the store grows with revisions rather
+than with fetches.
+
+Recorded rows are appended to a JSON-lines journal, so a run costs the same
+however many vintages are stored. The journal is compacted into parquet
+partitions by observation year once it grows, rewriting only the years it
+touched, the same scheme as the history store (etl/history_store.py).
+Rows are read back sorted by (metric, date, known), so "X on date D as known on
+day K" is two binary searches. Whole histories as of K, and the real-time
+series (each day's latest value as known that day), are rebuilt with
+vectorized NumPy passes. Post-mortems and backtests of the status signals
+can then run against what was actually known at the time.
+
+Layout under data/vintages/:
+    manifest.json               current generation: partition files + journal
+    part-<year>-<gen>.parquet   metric, date, known, value for dates in that year
+    journal-<gen>.jsonl         rows recorded since the last compaction
+    vintages.lock               held by writers
+
+A vintages.parquet written by earlier versions is split into partitions
+the first time the store is opened.
+
+    python -m etl vintages value reserves 2025-05-14 --known 2025-05-20
+    python -m etl vintages revisions reserves
+    python -m etl vintages status --known 2025-06-01
+    python -m etl vintages backtest --start 2025-01-01
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from etl.history_store import COMPACT_BYTES, _atomic_write_bytes, file_lock
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VINTAGE_DIR = os.path.join(BASE, "data", "vintages")
+
+COLUMNS = ["metric", "date", "known", "value"]
+
+# One vintage per metric, observation date and day known; also the sort order
+KEY = ["metric", "date", "known"]
+
+# date * KEY_SPAN + known orders rows like (date, known); days since 1970 stay far below it
+KEY_SPAN = 1 << 20
+
+
+def _days(values) -> np.ndarray:
+    """Dates (scalar or array-like) as int64 days since 1970-01-01"""
+    return np.asarray(values, dtype="datetime64[D]").astype(np.int64)
+
+
+def _index(days: np.ndarray) -> pd.DatetimeIndex:
+    return pd.DatetimeIndex(days.astype("datetime64[D]").astype("datetime64[ns]"), name="date")
+
+
+def _empty() -> pd.DataFrame:
+    return pd.DataFrame({"metric": pd.Series(dtype="object"),
+                         "date": pd.Series(dtype="datetime64[ns]"),
+                         "known": pd.Series(dtype="datetime64[ns]"),
+                         "value": pd.Series(dtype="float64")})
+
+
+def _sorted(frames: list) -> pd.DataFrame:
+    """Rows of `frames` with one vintage per key (later frames win), sorted by KEY"""
+    if not frames:
+        return _empty()
+    table = pd.concat(frames, ignore_index=True)
+    # a second fetch on the same day replaces that day's vintage
+    table = table.drop_duplicates(KEY, keep="last")
+    return table.sort_values(KEY, kind="stable")[COLUMNS].reset_index(drop=True)
+
+
+def _by_metric(table: pd.DataFrame) -> dict:
+    return {
+        metric: Vintages(_days(rows["date"].to_numpy()), _days(rows["known"].to_numpy()),
+                         rows["value"].to_numpy(dtype="float64"))
+        for metric, rows in table.groupby("metric", sort=False)
+    }
+
+
+class Vintages:
+    """Arrays of one metric's vintages, sorted by (date, known)"""
+
+    def __init__(self, days: np.ndarray, known: np.ndarray, values: np.ndarray):
+        self.days, self.known, self.values = days, known, values
+        self.keys = days * KEY_SPAN + known
+
+    def lookup(self, days, known) -> np.ndarray:
+        """Row of the latest vintage of each date known by `known`; -1 where none was"""
+        days, known = np.broadcast_arrays(np.atleast_1d(_days(days)), np.atleast_1d(_days(known)))
+        # "latest" is passed as a far-future day; keep it inside its date's key range
+        known = np.minimum(known, KEY_SPAN - 1)
+        rows = np.searchsorted(self.keys, days * KEY_SPAN + known, "right") - 1
+        hit = rows >= 0
+        hit[hit] = self.days[rows[hit]] == days[hit]
+        return np.where(hit, rows, -1)
+
+    def as_of(self, known) -> pd.Series:
+        """Every date's latest value known by `known`"""
+        seen = self.known <= _days(known)
+        days, values = self.days[seen], self.values[seen]
+        last = np.append(days[1:] != days[:-1], True)[:len(days)]
+        return pd.Series(values[last], index=_index(days[last]))
+
+    def first_release(self) -> pd.Series:
+        """Every date's value as first published"""
+        first = np.insert(self.days[1:] != self.days[:-1], 0, True)[:len(self.days)]
+        return pd.Series(self.values[first], index=_index(self.days[first]))
+
+    def real_time(self, days) -> pd.Series:
+        """For each day, the value of the latest date published by then, as known that day"""
+        days = _days(days)
+        values = np.full(len(days), np.nan)
+        if not len(self.days):
+            return pd.Series(values, index=_index(days))
+        first = np.insert(self.days[1:] != self.days[:-1], 0, True)
+        order = np.argsort(self.known[first], kind="stable")
+        released = self.known[first][order]
+        # newest date published on or before each release day
+        newest = np.maximum.accumulate(self.days[first][order])
+        at = np.searchsorted(released, days, "right") - 1
+        rows = self.lookup(newest[np.maximum(at, 0)], days)
+        hit = (at >= 0) & (rows >= 0)
+        values[hit] = self.values[rows[hit]]
+        return pd.Series(values, index=_index(days))
+
+
+class VintageStore:
+    """Observations with their observation date and the day they were fetched, journaled and partitioned by year"""
+
+    def __init__(self, root: str = VINTAGE_DIR, compact_bytes: int = COMPACT_BYTES):
+        self.root = root
+        self.compact_bytes = compact_bytes
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self.legacy_path = os.path.join(root, "vintages.parquet")
+        self.lock_path = os.path.join(root, "vintages.lock")
+        os.makedirs(root, exist_ok=True)
+        self._stamp = None
+        self._vintages = {}
+        if not os.path.exists(self.manifest_path) and os.path.exists(self.legacy_path):
+            print(f"Migrating {self.legacy_path} into year partitions")
+            with file_lock(self.lock_path):
+                table = pd.read_parquet(self.legacy_path)
+                self._write_generation(self._read_manifest(), table, set(table["date"].dt.year), {})
+
+    # ---------- files ----------
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def _read_manifest(self) -> dict:
+        try:
+            with open(self.manifest_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"generation": 0, "partitions": {}, "journal": None, "retired": []}
+
+    def _read_journal(self, name: str) -> pd.DataFrame:
+        records = []
+        if name and os.path.exists(self._path(name)):
+            with open(self._path(name), "r") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # a torn final line from a concurrent append; it will be complete next read
+                        continue
+        if not records:
+            return _empty()
+        journal = pd.DataFrame.from_records(records, columns=COLUMNS)
+        journal["date"] = pd.to_datetime(journal["date"])
+        journal["known"] = pd.to_datetime(journal["known"])
+        journal["value"] = journal["value"].astype("float64")
+        return journal
+
+    def _read_generation(self, manifest: dict, years=None) -> pd.DataFrame:
+        parts = [pd.read_parquet(self._path(name)) for year, name in sorted(manifest["partitions"].items())
+                 if years is None or int(year) in years]
+        journal = self._read_journal(manifest.get("journal"))
+        if years is not None:
+            journal = journal[journal["date"].dt.year.isin(years)]
+        return _sorted([part for part in parts + [journal] if len(part)])
+
+    def read(self) -> pd.DataFrame:
+        """Every vintage (partitions + journal replay), sorted by metric, date, known"""
+        for _ in range(5):
+            try:
+                return self._read_generation(self._read_manifest())
+            except FileNotFoundError:
+                # a compaction retired this generation while we were reading; retry
+                time.sleep(0.05)
+        return self._read_generation(self._read_manifest())
+
+    def version(self) -> tuple:
+        """Cheap stamp that changes whenever a writer records or compacts"""
+        manifest = self._read_manifest()
+        journal = manifest.get("journal")
+        try:
+            journal_size = os.path.getsize(self._path(journal)) if journal else 0
+        except OSError:
+            journal_size = 0
+        return manifest["generation"], journal, journal_size
+
+    def metrics(self) -> list:
+        return sorted(self._load())
+
+    def _load(self) -> dict:
+        """metric -> Vintages, re-read only when the store changed"""
+        stamp = self.version()
+        if stamp != self._stamp:
+            self._vintages = _by_metric(self.read())
+            self._stamp = stamp
+        return self._vintages
+
+    def _stored(self, years) -> dict:
+        """metric -> Vintages of observation dates in `years`, all a write compares against"""
+        return _by_metric(self._read_generation(self._read_manifest(), set(years)))
+
+    def vintages(self, metric: str) -> Vintages:
+        try:
+            return self._load()[metric]
+        except KeyError:
+            raise KeyError(f"No vintages of {metric!r}") from None
+
+    # ---------- writing ----------
+
+    def record(self, observations: dict, known=None) -> dict:
+        """
+        Record each metric's observations (date-indexed Series) as known on
+        `known` (default today), keeping only values that are new or differ
+        from the latest vintage of their date. Returns metric -> the
+        observations that were recorded.
+        """
+        known = pd.Timestamp(known or date.today()).normalize()
+        changed, rows, revised = {}, [], 0
+        with file_lock(self.lock_path):
+            stored = self._stored({year for values in observations.values() if values is not None
+                                   for year in values.index.year})
+            for metric, values in observations.items():
+                if values is None or not len(values):
+                    continue
+                values = values.dropna()
+                values = values[~values.index.duplicated(keep="last")].sort_index()
+                previous = np.full(len(values), np.nan)
+                if metric in stored:
+                    vintages = stored[metric]
+                    hit = vintages.lookup(values.index.values, known)
+                    previous[hit >= 0] = vintages.values[hit[hit >= 0]]
+                new = np.isnan(previous) | (previous != values.to_numpy(dtype="float64"))
+                if not new.any():
+                    continue
+                revised += int(np.count_nonzero(new & ~np.isnan(previous)))
+                changed[metric] = values[new]
+                rows.append(pd.DataFrame({"metric": metric, "date": values.index[new].normalize(),
+                                          "known": known, "value": values.to_numpy(dtype="float64")[new]}))
+            if rows:
+                self._write(rows)
+        if rows:
+            recorded = sum(len(v) for v in changed.values())
+            print(f"Recorded {recorded} observation(s) as known on {known.date()}, {revised} of them revisions")
+        return changed
+
+    def seed(self, hist: pd.DataFrame, metrics) -> int:
+        """
+        Record stored history for dates that have no vintage yet, assuming
+        each value was known on its own date. Returns the rows added.
+        """
+        with file_lock(self.lock_path):
+            stored = self._stored(set(hist.index.year))
+            rows = []
+            for metric in metrics:
+                if metric not in hist.columns:
+                    continue
+                values = hist[metric].dropna()
+                if metric in stored:
+                    values = values[~np.isin(_days(values.index.values), stored[metric].days)]
+                if len(values):
+                    rows.append(pd.DataFrame({"metric": metric, "date": values.index.normalize(),
+                                              "known": values.index.normalize(),
+                                              "value": values.to_numpy(dtype="float64")}))
+            if rows:
+                self._write(rows)
+        return sum(len(r) for r in rows)
+
+    def _write(self, rows: list):
+        """Append new rows to the journal, compacting once it is large; the caller holds the lock"""
+        table = pd.concat(rows, ignore_index=True)
+        lines = [json.dumps({"metric": metric, "date": day.strftime("%Y-%m-%d"),
+                             "known": known.strftime("%Y-%m-%d"), "value": float(value)})
+                 for metric, day, known, value in zip(table["metric"], table["date"], table["known"], table["value"])]
+        manifest = self._read_manifest()
+        if not manifest.get("journal"):
+            manifest["journal"] = f"journal-{manifest['generation']}.jsonl"
+            _atomic_write_bytes(self.manifest_path, json.dumps(manifest, indent=2).encode())
+        path = self._path(manifest["journal"])
+        with open(path, "a") as f:
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.getsize(path) >= self.compact_bytes:
+            self._compact(manifest)
+
+    def _compact(self, manifest: dict):
+        """Fold the journal into the year partitions it touches; the caller holds the lock"""
+        journal = self._read_journal(manifest.get("journal"))
+        if not len(journal):
+            return
+        years = set(journal["date"].dt.year)
+        new_manifest = self._write_generation(manifest, self._read_generation(manifest, years), years,
+                                              manifest["partitions"])
+        print(f"Compacted vintage journal into {len(years)} partition(s), generation {new_manifest['generation']}")
+
+    def compact(self):
+        with file_lock(self.lock_path):
+            self._compact(self._read_manifest())
+
+    def _write_generation(self, manifest: dict, table: pd.DataFrame, years, partitions: dict) -> dict:
+        """Write partitions for `years` on top of `partitions`, then swap the manifest"""
+        generation = manifest["generation"] + 1
+        partitions = dict(partitions)
+        table = _sorted([table])
+        for year in sorted(years):
+            name = f"part-{year}-{generation}.parquet"
+            tmp = self._path(f"{name}.{os.getpid()}.tmp")
+            table[table["date"].dt.year == year].to_parquet(tmp, index=False)
+            os.replace(tmp, self._path(name))
+            partitions[str(year)] = name
+
+        # Files still named by the outgoing manifest stay for in-flight readers;
+        # the ones it had already retired can go now.
+        for name in manifest.get("retired", []):
+            try:
+                os.remove(self._path(name))
+            except OSError:
+                pass
+        live = set(partitions.values())
+        retired = [name for name in manifest["partitions"].values() if name not in live]
+        if manifest.get("journal"):
+            retired.append(manifest["journal"])
+        new_manifest = {"generation": generation, "partitions": partitions, "journal": None, "retired": retired}
+        _atomic_write_bytes(self.manifest_path, json.dumps(new_manifest, indent=2).encode())
+        return new_manifest
+
+    # ---------- queries ----------
+
+    def value(self, metric: str, day, known=None) -> float:
+        """Value of `metric` for `day` as known on `known` (default: latest); NaN if unknown then"""
+        vintages = self.vintages(metric)
+        row = int(vintages.lookup(day, known if known is not None else "9999-12-31")[0])
+        return float(vintages.values[row]) if row >= 0 else float("nan")
+
+    def as_of(self, metric: str, known) -> pd.Series:
+        """The history of `metric` as it was known on `known`"""
+        return self.vintages(metric).as_of(known)
+
+    def as_of_frame(self, known, metrics=None) -> pd.DataFrame:
+        """Date-indexed frame of several metrics as known on `known`"""
+        metrics = metrics or self.metrics()
+        frame = pd.DataFrame({metric: self.as_of(metric, known) for metric in metrics})
+        frame.index.name = "date"
+        return frame
+
+    def real_time(self, days, metrics=None) -> pd.DataFrame:
+        """Each day's latest value of every metric as known that day: what the dashboard showed"""
+        metrics = metrics or self.metrics()
+        frame = pd.DataFrame({metric: self.vintages(metric).real_time(days) for metric in metrics})
+        frame.index.name = "date"
+        return frame
+
+    def revisions(self, metric: str) -> pd.DataFrame:
+        """Dates whose value changed after first release, with first and latest value"""
+        vintages = self.vintages(metric)
+        first = vintages.first_release()
+        latest = vintages.as_of("9999-12-31")
+        counts = pd.Series(vintages.days).value_counts()
+        revised = counts[counts > 1].index.to_numpy(dtype=np.int64)
+        index = _index(np.sort(revised))
+        return pd.DataFrame({
+            "first": first.reindex(index),
+            "latest": latest.reindex(index),
+            "vintages": counts.reindex(np.sort(revised)).to_numpy(),
+        }, index=index)
+
+
+def _fill_from(daily: pd.DataFrame, history: pd.DataFrame) -> pd.DataFrame:
+    """Add the columns vintages do not cover, using each day's latest stored value"""
+    if history is None:
+        return daily
+    for column in history.columns.difference(daily.columns):
+        daily[column] = history[column].dropna().reindex(daily.index, method="ffill")
+    return daily
+
+
+def status_as_of(store: VintageStore, known, history: pd.DataFrame = None) -> tuple:
+    """
+    (values, status) computed from the history known on `known`. Metrics
+    without vintages (MOVE) come from `history` as stored.
+    """
+    from etl.status import classify_row
+
+    known = pd.Timestamp(known)
+    frame = store.as_of_frame(known)
+    if frame.empty:
+        raise ValueError(f"Nothing was recorded as known on {known.date()}")
+    daily = frame.resample("D").last().reindex(pd.date_range(frame.index.min(), known, name="date")).ffill()
+    daily = _fill_from(daily, history)
+    row = {name: float(value) for name, value in daily.iloc[-1].items() if not pd.isna(value)}
+    return row, classify_row(row)
+
+
+def backtest_status(store: VintageStore, start, end=None, history: pd.DataFrame = None) -> pd.DataFrame:
+    """Daily status of every signal from the values known on each day"""
+    from etl.status import classify
+
+    days = pd.date_range(pd.Timestamp(start), pd.Timestamp(end or date.today()), freq="D", name="date")
+    return classify(_fill_from(store.real_time(days.values), history))
+
+
+def _history(columns=None, end=None) -> pd.DataFrame:
+    from etl.history_store import HistoryStore
+
+    return HistoryStore(os.path.join(BASE, "data", "history"),
+                        legacy_path=os.path.join(BASE, "data", "history.parquet")).read(columns, end=end)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m etl vintages", description="Bitemporal vintage store")
+    parser.add_argument("--root", default=VINTAGE_DIR, help="store directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("value", help="value of a metric for a date as known on a day")
+    command.add_argument("metric")
+    command.add_argument("date")
+    command.add_argument("--known", default=None, help="YYYY-MM-DD (default: latest)")
+
+    command = commands.add_parser("history", help="a metric's history as known on a day")
+    command.add_argument("metric")
+    command.add_argument("--known", default=None, help="YYYY-MM-DD (default: today)")
+    command.add_argument("--last", type=int, default=20)
+
+    command = commands.add_parser("revisions", help="dates revised after first release")
+    command.add_argument("metric")
+
+    command = commands.add_parser("status", help="status computed from what was known on a day")
+    command.add_argument("--known", default=None, help="YYYY-MM-DD (default: today)")
+
+    command = commands.add_parser("backtest", help="daily status from real-time values, printed as changes")
+    command.add_argument("--start", required=True)
+    command.add_argument("--end", default=None)
+
+    commands.add_parser("seed", help="record stored history as first releases for metrics without vintages")
+    args = parser.parse_args(argv)
+
+    store = VintageStore(args.root)
+    known = getattr(args, "known", None) or date.today().isoformat()
+    if args.command == "value":
+        print(store.value(args.metric, args.date, args.known))
+    elif args.command == "history":
+        print(store.as_of(args.metric, known).tail(args.last).to_string())
+    elif args.command == "revisions":
+        revisions = store.revisions(args.metric)
+        print(revisions.to_string() if len(revisions) else f"No revisions of {args.metric}")
+    elif args.command == "status":
+        try:
+            row, status = status_as_of(store, known, _history(end=known))
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+        for metric, level in status.items():
+            print(f"{metric:<10} {level}")
+        print(" ".join(f"{name}={value:g}" for name, value in row.items()))
+    elif args.command == "backtest":
+        from etl.status import status_transitions
+
+        status = backtest_status(store, args.start, args.end, _history(end=args.end))
+        for metric, changes in status_transitions(status).items():
+            print(f"{metric}: " + ", ".join(f"{c['date']} {c['from'] or '-'}->{c['to']}" for c in changes))
+    elif args.command == "seed":
+        from etl.pipeline import VINTAGE_METRICS
+
+        print(f"Seeded {store.seed(_history(VINTAGE_METRICS), VINTAGE_METRICS)} row(s) as first releases")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,12 +4,16 @@ This runs a simplified version of the ETL with correct paths for local testing
 """
 import os
 import sys
-import json
 import pathlib
 import pandas as pd
 from datetime import date, timedelta
 import traceback
 
+from etl.asof import AsOfHistory
+from etl.history_store import HistoryStore
+from etl.status import classify_row
+from etl.publish import publish
+
 # Get absolute paths
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "data")
@@ -28,13 +32,6 @@ print(f"Web directory: {WEB_DIR}")
 print(f"Public directory: {PUBLIC_DIR}")
 print(f"Series directory: {SERIES_DIR}")
 
-# Custom JSON encoder for Pandas Timestamp objects
-class DateTimeEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, pd.Timestamp):
-            return obj.strftime('%Y-%m-%d')
-        return super().default(obj)
-
 try:
     # Generate current date
     today = date.today()
@@ -50,13 +47,13 @@ try:
         "tail_bp": 3.5,
     }
     
-    # Create history.parquet or load existing
-    hist_path = os.path.join(DATA_DIR, "history.parquet")
-    if os.path.exists(hist_path):
-        print(f"Loading existing history from {hist_path}")
-        hist = pd.read_parquet(hist_path)
+    # Create the history store or load existing
+    store = HistoryStore(os.path.join(DATA_DIR, "history"), legacy_path=os.path.join(DATA_DIR, "history.parquet"))
+    if store.exists():
+        print(f"Loading existing history from {store.root}")
+        hist = store.read()
     else:
-        print(f"Creating new history file at {hist_path}")
+        print(f"Creating new history store at {store.root}")
         # Generate test data for the past 730 days (2 years)
         dates = []
         on_rrp_values = []
@@ -88,61 +85,28 @@ try:
             'tail_bp': tail_bp_values
         }
         hist = pd.DataFrame(data).set_index('date')
+        hist.index = pd.to_datetime(hist.index)
+        store.replace(hist)
     
     # Add current row to history
     new_row = pd.DataFrame([row])
     new_row['date'] = pd.to_datetime(new_row['date'])
     new_row = new_row.set_index('date')
-    hist = pd.concat([hist, new_row]).drop_duplicates(keep="last")
+    store.append(new_row)
+    hist = pd.concat([hist, new_row])
+    hist = hist[~hist.index.duplicated(keep="last")]
     
-    # Keep at least 730 days (2 years) of data and save
-    hist = hist.tail(730)
-    hist.to_parquet(hist_path)
+    # Publish the last 730 days (2 years) of data, as-of aligned to daily
+    aligned = AsOfHistory.from_frame(hist)
+    hist = aligned.daily(start=max(aligned.start, aligned.end - pd.Timedelta(days=729)))
     print(f"Updated history saved with {len(hist)} records")
     
     # Calculate status indicators
-    status = {}
-    status["on_rrp"] = "red" if row["on_rrp"] < 50_000 else "amber" if row["on_rrp"] < 100_000 else "green"
-    status["reserves"] = "red" if row["reserves"] < 2_500_000 else "amber" if row["reserves"] < 3_000_000 else "green"
-    status["move"] = "red" if row["move"] >= 140 else "amber" if row["move"] >= 120 else "green"
-    status["srf"] = "red" if row["srf"] >= 100_000 else "amber" if row["srf"] >= 25_000 else "green"
-    status["tail"] = "red" if (row["bill_share"] > 0.6 and row["tail_bp"] >= 4) else "amber" if (row["bill_share"] > 0.6 or row["tail_bp"] >= 4) else "green"
-    row["status"] = status
-    
-    # Save dashboard.json
-    dash_path = os.path.join(PUBLIC_DIR, "dashboard.json")
-    with open(dash_path, 'w') as f:
-        json.dump(row, f, indent=2, cls=DateTimeEncoder)
-    print(f"Dashboard JSON saved to {dash_path}")
-    
-    # Generate series JSON files
-    metrics = ["on_rrp", "reserves", "move", "srf"]
-    for metric in metrics:
-        series_data = hist[[metric]].reset_index()
-        series_data = series_data.rename(columns={metric: "value"})
-        series_path = os.path.join(SERIES_DIR, f"{metric}.json")
-        json_str = series_data.to_json(orient="records", date_format='iso')
-        with open(series_path, 'w') as f:
-            f.write(json_str)
-        print(f"{metric} series JSON saved to {series_path}")
-    
-    # Generate funding combined series
-    funding_data = hist[["bill_share", "tail_bp"]].reset_index()
-    funding_data["value"] = (funding_data["bill_share"] * 100) + (funding_data["tail_bp"] / 10)
-    funding_data = funding_data[["date", "value"]]
-    funding_path = os.path.join(SERIES_DIR, "funding.json")
-    json_str = funding_data.to_json(orient="records", date_format='iso')
-    with open(funding_path, 'w') as f:
-        f.write(json_str)
-    print(f"Funding series JSON saved to {funding_path}")
+    row["status"] = classify_row(row)
     
-    # Generate individual bill_share and tail_bp series
-    bill_share_data = hist[["bill_share"]].rename(columns={"bill_share": "value"}).reset_index()
-    tail_bp_data = hist[["tail_bp"]].rename(columns={"tail_bp": "value"}).reset_index()
-    with open(os.path.join(SERIES_DIR, "bill_share.json"), 'w') as f:
-        f.write(bill_share_data.to_json(orient="records", date_format='iso'))
-    with open(os.path.join(SERIES_DIR, "tail_bp.json"), 'w') as f:
-        f.write(tail_bp_data.to_json(orient="records", date_format='iso'))
+    # Write dashboard, sparks, auctions and series JSON (unchanged files are skipped)
+    publish(hist, row, PUBLIC_DIR, SERIES_DIR, os.path.join(DATA_DIR, "publish_manifest.json"),
+            native=aligned, start=hist.index[0])
     
     print("Local ETL completed successfully!")
     print("Your dashboard should now display up-to-date data!")
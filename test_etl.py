@@ -10,11 +10,8 @@ print(f"Current directory: {os.getcwd()}")
 print(f"Python version: {sys.version}")
 print(f"Python executable: {sys.executable}")
 print("Files in current directory:")
-for root, dirs, files in os.walk('.', topdown=True, maxdepth=1):
-    for name in files:
-        print(f"  - {name}")
-    for name in dirs:
-        print(f"  + {name}")
+for entry in sorted(os.scandir('.'), key=lambda e: e.name):
+    print(f"  {'+' if entry.is_dir() else '-'} {entry.name}")
 
 print("\n===== Attempting to import modules =====")
 try:
@@ -24,9 +21,6 @@ try:
     import requests
     print(f"Requests version: {requests.__version__}")
     
-    from bs4 import BeautifulSoup
-    print("BeautifulSoup imported successfully")
-    
     print("All required modules imported successfully")
 except ImportError as e:
     print(f"Error importing modules: {e}")
@@ -35,8 +29,9 @@ except ImportError as e:
 
 print("\n===== Attempting to run ETL script =====")
 try:
-    # Run the ETL script with detailed error handling
-    exec(open("etl/fetch_data.py").read())
+    # Run the ETL pipeline in-process with detailed error handling
+    from etl.pipeline import Pipeline
+    Pipeline().run()
     print("ETL script completed successfully")
 except Exception as e:
     print(f"Error running ETL script: {e}")
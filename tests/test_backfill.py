@@ -0,0 +1,62 @@
+"""Backfilling history before the stored range brings derived metrics with it"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from etl.backfill import Backfill, into_history
+from etl.derived import compute_derived
+from etl.pipeline import Pipeline, read_since
+
+
+def _history(start, end) -> pd.DataFrame:
+    days = pd.bdate_range(start, end, name="date")
+    return pd.DataFrame({
+        "on_rrp": np.linspace(400.0, 300.0, len(days)).round(1),
+        "reserves": np.where(days.weekday == 2, 3200.0, np.nan),
+        "move": 95.0,
+        "srf": 0.0,
+        "bill_share": 0.55,
+        "tail_bp": 1.5,
+    }, index=days)
+
+
+def test_backfill_before_stored_range_fills_derived(tmp_path):
+    base = str(tmp_path)
+    pipeline = Pipeline(base=base, planned=False)
+    pipeline.history.replace(_history("2025-01-01", "2025-03-31"))
+    pipeline.derive()
+    assert pipeline.derived_store.read().index.min() == pd.Timestamp("2025-01-01")
+
+    # A backfilled window of ON-RRP from before the stored history
+    backfill = Backfill(api_key="", root=os.path.join(base, "data", "backfill"))
+    older = _history("2024-09-02", "2024-12-31")["on_rrp"].rename("value").to_frame()
+    window = os.path.join(backfill.root, "windows", "RRPONTSYD", "2020-01-01_2029-12-31.parquet")
+    os.makedirs(os.path.dirname(window))
+    older.to_parquet(window)
+    backfill.combine("RRPONTSYD")
+
+    assert into_history(backfill, ["RRPONTSYD"], base=base) == ["on_rrp"]
+    assert read_since(os.path.join(base, "data", "pipeline_state.json")) == pd.Timestamp("2024-09-02")
+    assert pipeline.vintages.as_of("on_rrp", "2024-12-31").index.min() == pd.Timestamp("2024-09-02")
+
+    pipeline = Pipeline(base=base, planned=False)
+    pipeline.derive()
+    stored = pipeline.derived_store.read()
+    expected = compute_derived(pipeline.daily)
+    backfilled = expected.loc["2024-10-02":"2024-12-31"]
+    assert backfilled["on_rrp_delta30"].notna().all()
+    pd.testing.assert_frame_equal(stored.loc[backfilled.index, backfilled.columns], backfilled,
+                                  check_freq=False, check_dtype=False)
+    assert read_since(pipeline.state_path) is None
+
+
+def test_derived_store_starting_after_history_is_extended(tmp_path):
+    from etl.derived import update_derived
+    from etl.history_store import HistoryStore
+
+    daily = _history("2025-01-01", "2025-03-31").asfreq("D").ffill()[["on_rrp", "reserves", "srf"]]
+    store = HistoryStore(str(tmp_path / "derived"))
+    update_derived(daily.loc["2025-02-01":], store)
+    derived = update_derived(daily, store)
+    pd.testing.assert_frame_equal(derived, compute_derived(daily), check_freq=False)
@@ -0,0 +1,38 @@
+"""validate() sees history appended to the journal since the last compaction"""
+import pandas as pd
+
+from etl.checks import store_last_date, store_manifest, validate
+from etl.pipeline import Pipeline
+
+
+def _history(start, end) -> pd.DataFrame:
+    days = pd.bdate_range(start, end, name="date")
+    return pd.DataFrame({
+        "on_rrp": 350.0,
+        "reserves": 3200.0,
+        "move": 95.0,
+        "srf": 0.0,
+        "bill_share": 0.55,
+        "tail_bp": 1.5,
+    }, index=days)
+
+
+def _stale(problems) -> list:
+    return [p for p in problems if p.startswith("derived: ends")]
+
+
+def test_journal_tail_counts_towards_freshness(tmp_path):
+    base = str(tmp_path)
+    pipeline = Pipeline(base=base, planned=False)
+    pipeline.history.replace(_history("2025-01-01", "2025-03-31"))
+    pipeline.derive()
+    assert _stale(validate(base)) == []
+
+    pipeline.history.append(_history("2025-04-01", "2025-04-02"))
+    root = pipeline.history.root
+    assert store_manifest(root)["last_date"] == "2025-03-31"
+    assert store_last_date(root, store_manifest(root)) == "2025-04-02"
+    assert _stale(validate(base)) == ["derived: ends 2025-03-31, history ends 2025-04-02; run the derive stage"]
+
+    pipeline.derive()
+    assert _stale(validate(base)) == []
@@ -0,0 +1,32 @@
+"""Daemon ticks that fetch an unchanged MOVE value do not journal it again"""
+import os
+
+from etl.benchmark import StubSession
+from etl.daemon import Scheduler
+from etl.pipeline import SOURCES, Pipeline
+
+
+def _journal_lines(pipeline: Pipeline) -> int:
+    journal = pipeline.history._read_manifest().get("journal")
+    if not journal:
+        return 0
+    with open(os.path.join(pipeline.history.root, journal)) as f:
+        return sum(1 for _ in f)
+
+
+def test_unchanged_move_is_not_appended_again(tmp_path):
+    base = str(tmp_path)
+    pipeline = Pipeline(base=base, api_key="test", fred_mode="incremental", planned=False, http_cache=False,
+                        metrics_path=os.path.join(base, "runs.jsonl"), session=StubSession())
+    scheduler = Scheduler(pipeline)
+    assert scheduler.tick(list(SOURCES))
+    lines = _journal_lines(pipeline)
+
+    assert scheduler.tick(["move"])
+    assert scheduler.tick(["move"])
+    assert _journal_lines(pipeline) == lines
+
+    pipeline.session.pages = {url: page.replace("98.47", "101.25") for url, page in pipeline.session.pages.items()}
+    assert scheduler.tick(["move"])
+    assert _journal_lines(pipeline) == lines + 1
+    assert pipeline.history.read(["move"]).iloc[-1]["move"] == 101.25
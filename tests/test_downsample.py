@@ -0,0 +1,33 @@
+"""Every level of a series pyramid is picked for some chart"""
+import numpy as np
+import pandas as pd
+
+from etl.downsample import LEVELS, build_pyramid, pick_level
+
+# Plot widths a dashboard chart is drawn at, from the sparkline strip to a wide screen
+PIXELS = (120, 240, 400, 800, 1200, 1600)
+
+
+def test_each_level_is_reachable():
+    days = pd.date_range("2015-01-01", periods=7300, freq="D", name="date")
+    values = pd.Series(np.sin(np.arange(len(days)) / 50.0), index=days)
+    pyramid, index = build_pyramid(values)
+    assert [level["points"] for level in index["levels"]] == list(LEVELS)
+
+    span = (days[-1] - days[0]).days
+    picked = {None if level is None else level["points"]
+              for visible in (30, 90, 365, 730, span) for pixels in PIXELS
+              for level in [pick_level(index, visible, pixels)]}
+    assert picked == set(LEVELS) | {None}
+
+
+def test_picked_level_covers_every_pixel():
+    days = pd.date_range("2015-01-01", periods=7300, freq="D", name="date")
+    pyramid, index = build_pyramid(pd.Series(np.arange(len(days), dtype=float), index=days))
+    for visible in (30, 365, 7299):
+        for pixels in PIXELS:
+            level = pick_level(index, visible, pixels)
+            if level is None:
+                continue
+            shown = pyramid[level["points"]].loc[days[-1] - pd.Timedelta(days=visible):]
+            assert len(shown) >= pixels * 0.95
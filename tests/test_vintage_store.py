@@ -0,0 +1,40 @@
+"""The vintage store appends to a journal and compacts by year"""
+import os
+
+import pandas as pd
+
+from etl.vintage_store import VintageStore
+
+
+def _series(start, values):
+    return pd.Series(values, index=pd.date_range(start, periods=len(values), freq="D", name="date"), dtype=float)
+
+
+def test_record_appends_and_compacts(tmp_path):
+    store = VintageStore(str(tmp_path), compact_bytes=400)
+    store.record({"reserves": _series("2024-12-30", [1, 2, 3])}, known="2025-01-02")
+    manifest = store._read_manifest()
+    assert manifest["partitions"] == {} and manifest["journal"]
+
+    # a revision of 2025-01-01 and new dates; the journal passes compact_bytes
+    store.record({"reserves": _series("2025-01-01", [30, 4, 5, 6])}, known="2025-01-06")
+    manifest = store._read_manifest()
+    assert sorted(manifest["partitions"]) == ["2024", "2025"] and manifest["journal"] is None
+
+    store.record({"reserves": _series("2025-01-03", [5, 7])}, known="2025-01-07")
+    assert len(store.read()) == 8
+    assert store.value("reserves", "2025-01-01", known="2025-01-05") == 3
+    assert store.value("reserves", "2025-01-01") == 30
+    assert store.as_of("reserves", "2025-01-07").tolist() == [1, 2, 30, 4, 5, 7]
+
+    # a new store on the same directory reads the same vintages
+    assert VintageStore(str(tmp_path)).read().equals(store.read())
+
+
+def test_legacy_file_is_migrated(tmp_path):
+    legacy = pd.DataFrame({"metric": ["srf", "srf"], "date": pd.to_datetime(["2024-06-03", "2025-06-02"]),
+                           "known": pd.to_datetime(["2024-06-03", "2025-06-02"]), "value": [0.0, 5.0]})
+    legacy.to_parquet(os.path.join(tmp_path, "vintages.parquet"), index=False)
+    store = VintageStore(str(tmp_path))
+    assert sorted(store._read_manifest()["partitions"]) == ["2024", "2025"]
+    pd.testing.assert_frame_equal(store.read(), legacy)
@@ -9,6 +9,7 @@ import {
   CartesianGrid,
 } from 'recharts';
 import { fmt$ } from '../lib/format';
+import { lastDays } from '../lib/range';
 
 // map status name to color hex
 const STATUS_COLOR: Record<string,string> = {
@@ -32,7 +33,7 @@ export default function MetricWidget({ metric, title, data, status }: Props) {
   // Default to green if status is not provided
   const statusColor = status ? STATUS_COLOR[status] : STATUS_COLOR.green;
   const color = statusColor || STATUS_COLOR.green;
-  const sparkData = useMemo(() => data.slice(-90), [data]);
+  const sparkData = useMemo(() => lastDays(data, 90), [data]);
   const latest = sparkData[sparkData.length - 1] || { value: 0, date: new Date().toISOString() };
   const [hoverIdx, setHoverIdx] = useState<number | null>(null);
 
@@ -1,10 +1,12 @@
-import React, { useState, useMemo } from 'react';
+import React, { useState, useMemo, useEffect, useRef } from 'react';
 import {
   ResponsiveContainer, AreaChart, XAxis, YAxis,
   CartesianGrid, ReferenceLine, Tooltip, Area,
 } from 'recharts';
 import { format, differenceInCalendarDays } from 'date-fns';
 import { fmt$ } from '../../lib/format';
+import { lastDays, spanDays } from '../../lib/range';
+import { CHART_PIXELS, getSeriesForRange } from '../../lib/data';
 
 type LabelPosition = 
   | 'top' 
@@ -44,7 +46,7 @@ export default function ChartBase({
   yMin,
   yMax
 }: ChartBaseProps) {
-  const totalDays = series.length;
+  const totalDays = spanDays(series);
   const today = new Date();
   
   // Define time range options
@@ -57,17 +59,36 @@ export default function ChartBase({
   // Default to showing maximum available data
   const [selectedRange, setSelectedRange] = useState(ranges[2]);
   
+  const visibleDays = Math.min(selectedRange.days, totalDays);
+
+  // Plot width, so the series is loaded at about one point per pixel
+  const container = useRef<HTMLDivElement>(null);
+  const [pixels, setPixels] = useState(CHART_PIXELS);
+  useEffect(() => {
+    if (container.current?.clientWidth) setPixels(container.current.clientWidth);
+  }, []);
+
+  // The bundled series shows until the level-of-detail copy for the range has loaded
+  const [loaded, setLoaded] = useState<any[] | null>(null);
+  useEffect(() => {
+    let current = true;
+    getSeriesForRange(metric, visibleDays, pixels)
+      .then(points => { if (current && Array.isArray(points) && points.length) setLoaded(points); })
+      .catch(() => {});
+    return () => { current = false; };
+  }, [metric, visibleDays, pixels]);
+
   // Filter data based on selected range
   const data = useMemo(
-    () => series.slice(-Math.min(selectedRange.days, totalDays)),
-    [selectedRange.days, totalDays, series]
+    () => lastDays(loaded ?? series, visibleDays),
+    [loaded, series, visibleDays]
   );
   
   // Fixed color for all charts
   const color = '#2962ff';
 
   return (
-    <div id={`chart-${metric}`} className="mb-12">
+    <div id={`chart-${metric}`} className="mb-12" ref={container}>
       {/* Chart Title and Range Selector */}
       <div className="flex justify-between items-center mb-4">
         <h3 className="text-2xl font-bold">{title}</h3>
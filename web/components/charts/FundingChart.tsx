@@ -4,9 +4,10 @@ import { ResponsiveContainer, ComposedChart, Line, Bar, ReferenceLine, Cartesian
 import series from "../../public/series/funding.json";
 import { ACCENT } from '../../lib/palette';
 import { differenceInCalendarDays, format } from 'date-fns';
+import { lastDays, spanDays } from '../../lib/range';
 
 export default function FundingChart({ meta }: { meta: any }) {
-  const totalDays = series.length;
+  const totalDays = spanDays(series);
   const today = new Date();
   
   const ranges = [
@@ -18,7 +19,7 @@ export default function FundingChart({ meta }: { meta: any }) {
   
   const [sel, setSel] = useState(ranges[2]);
   const data = useMemo(
-    () => series.slice(-Math.min(sel.days, totalDays)),
+    () => lastDays(series, Math.min(sel.days, totalDays)),
     [sel.days, totalDays]
   );
   const color = ACCENT['funding'];
@@ -0,0 +1,53 @@
+/**
+ * Decoder for the columnar series files the ETL writes next to each
+ * series JSON (/series/<metric>.col.json). Dates are a start day plus a
+ * constant step or per-point day deltas; values are a typed array.
+ */
+export interface ColumnarSeries {
+  start: string | null;
+  n: number;
+  dtype: 'int32' | 'float64';
+  step?: number;
+  deltas?: number[];
+  values: (number | null)[];
+}
+
+export interface DecodedSeries {
+  days: Int32Array;            // days since 1970-01-01
+  values: Int32Array | Float64Array;
+  missing: Uint8Array;         // 1 where the source value was null
+}
+
+const MS_PER_DAY = 86_400_000;
+
+export function decodeColumnar(series: ColumnarSeries): DecodedSeries {
+  const n = series.n;
+  const days = new Int32Array(n);
+  const values = series.dtype === 'int32' ? new Int32Array(n) : new Float64Array(n);
+  const missing = new Uint8Array(n);
+
+  let day = series.start ? Math.floor(Date.parse(series.start) / MS_PER_DAY) : 0;
+  for (let i = 0; i < n; i++) {
+    if (i > 0) day += series.deltas ? series.deltas[i - 1] : (series.step ?? 1);
+    days[i] = day;
+    const v = series.values[i];
+    if (v === null) missing[i] = 1;
+    else values[i] = v;
+  }
+  return { days, values, missing };
+}
+
+/**
+ * Expands a columnar series into the {date, value} records the charts use
+ */
+export function columnarToRecords(series: ColumnarSeries): { date: string; value: number | null }[] {
+  const { days, values, missing } = decodeColumnar(series);
+  const records = new Array(series.n);
+  for (let i = 0; i < series.n; i++) {
+    records[i] = {
+      date: new Date(days[i] * MS_PER_DAY).toISOString().replace('Z', ''),
+      value: missing[i] ? null : values[i],
+    };
+  }
+  return records;
+}
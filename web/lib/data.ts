@@ -1,5 +1,7 @@
 import kv, { KV_KEYS } from './kv';
 import { fetcher } from './fetcher';
+import { ColumnarSeries, columnarToRecords } from './columnar';
+import { seriesKey } from './series';
 
 // Type definition for dashboard data
 interface DashboardData {
@@ -39,7 +41,7 @@ export async function getDashboardData(): Promise<DashboardData> {
  * Gets series data for a specific metric
  */
 export async function getSeriesData(metric: string) {
-  const kvKey = getSeriesKey(metric);
+  const kvKey = seriesKey(metric);
   
   try {
     // Try to get from KV store first
@@ -54,8 +56,53 @@ export async function getSeriesData(metric: string) {
     // Continue to fallback
   }
 
-  // Fallback: fetch from static file
-  return fetcher(`/series/${metric}.json`);
+  // Fallback: fetch from static file, preferring the compact columnar encoding
+  try {
+    const columnar = await fetcher<ColumnarSeries>(`/series/${metric}.col.json`);
+    return columnarToRecords(columnar);
+  } catch (error) {
+    return fetcher(`/series/${metric}.json`);
+  }
+}
+
+interface LodIndex {
+  points: number;
+  levels: { points: number; spacing_days: number; file: string }[];
+  full: string;
+}
+
+// Plot width in pixels assumed when a chart has not been measured yet
+export const CHART_PIXELS = 800;
+
+/**
+ * Gets a series decimated for a chart showing `visibleDays` days across
+ * `pixels` pixels. With NEXT_PUBLIC_SERIES_URL set, the local series server
+ * (python -m etl serve) returns just the visible window, decimated to one point
+ * per pixel. Otherwise uses the ETL's level-of-detail pyramid: the coarsest
+ * level that still puts a point on every pixel of the visible range (the rule
+ * of pick_level in etl/downsample.py), else the full series.
+ */
+export async function getSeriesForRange(metric: string, visibleDays: number, pixels: number = CHART_PIXELS) {
+  const seriesUrl = process.env.NEXT_PUBLIC_SERIES_URL;
+  if (seriesUrl) {
+    try {
+      const start = new Date(Date.now() - visibleDays * 86400000).toISOString().slice(0, 10);
+      return columnarToRecords(await fetcher<ColumnarSeries>(
+        `${seriesUrl}/series/${metric}?start=${start}&points=${Math.round(pixels)}&format=col`
+      ));
+    } catch (error) {
+      // fall through to the static files
+    }
+  }
+  try {
+    const base = `/series/lod/${metric}`;
+    const index = await fetcher<LodIndex>(`${base}/index.json`);
+    const level = index.levels.find(l => l.spacing_days > 0 && visibleDays / l.spacing_days >= pixels);
+    const file = level ? `${base}/${level.file}` : `${base}/${index.full}`;
+    return columnarToRecords(await fetcher<ColumnarSeries>(file));
+  } catch (error) {
+    return getSeriesData(metric);
+  }
 }
 
 /**
@@ -96,27 +143,3 @@ export async function getLastUpdated() {
     return null;
   }
 }
-
-/**
- * Helper to map metric names to KV keys
- */
-function getSeriesKey(metric: string) {
-  switch (metric) {
-    case 'on_rrp':
-      return KV_KEYS.SERIES.ON_RRP;
-    case 'reserves':
-      return KV_KEYS.SERIES.RESERVES;
-    case 'move':
-      return KV_KEYS.SERIES.MOVE;
-    case 'srf':
-      return KV_KEYS.SERIES.SRF;
-    case 'funding':
-      return KV_KEYS.SERIES.FUNDING;
-    case 'bill_share':
-      return KV_KEYS.SERIES.BILL_SHARE;
-    case 'tail_bp':
-      return KV_KEYS.SERIES.TAIL_BP;
-    default:
-      return null;
-  }
-} 
\ No newline at end of file
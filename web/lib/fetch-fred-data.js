@@ -17,10 +17,16 @@ if (!FRED_API_KEY) {
   console.error('Please set this environment variable before running');
 }
 
+// FRED series of the dashboard, from the registry shared with the Python ETL
+const registry = require('../data/series.json');
+
 // Series IDs for Federal Reserve metrics
 const SERIES = {
-  on_rrp: 'RRPONTSYD',    // Overnight Reverse Repurchase Agreements
-  reserves: 'WRESBAL',    // Reserve Balances with Federal Reserve Banks (corrected ID)
+  ...Object.fromEntries(
+    Object.entries(registry.series)
+      .filter(([, entry]) => entry.source === 'fred')
+      .map(([key, entry]) => [key, entry.id])
+  ),
   move: 'VIXCLS',         // Using VIX as a substitute for MOVE index
   treasuries: 'TREAST',   // US Treasury Securities Held by the Federal Reserve
 };
@@ -98,7 +104,7 @@ function createFallbackData(seriesId, startDate, endDate) {
       dailyChange = -2300;
       volatility = 25000;
       break;
-    case 'WRESBAL': // Reserves - around 3.0-3.5T
+    case 'WRBWFRBL': // Reserves - around 3.0-3.5T
       baseValue = 3500000;
       dailyChange = -1000;
       volatility = 20000;
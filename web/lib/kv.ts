@@ -28,8 +28,34 @@ const mockKv = {
 let redisClient: RedisClientType | null = null;
 let kv = mockKv;
 
+// Local stand-in for Redis: the ETL's series server (python -m etl serve)
+// answers GET /kv/<key> with the same values, straight from the published files
+const localKvUrl = typeof window === 'undefined' ? process.env.LOCAL_KV_URL : undefined;
+
+if (localKvUrl) {
+  kv = {
+    async get(key: string) {
+      try {
+        const response = await fetch(`${localKvUrl}/kv/${encodeURIComponent(key)}`);
+        return response.ok ? await response.json() : null;
+      } catch (error) {
+        console.error('Local KV get error:', error);
+        return null;
+      }
+    },
+    async set(key: string, value: any) {
+      console.warn('Local KV is read-only; run the ETL to update it');
+      return false;
+    },
+    async del(key: string) {
+      console.warn('Local KV is read-only; run the ETL to update it');
+      return false;
+    }
+  };
+}
+
 // Only try to use Redis on the server side, not during build or client render
-if (typeof window === 'undefined') {
+else if (typeof window === 'undefined') {
   try {
     // Dynamic import to avoid issues during build
     import('redis').then((redis) => {
@@ -0,0 +1,48 @@
+/**
+ * Date-range helpers for chart series. Series are published at their native
+ * frequency (weekly reserves, business-day ON-RRP, auction days), so a range
+ * of N days is selected by date rather than by counting records.
+ */
+const MS_PER_DAY = 86_400_000;
+
+/** Calendar days covered by a date-sorted series, both ends included */
+export function spanDays(series: { date: string }[]): number {
+  if (series.length < 2) return series.length;
+  const first = Date.parse(series[0].date);
+  const last = Date.parse(series[series.length - 1].date);
+  return Math.round((last - first) / MS_PER_DAY) + 1;
+}
+
+/** The records of a date-sorted series that fall in its last `days` calendar days */
+export function lastDays<T extends { date: string }>(series: T[], days: number): T[] {
+  if (!series.length) return series;
+  const cutoff = Date.parse(series[series.length - 1].date) - (days - 1) * MS_PER_DAY;
+  let lo = 0;
+  let hi = series.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >> 1;
+    if (Date.parse(series[mid].date) < cutoff) lo = mid + 1;
+    else hi = mid;
+  }
+  return series.slice(lo);
+}
+
+/** The latest record on or before `date` (as-of lookup), or undefined */
+export function asOf<T extends { date: string }>(series: T[], date: string): T | undefined {
+  const target = Date.parse(date);
+  let lo = 0;
+  let hi = series.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >> 1;
+    if (Date.parse(series[mid].date) <= target) lo = mid + 1;
+    else hi = mid;
+  }
+  return lo ? series[lo - 1] : undefined;
+}
+
+/** The `days` calendar dates (YYYY-MM-DD) ending on `end`, oldest first */
+export function calendarDays(end: string, days: number): string[] {
+  const last = Date.parse(end.slice(0, 10));
+  return Array.from({ length: days }, (_, i) =>
+    new Date(last - (days - 1 - i) * MS_PER_DAY).toISOString().slice(0, 10));
+}
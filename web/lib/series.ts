@@ -0,0 +1,25 @@
+import registry from '../data/series.json';
+
+// Shared with the Python ETL (etl/registry.py): one entry per dashboard series
+export interface SeriesEntry {
+  title: string;
+  source: string;
+  id?: string;
+  task?: string;
+  units: string;
+  frequency: string;
+  release: { days: string; time: string; open?: string; lag_days?: number };
+}
+
+export const SERIES: Record<string, SeriesEntry> = registry.series;
+
+/** FRED series id of a registry metric, or undefined for other sources */
+export function fredSeriesId(metric: string): string | undefined {
+  const entry = SERIES[metric];
+  return entry?.source === 'fred' ? entry.id : undefined;
+}
+
+/** KV key of a published series: every registry metric plus the funding composite */
+export function seriesKey(metric: string): string | null {
+  return metric in SERIES || metric === 'funding' ? `series:${metric}` : null;
+}
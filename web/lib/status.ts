@@ -0,0 +1,36 @@
+import thresholds from '../data/thresholds.json';
+
+// Shared with the Python ETL (etl/status.py): one threshold table for every metric
+type Condition = [string, '<' | '<=' | '>' | '>=', number];
+type Rule = { all?: Condition[]; any?: Condition[] };
+type Thresholds = Record<string, { red: Rule; amber: Rule }>;
+
+export type StatusLevel = 'green' | 'amber' | 'red';
+
+function check([column, op, value]: Condition, row: Record<string, number>): boolean {
+  const x = row[column];
+  if (typeof x !== 'number' || isNaN(x)) return false;
+  switch (op) {
+    case '<': return x < value;
+    case '<=': return x <= value;
+    case '>': return x > value;
+    case '>=': return x >= value;
+  }
+}
+
+function matches(rule: Rule, row: Record<string, number>): boolean {
+  if (rule.all) return rule.all.every(c => check(c, row));
+  if (rule.any) return rule.any.some(c => check(c, row));
+  return false;
+}
+
+/**
+ * Classifies a dashboard row into red/amber/green for every metric in the threshold table
+ */
+export function classifyRow(row: Record<string, number>): Record<string, StatusLevel> {
+  const status: Record<string, StatusLevel> = {};
+  for (const [metric, rules] of Object.entries(thresholds as unknown as Thresholds)) {
+    status[metric] = matches(rules.red, row) ? 'red' : matches(rules.amber, row) ? 'amber' : 'green';
+  }
+  return status;
+}
@@ -1,6 +1,9 @@
 import { NextApiRequest, NextApiResponse } from 'next';
 import kv, { KV_KEYS } from '../../lib/kv';
 import { fetcher } from '../../lib/fetcher';
+import { classifyRow } from '../../lib/status';
+import { asOf, calendarDays, lastDays } from '../../lib/range';
+import { fredSeriesId } from '../../lib/series';
 
 // Vercel Cron syntax: 
 // Optional: Setup cron in your vercel.json to run this endpoint automatically
@@ -22,13 +25,14 @@ export default async function handler(
 
   try {
     // Fetch data from FRED API
-    const dashboardData = await fetchDashboardData();
+    const observations = await fetchLatestObservations();
+    const dashboardData = buildDashboardData(observations);
     
     // Store in KV
     await kv.set(KV_KEYS.DASHBOARD, dashboardData);
     
     // Also store the series data
-    await updateSeriesData(dashboardData);
+    await updateSeriesData(observations);
     
     // Update last updated timestamp
     await kv.set(KV_KEYS.LAST_UPDATED, new Date().toISOString());
@@ -48,73 +52,78 @@ export default async function handler(
   }
 }
 
-async function fetchDashboardData() {
+interface DataPoint {
+  date: string;
+  value: number;
+}
+
+interface LatestObservations {
+  on_rrp: DataPoint;
+  reserves: DataPoint;
+}
+
+async function fetchLatestObservations(): Promise<LatestObservations> {
   // Fetch ON-RRP data
-  const onRrpUrl = createFredUrl('RRPONTSYD');
-  const onRrpData = await fetcher(onRrpUrl);
-  const onRrp = parseLatestObservation(onRrpData);
+  const onRrpUrl = createFredUrl(fredSeriesId('on_rrp')!);
+  const onRrp = parseLatestObservation(await fetcher(onRrpUrl));
   
   // Fetch Reserves data
-  const reservesUrl = createFredUrl('WRBWFRBL');
-  const reservesData = await fetcher(reservesUrl);
-  const reserves = parseLatestObservation(reservesData);
-  
-  // Calculate statuses
-  const status = {
-    on_rrp: onRrp < 50_000 ? "red" : onRrp < 100_000 ? "amber" : "green",
-    reserves: reserves < 2_500_000 ? "red" : reserves < 3_000_000 ? "amber" : "green",
-    move: 120, // Default value (will be updated if fetched)
-    srf: "green", // Default value
-    tail: "green" // Default value
-  };
-  
+  const reservesUrl = createFredUrl(fredSeriesId('reserves')!);
+  const reserves = parseLatestObservation(await fetcher(reservesUrl));
+
+  return { on_rrp: onRrp, reserves };
+}
+
+function buildDashboardData(observations: LatestObservations) {
   // Create dashboard object
-  return {
-    date: new Date().toISOString().split('T')[0],
-    on_rrp: onRrp,
-    reserves: reserves,
+  const values = {
+    on_rrp: observations.on_rrp.value,
+    reserves: observations.reserves.value,
     move: 120, // Default value (will be updated if we add more data sources)
     srf: 0, // Default value
     bill_share: 0.5, // Default value
     tail_bp: 2, // Default value
-    status
+  };
+
+  // Statuses use the same threshold table as the Python ETL
+  return {
+    date: new Date().toISOString().split('T')[0],
+    ...values,
+    status: classifyRow(values)
   };
 }
 
-interface DataPoint {
-  date: string;
-  value: number;
+/**
+ * Series are kept at their native frequency: one point per observation,
+ * dated by the observation itself. A newer observation is appended, one
+ * for the same date replaces the stored value (a revision), an older one is ignored.
+ */
+function append(series: DataPoint[], point: DataPoint): DataPoint[] {
+  const last = series[series.length - 1];
+  if (!last || point.date > last.date) return [...series, point];
+  if (point.date === last.date) return [...series.slice(0, -1), point];
+  return series;
 }
 
-async function updateSeriesData(latestData: any) {
+async function updateSeriesData(observations: LatestObservations) {
   // Get existing series data or initialize new
   const onRrpSeries = (await kv.get(KV_KEYS.SERIES.ON_RRP) || []) as DataPoint[];
   const reservesSeries = (await kv.get(KV_KEYS.SERIES.RESERVES) || []) as DataPoint[];
-  
-  // Add new data points with current date
-  const today = new Date().toISOString().split('T')[0];
-  const newPoint = { date: today };
-  
+
   // Update ON-RRP series
-  const updatedOnRrp = [...onRrpSeries, { 
-    ...newPoint, 
-    value: latestData.on_rrp 
-  }];
-  await kv.set(KV_KEYS.SERIES.ON_RRP, updatedOnRrp.slice(-365)); // Keep last year only
-  
+  const updatedOnRrp = lastDays(append(onRrpSeries, observations.on_rrp), 365); // Keep last year only
+  await kv.set(KV_KEYS.SERIES.ON_RRP, updatedOnRrp);
+
   // Update Reserves series
-  const updatedReserves = [...reservesSeries, { 
-    ...newPoint, 
-    value: latestData.reserves 
-  }];
-  await kv.set(KV_KEYS.SERIES.RESERVES, updatedReserves.slice(-365)); // Keep last year only
-  
-  // Create sparks data (last 30 points)
-  const sparks = updatedOnRrp.slice(-30).map((item, i) => ({
-    date: item.date,
-    on_rrp: item.value,
-    reserves: updatedReserves[updatedReserves.length - 30 + i]?.value || 0
-  }));
+  const updatedReserves = lastDays(append(reservesSeries, observations.reserves), 365); // Keep last year only
+  await kv.set(KV_KEYS.SERIES.RESERVES, updatedReserves);
+
+  // Create sparks data: the last 30 calendar days, each series as of each day
+  const { on_rrp, reserves } = observations;
+  const end = on_rrp.date > reserves.date ? on_rrp.date : reserves.date;
+  const sparks = calendarDays(end, 30)
+    .map(date => ({ date, on_rrp: asOf(updatedOnRrp, date)?.value, reserves: asOf(updatedReserves, date)?.value || 0 }))
+    .filter(point => point.on_rrp !== undefined);
   
   await kv.set(KV_KEYS.SPARKS, sparks);
 }
@@ -129,7 +138,7 @@ function createFredUrl(seriesId: string): string {
   return `https://api.stlouisfed.org/fred/series/observations?series_id=${seriesId}&api_key=${apiKey}&file_type=json&sort_order=desc&limit=1`;
 }
 
-function parseLatestObservation(data: any): number {
+function parseLatestObservation(data: any): DataPoint {
   if (!data?.observations || !data.observations[0]) {
     throw new Error('Invalid FRED API response: missing observations');
   }
@@ -139,5 +148,6 @@ function parseLatestObservation(data: any): number {
     throw new Error('Invalid FRED API response: value is not a number');
   }
   
-  return value;
+  // Keep the observation's own date, not the day it was fetched
+  return { date: data.observations[0].date, value };
 } 
\ No newline at end of file